@@ -33,6 +33,24 @@ class BoxFunction:
 
         self._create_function_structure()
 
+    def __setattr__(self, name, value):
+        if getattr(self, "_frozen", False):
+            raise AttributeError(f"BoxFunction {self.main_function_name} is frozen, attribute {name} can not be set.")
+        super().__setattr__(name, value)
+
+    def freeze(self):
+        """
+        Make the BoxFunction immutable, so it can be shared, see `BoxFunctionRegistry`.
+
+        Lists of imports, global statements and helper functions are turned into tuples, lists of the function
+        structure as well, see `FunctionStructure.freeze`.
+        """
+        self.imports = tuple(self.imports)
+        self.global_statements = tuple(self.global_statements)
+        self.helper_functions = tuple(self.helper_functions)
+        self.function_structure.freeze()
+        self._frozen = True
+
     def get_file_code(self) -> str:
         return self.code
 
@@ -65,8 +83,8 @@ class BoxFunction:
         """
         if isinstance(other, BoxFunction):
             return (self.main_function == other.main_function
-                    and self.helper_functions == other.helper_functions
-                    and self.imports == other.imports
+                    and tuple(self.helper_functions) == tuple(other.helper_functions)
+                    and tuple(self.imports) == tuple(other.imports)
                     and self.min_args == other.min_args
                     and self.max_args == other.max_args)
         return False
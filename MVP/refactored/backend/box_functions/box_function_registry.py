@@ -0,0 +1,72 @@
+import hashlib
+import threading
+from typing import Callable
+
+from MVP.refactored.backend.box_functions.box_function import BoxFunction
+
+
+class BoxFunctionRegistry:
+    """
+    Shared analyzed BoxFunctions keyed by box label and SHA-256 of the box source code.
+
+    Creating a BoxFunction parses and formats its code several times, so it is done once per label and source,
+    every box with the same code gets the same frozen instance. Entries are content-addressed, so a changed source
+    never returns stale analysis, invalidation only drops entries that can not be used anymore. It is called when
+    the source of a label is changed or removed, see `MainDiagram.add_function`.
+    """
+    functions: dict[tuple[str, str], BoxFunction] = {}
+    callables: dict[tuple[str, str], Callable] = {}  # compiled main functions, keyed like functions
+    lock = threading.Lock()
+
+    @staticmethod
+    def get_key(label: str, code: str | None) -> tuple[str, str]:
+        return label, hashlib.sha256((code or "").encode()).hexdigest()
+
+    @staticmethod
+    def get(label: str, code: str | None) -> BoxFunction:
+        """
+        Return frozen BoxFunction of the label with the given source code.
+
+        :raises ValueError: if the code does not contain the main function, failures are not cached.
+        """
+        key = BoxFunctionRegistry.get_key(label, code)
+        box_function = BoxFunctionRegistry.functions.get(key)
+        if box_function is None:
+            box_function = BoxFunction(main_function_name=label, file_code=code)
+            box_function.freeze()
+            with BoxFunctionRegistry.lock:
+                box_function = BoxFunctionRegistry.functions.setdefault(key, box_function)
+        return box_function
+
+    @staticmethod
+    def get_callable(label: str, code: str | None) -> Callable:
+        """
+        Return the main function of the label compiled from the given source code.
+
+        Source is compiled and executed once per label and source, in its own namespace, so globals and helper
+        functions of different boxes do not clash.
+
+        :raises ValueError: if the code does not contain the main function, failures are not cached.
+        """
+        key = BoxFunctionRegistry.get_key(label, code)
+        function = BoxFunctionRegistry.callables.get(key)
+        if function is None:
+            box_function = BoxFunctionRegistry.get(label, code)
+            namespace = {"__name__": f"box_{label}"}
+            exec(compile(box_function.code, f"<box {label}>", "exec"), namespace)
+            function = namespace[box_function.main_function_name]
+            with BoxFunctionRegistry.lock:
+                function = BoxFunctionRegistry.callables.setdefault(key, function)
+        return function
+
+    @staticmethod
+    def invalidate(label: str = None):
+        """Drop BoxFunctions and compiled main functions of the label, all of them if label is not given."""
+        with BoxFunctionRegistry.lock:
+            if label is None:
+                BoxFunctionRegistry.functions.clear()
+                BoxFunctionRegistry.callables.clear()
+                return
+            for table in (BoxFunctionRegistry.functions, BoxFunctionRegistry.callables):
+                for key in [key for key in table if key[0] == label]:
+                    del table[key]
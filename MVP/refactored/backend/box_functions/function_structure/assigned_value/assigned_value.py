@@ -11,6 +11,9 @@ class AssignedValue:
         self.value = value
         self.elements = elements or []
 
+    def freeze(self) -> None:
+        self.elements = tuple(self.elements)
+
     def __hash__(self):
         return hash((
             self.value,
@@ -21,4 +21,4 @@ class FunctionCall(AssignedValue):
     def __eq__(self, other):
         if not isinstance(other, FunctionCall):
             return False
-        return self.value == other.value and self.elements == other.elements
+        return self.value == other.value and tuple(self.elements) == tuple(other.elements)
@@ -26,9 +26,14 @@ class CodeLine:
     def __eq__(self, other):
         if not isinstance(other, CodeLine):
             return False
-        return (self.assigned_variables == other.assigned_variables and
+        return (tuple(self.assigned_variables) == tuple(other.assigned_variables) and
                 self.assigned_value == other.assigned_value)
 
+    def freeze(self) -> None:
+        self.assigned_variables = tuple(self.assigned_variables)
+        if self.assigned_value:
+            self.assigned_value.freeze()
+
     def __hash__(self):
         return hash((
             tuple(self.assigned_variables),
@@ -22,12 +22,21 @@ class FunctionStructure:
                 f"return_line={self.return_line!r})")
 
     def __eq__(self, other):
-        return (self.body_lines == other.body_lines
+        return (tuple(self.body_lines) == tuple(other.body_lines)
                 and self.return_line == other.return_line)
 
     def __hash__(self):
         return hash((tuple(self.body_lines), self.return_line))
 
+    def freeze(self) -> None:
+        """Turn arguments, body lines and lists of the code lines into tuples, so the structure can be shared."""
+        self.arguments = tuple(self.arguments)
+        self.body_lines = tuple(self.body_lines)
+        for code_line in self.body_lines:
+            code_line.freeze()
+        if self.return_line:
+            self.return_line.freeze()
+
     def convert_mutable_variables_to_immutable(self) -> None:
         used_variable_names = set(self.arguments)
         for code_line in self.body_lines:
@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import ast
+from queue import Queue
+from types import CodeType
+
+from MVP.refactored.backend.box_functions.box_function import BoxFunction
+from MVP.refactored.backend.code_generation.code_generator import CodeGenerator
+from MVP.refactored.backend.code_generation.scoped_renamer import ScopedRenamer
+from MVP.refactored.backend.diagram_callback import Receiver
+from MVP.refactored.backend.hypergraph.canvas_hierarchy import CanvasHierarchy
+from MVP.refactored.backend.hypergraph.hyper_edge import HyperEdge
+from MVP.refactored.backend.hypergraph.hypergraph import Hypergraph
+from MVP.refactored.backend.hypergraph.hypergraph_manager import HypergraphManager
+from MVP.refactored.frontend.components.custom_canvas import CustomCanvas
+
+Variable = tuple[str, int | None]  # variable name and index of the element, if the variable holds a tuple
+
+
+class AstCodeGenerator:
+    """
+    Code generation backend which builds `ast.Module` of the canvas directly.
+
+    Box functions are parsed and renamed as trees, see `ScopedRenamer`, and main functions of hypergraphs are built
+    from function definition, call assignment and return nodes, so no source is concatenated and no formatter runs.
+    The module is the same program as the one generated by `CodeGenerator.generate_code`, it is meant for machine
+    consumption: `generate_code` returns `ast.unparse` text and `compile_code` a code object ready for `exec`.
+    """
+
+    @classmethod
+    def build_module(cls, canvas: CustomCanvas) -> ast.Module:
+        """Build the module of the canvas: imports, global statements, helper and main functions of box functions
+        and main functions of hypergraphs on the canvas."""
+        hypergraphs_on_this_canvas: list[Hypergraph] = HypergraphManager.get_graphs_by_canvas_id(canvas.id)
+        hierarchy: CanvasHierarchy = HypergraphManager.get_canvas_hierarchy(canvas.receiver)
+
+        box_functions: set[BoxFunction] = set()
+        for hypergraph in hypergraphs_on_this_canvas:
+            box_functions.update(CodeGenerator.get_all_box_functions(hypergraph, hierarchy))
+        box_functions_in_order = sorted(box_functions, key=lambda f: (f.main_function_name, f.main_function))
+        items_names = CodeGenerator.get_box_functions_items_names(box_functions)
+
+        imports: dict[str, ast.stmt] = {}  # keyed by dump of the node, equal statements are added once
+        global_statements: dict[str, ast.stmt] = {}
+        functions: list[ast.stmt] = []
+        main_functions: list[ast.stmt] = []
+        renamed_functions: dict[BoxFunction, str] = {}
+        for i, box_function in enumerate(box_functions_in_order):
+            new_names = {name: f"{name}_{i}" for name in items_names[box_function]}
+            renamer = ScopedRenamer(new_names)
+            for code in box_function.imports:
+                for statement in ast.parse(code).body:
+                    imports.setdefault(ast.dump(statement), statement)
+            for code in box_function.global_statements:
+                for statement in renamer.visit(ast.parse(code)).body:
+                    global_statements.setdefault(ast.dump(statement), statement)
+            for code in box_function.helper_functions:
+                functions.extend(renamer.visit(ast.parse(code)).body)
+            main_functions.extend(renamer.visit(ast.parse(box_function.main_function)).body)
+            renamed_functions[box_function] = new_names[box_function.main_function_name]
+
+        body = list(imports.values()) + list(global_statements.values()) + functions + main_functions
+        for i, hypergraph in enumerate(hypergraphs_on_this_canvas):
+            body.append(cls.build_main_function(hypergraph, renamed_functions, f"main_{i}", canvas.receiver))
+        return ast.fix_missing_locations(ast.Module(body=body, type_ignores=[]))
+
+    @classmethod
+    def generate_code(cls, canvas: CustomCanvas) -> str:
+        return ast.unparse(cls.build_module(canvas)) + "\n"
+
+    @classmethod
+    def compile_code(cls, canvas: CustomCanvas, filename: str = "<diagram>") -> CodeType:
+        return compile(cls.build_module(canvas), filename, "exec")
+
+    @classmethod
+    def build_main_function(cls,
+                            hypergraph: Hypergraph,
+                            renamed_functions: dict[BoxFunction, str],
+                            func_name: str,
+                            receiver: Receiver
+                            ) -> ast.FunctionDef:
+        """
+        Build the main function of the hypergraph, see `CodeGenerator.construct_main_function`.
+
+        Every hyper edge in topological order is a call assigned to `res_<index>`, a hyper edge with several target
+        nodes passes element `i` of its result to target node `i`.
+        """
+        variables: dict[int, Variable] = {}  # keyed by node group hash
+        parameters: list[ast.arg] = []
+        for index, node in enumerate(CodeGenerator.get_sorted_diagram_inputs(hypergraph, receiver,
+                                                                             hypergraph.canvas_id)):
+            parameters.append(ast.arg(arg=f"input_{index}"))
+            variables[CodeGenerator.get_input_actual_node_group_hash(node, receiver)] = (f"input_{index}", None)
+
+        hyper_edge_queue: Queue[HyperEdge] = Queue()
+        CodeGenerator.get_queue_of_hyper_edges(hypergraph, hyper_edge_queue)
+        body: list[ast.stmt] = []
+        index = 0
+        while not hyper_edge_queue.empty():
+            hyper_edge = hyper_edge_queue.get()
+            variable = f"res_{index}"
+            arguments = [cls._load(variables[CodeGenerator.get_output_actual_node_group_hash(node, receiver)])
+                         for node in hyper_edge.get_source_nodes()]
+            call = ast.Call(func=ast.Name(id=renamed_functions[hyper_edge.get_box_function()], ctx=ast.Load()),
+                            args=arguments, keywords=[])
+            body.append(ast.Assign(targets=[ast.Name(id=variable, ctx=ast.Store())], value=call))
+
+            target_nodes = hyper_edge.get_target_nodes()
+            if len(target_nodes) > 1:
+                for i, target_node in enumerate(target_nodes):
+                    variables.setdefault(CodeGenerator.get_input_actual_node_group_hash(target_node, receiver),
+                                         (variable, i))
+            else:
+                variables[CodeGenerator.get_input_actual_node_group_hash(target_nodes[0], receiver)] = (variable, None)
+            index += 1
+
+        returned: list[ast.expr] = []
+        added: set[int] = set()
+        for output in CodeGenerator.get_sorted_diagram_outputs(hypergraph, receiver, hypergraph.canvas_id):
+            actual_hash = CodeGenerator.get_output_actual_node_group_hash(output, receiver)
+            if actual_hash in variables and actual_hash not in added:
+                returned.append(cls._load(variables[actual_hash]))
+                added.add(actual_hash)
+        if len(returned) > 1:
+            body.append(ast.Return(value=ast.Tuple(elts=returned, ctx=ast.Load())))
+        else:
+            body.append(ast.Return(value=returned[0] if returned else None))
+
+        # fields of the definition differ between Python versions, parsed empty definition has all of them
+        function: ast.FunctionDef = ast.parse(f"def {func_name}():\n    pass\n").body[0]
+        function.args.args = parameters
+        function.body = body
+        return function
+
+    @staticmethod
+    def _load(variable: Variable) -> ast.expr:
+        name, index = variable
+        if index is None:
+            return ast.Name(id=name, ctx=ast.Load())
+        return ast.Subscript(value=ast.Name(id=name, ctx=ast.Load()), slice=ast.Constant(value=index),
+                             ctx=ast.Load())
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+from typing import Any, Callable, Hashable, Iterable
+
+
+class CodeGenerationCache:
+    """
+    Sections of generated code of a canvas, kept between generations.
+
+    Sections are grouped by kind (renamed box functions, formatted code, main functions) and keyed by their content:
+    box function content and index, source text, structural fingerprint of a hypergraph. Generation looks every
+    section up in the cache of the previous generation and creates only the missing ones. Only sections used by the
+    last generation are kept, so the cache does not grow while the diagram is edited.
+
+    Last generations are kept by the active hypergraph registry, so registries with the same canvas ids do not
+    replace each other's sections, see `HypergraphRegistry.code_generation_caches`.
+    """
+
+    def __init__(self, previous: CodeGenerationCache = None):
+        self.previous = previous
+        self.sections: dict[str, dict[Hashable, Any]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def get_caches() -> dict[Any, CodeGenerationCache]:
+        """Return last generations of canvases of the active registry, keyed by canvas id."""
+        from MVP.refactored.backend.hypergraph.hypergraph_manager import HypergraphManager
+        return HypergraphManager.get_registry().code_generation_caches
+
+    @staticmethod
+    def start(canvas_id) -> CodeGenerationCache:
+        """Return the cache of a new generation of the canvas, which reuses sections of the previous generation."""
+        return CodeGenerationCache(CodeGenerationCache.get_caches().get(canvas_id))
+
+    def finish(self, canvas_id):
+        """Keep sections of this generation for the next generation of the canvas."""
+        self.previous = None
+        CodeGenerationCache.get_caches()[canvas_id] = self
+
+    @staticmethod
+    def clear():
+        """Drop last generations of canvases of the active registry."""
+        CodeGenerationCache.get_caches().clear()
+
+    def get_or_create(self, kind: str, key: Hashable, create: Callable[[], Any]) -> Any:
+        table = self.sections.setdefault(kind, {})
+        if key in table:
+            return table[key]
+        previous_table = self.previous.sections.get(kind, {}) if self.previous is not None else {}
+        if key in previous_table:
+            value = previous_table[key]
+            self.hits += 1
+        else:
+            value = create()
+            self.misses += 1
+        table[key] = value
+        return value
+
+    def get_or_create_all(self, kind: str, keys: list[Hashable],
+                          create_all: Callable[[list[Hashable]], Iterable[Any]]) -> list[Any]:
+        """
+        Return sections of all keys in the order of the keys.
+
+        Missing sections are created by one call of `create_all` with the list of their keys, which returns the
+        sections in the same order, so they can be created in parallel.
+        """
+        table = self.sections.setdefault(kind, {})
+        previous_table = self.previous.sections.get(kind, {}) if self.previous is not None else {}
+        missing: dict[Hashable, None] = {}
+        for key in keys:
+            if key in table or key in missing:
+                continue
+            if key in previous_table:
+                table[key] = previous_table[key]
+                self.hits += 1
+            else:
+                missing[key] = None
+        if missing:
+            for key, value in zip(missing, create_all(list(missing))):
+                table[key] = value
+            self.misses += len(missing)
+        return [table[key] for key in keys]
@@ -1,11 +1,20 @@
+import hashlib
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor
 from queue import Queue
+from typing import Callable
 
 import autopep8
 
 from MVP.refactored.backend.box_functions.box_function import BoxFunction
+from MVP.refactored.backend.box_functions.box_function_registry import BoxFunctionRegistry
+from MVP.refactored.backend.code_generation.code_generation_cache import CodeGenerationCache
 from MVP.refactored.backend.code_generation.code_inspector import CodeInspector
 from MVP.refactored.backend.diagram import Diagram
 from MVP.refactored.backend.diagram_callback import Receiver
+from MVP.refactored.backend.execution.dataflow_optimizer import DataflowOptimizer, OptimizationReport
+from MVP.refactored.backend.execution.dataflow_plan import DataflowPlan
+from MVP.refactored.backend.hypergraph.canvas_hierarchy import CanvasHierarchy
 from MVP.refactored.backend.hypergraph.hyper_edge import HyperEdge
 from MVP.refactored.backend.hypergraph.hypergraph import Hypergraph
 from MVP.refactored.backend.hypergraph.hypergraph_manager import HypergraphManager
@@ -17,72 +26,179 @@ from MVP.refactored.frontend.components.custom_canvas import CustomCanvas
 
 class CodeGenerator:
     @classmethod
-    def generate_code(cls, canvas: CustomCanvas) -> str:
+    def generate_code(cls, canvas: CustomCanvas, executor: Executor = None, report: OptimizationReport = None) -> str:
         """
         Generates Python code based on the structure and functional elements of the provided canvas and related canvasses.
 
         This method processes a set of box functions associated with the given canvas, extracts global statements, helper
         functions, and main functions, renames them for uniqueness, and constructs the final composite Python script.
-        The resulting script is formatted using the autopep8 library and written to a file named "diagram.py".
-        The formatted code is also returned by the method as a string.
+        Every function and the block of imports and global statements are formatted using the autopep8 library
+        separately and joined with two blank lines. Layout differs from formatting the whole file at once, which was
+        done before generation became incremental: imports are sorted and not separated by blank lines, and sections
+        follow the order of box functions instead of the iteration order of sets.
+
+        Generation is incremental: renamed box functions, formatted sections and main functions are taken from the
+        previous generation of the canvas when their content did not change, see `CodeGenerationCache`. Box
+        functions are numbered in a stable order and main functions are keyed by the structural fingerprint of their
+        hypergraph, so editing one box rebuilds only main functions that contain it.
+
+        If an executor is given, missing sections are renamed and formatted in it, see `generate_code_in_parallel`.
+        Work items are strings and tuples and results are merged in the order of the sections, so the code is the
+        same as without the executor.
+
+        If a report of `optimize` is given, calls of removed boxes are left out of main functions, a merged box
+        reuses the result variable of the box it was merged into, and functions of boxes which are not called are
+        not generated.
 
         Arguments:
             canvas (CustomCanvas): The main canvas from which the function hierarchy
                 and code elements are derived.
+            executor (Executor): Executor for renaming and formatting, sections are created in this thread if None.
+            report (OptimizationReport): Boxes removed by the optimizer, every box is called if None.
 
         Returns:
             str: The generated and auto formatted Python code as a single string.
         """
+        cache = CodeGenerationCache.start(canvas.id)
         hypergraphs_on_this_canvas: list[Hypergraph] = HypergraphManager.get_graphs_by_canvas_id(canvas.id)
+        hierarchy: CanvasHierarchy = HypergraphManager.get_canvas_hierarchy(canvas.receiver)
 
+        removed_ids = set(report.get_removed_ids()) if report is not None else set()
         box_functions: set[BoxFunction] = set()
         for hypergraph in hypergraphs_on_this_canvas:
-            box_functions.update(cls.get_all_box_functions(hypergraph))
-
-        box_functions_items_names: dict[BoxFunction, set[str]] = cls.get_box_functions_items_names(box_functions)
-
-        (global_statements,
-         helper_functions,
-         main_functions,
-         main_functions_new_names) = CodeInspector.rename(box_functions_items_names)
-
-        # imports
-        file_content: str = "\n".join(set(imp for f in box_functions for imp in f.imports))
-        # global statements
-        file_content += "".join(global_statements) + "\n"
-        # helper functions
-        file_content += "\n\n".join(helper_functions) + "\n\n"
-        # functions
-        file_content += "\n\n".join(main_functions)
-        # main functions
-        for i, hypergraph in enumerate(hypergraphs_on_this_canvas):
-            func_name = f"main_{i}"
-            file_content += "\n\n" + cls.construct_main_function(hypergraph,
-                                                                 main_functions_new_names,
-                                                                 func_name,
-                                                                 canvas.receiver)
-
-        return autopep8.fix_code(file_content)
+            box_functions.update(cls.get_all_box_functions(hypergraph, hierarchy, removed_ids))
+        box_functions_in_order = sorted(box_functions, key=lambda f: (f.main_function_name, f.main_function))
+
+        names_in_order = cache.get_or_create_all("names", box_functions_in_order, lambda missing: [
+            frozenset(cls.get_box_functions_items_names({f})[f]) for f in missing])
+        renamed_in_order = cache.get_or_create_all(
+            "renamed", [(f, i, names) for i, (f, names) in enumerate(zip(box_functions_in_order, names_in_order))],
+            lambda missing: cls._map(executor, CodeInspector.rename_sources,
+                                     [f.main_function_name for f, _, _ in missing],
+                                     [tuple(f.global_statements) for f, _, _ in missing],
+                                     [tuple(f.helper_functions) for f, _, _ in missing],
+                                     [f.main_function for f, _, _ in missing],
+                                     [names for _, _, names in missing],
+                                     [i for _, i, _ in missing]))
+
+        global_statements: dict[str, None] = {}  # dicts keep the first occurrence of equal sections in order
+        helper_functions: dict[str, None] = {}
+        main_functions: dict[str, None] = {}
+        main_functions_new_names: dict[BoxFunction, str] = {}
+        for box_function, (renamed_globals, renamed_helpers, renamed_main, new_name) in zip(box_functions_in_order,
+                                                                                           renamed_in_order):
+            global_statements.update(dict.fromkeys(renamed_globals))
+            helper_functions.update(dict.fromkeys(renamed_helpers))
+            main_functions[renamed_main] = None
+            if new_name is not None:
+                main_functions_new_names[box_function] = new_name
+
+        new_names_by_label = {f.main_function_name: name for f, name in main_functions_new_names.items()}
+        imports = sorted({imp for f in box_functions for imp in f.imports})
+        header = "".join(imports) + "".join(statement.rstrip("\n") + "\n" for statement in global_statements)
+
+        sections = cache.get_or_create_all("formatted", [header] + list(helper_functions) + list(main_functions),
+                                           lambda missing: cls._map(executor, autopep8.fix_code, missing))
+
+        report_key = report.get_key() if report is not None else None
+        main_keys = {(f"main_{i}", cls.get_structural_fingerprint(hypergraph, hierarchy, canvas.receiver,
+                                                                   new_names_by_label), report_key): hypergraph
+                     for i, hypergraph in enumerate(hypergraphs_on_this_canvas)}
+        sections += cache.get_or_create_all("main", list(main_keys), lambda missing: cls._map(
+            executor, autopep8.fix_code, [cls.construct_main_function(main_keys[key], main_functions_new_names,
+                                                                      key[0], canvas.receiver, report)
+                                          for key in missing]))
+        cache.finish(canvas.id)
+
+        return "\n\n\n".join(section.strip("\n") for section in sections if section.strip()) + "\n"
+
+    @classmethod
+    def generate_code_in_parallel(cls, canvas: CustomCanvas, max_workers: int = None) -> str:
+        """
+        Generate code of the canvas, renaming and formatting sections in a pool of processes.
+
+        Hypergraphs are resolved to unformatted main functions in this process, which is linear in their size,
+        CPU heavy parsing, renaming and formatting of box functions and main functions runs in the pool. Starting
+        the pool takes time, so it pays off for projects with many box functions or hypergraphs.
+        """
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            return cls.generate_code(canvas, executor)
+
+    @classmethod
+    def optimize(cls, canvas: CustomCanvas, pure_labels: set[str] = None) -> OptimizationReport:
+        """
+        Find boxes of the canvas that generated code does not need to call, see `DataflowOptimizer`.
+
+        Optimizer works on the flat dataflow plan of the canvas, registered hypergraphs are not modified. The report
+        is passed to `generate_code`.
+
+        :raises ValueError: if hyper edges form a cycle or a box takes a value which is not computed.
+        """
+        _, report = DataflowOptimizer.optimize(DataflowPlan.from_canvas(canvas.receiver, canvas.id), pure_labels)
+        return report
+
+    @staticmethod
+    def _map(executor: Executor | None, function: Callable, *iterables: list) -> list:
+        """Apply the function to the items in the executor or in this thread and return results in item order."""
+        if executor is None:
+            return list(map(function, *iterables))
+        chunk_size = max(1, len(iterables[0]) // (4 * (os.cpu_count() or 1)))
+        return list(executor.map(function, *iterables, chunksize=chunk_size))
 
     @classmethod
-    def get_all_box_functions(cls, hypergraph: Hypergraph) -> set[BoxFunction]:
+    def get_structural_fingerprint(cls,
+                                   hypergraph: Hypergraph,
+                                   hierarchy: CanvasHierarchy,
+                                   receiver: Receiver,
+                                   new_names_by_label: dict[str, str]
+                                   ) -> bytes:
+        """
+        Return digest of everything the main function of the hypergraph is generated from.
+
+        It covers hyper edges with their ports, labels and renamed functions, node groups and hypergraph sources
+        and targets of the hypergraph and of hypergraphs nested in its compound hyper edges, diagram inputs and
+        outputs of their canvases and sub diagram wires connected to them.
+        """
+        digest = hashlib.blake2b(digest_size=16)
+        for nested in hierarchy.get_nested_hypergraphs(hypergraph):
+            parts = [nested.id, nested.canvas_id,
+                     [(hyper_edge.id, hyper_edge.box_label, new_names_by_label.get(hyper_edge.box_label),
+                       hyper_edge.sub_diagram_canvas_id,
+                       [node.id for node in hyper_edge.get_source_nodes()],
+                       [node.id for node in hyper_edge.get_target_nodes()]) for hyper_edge in nested.edges.values()],
+                     [(node.id, node.find_group_root().id) for node in nested.nodes.values()],
+                     list(nested.hypergraph_source), list(nested.hypergraph_target)]
+            diagram: Diagram | None = receiver.diagrams.get(nested.canvas_id)
+            if diagram is not None:
+                connections = [(connection.id, connection.index) for connection in diagram.input + diagram.output
+                               if connection.id in nested.nodes]
+                parts.append(connections)
+                if nested is not hypergraph:
+                    connection_ids = {connection_id for connection_id, _ in connections}
+                    parts.append([(resource.id, [connection.id for connection in resource.get_left_connections()
+                                                 + resource.get_right_connections()])
+                                  for resource in diagram.resources
+                                  if any(connection.id in connection_ids for connection in
+                                         resource.left_connection + resource.right_connection)])
+            digest.update(repr(parts).encode())
+        return digest.digest()
+
+    @classmethod
+    def get_all_box_functions(cls, hypergraph: Hypergraph, hierarchy: CanvasHierarchy = None,
+                              excluded_ids: set = frozenset()) -> set[BoxFunction]:
         """
         Retrieve all BoxFunction objects from a given hypergraph.
 
-        This method traverses the hypergraph to collect all BoxFunction objects
-        associated with its hyper edges. If a hyper edge is compound, it recursively
-        explores the nested hypergraphs to gather BoxFunction objects from them.
+        Atomic hyper edges of the hypergraph and of hypergraphs nested in its compound hyper edges are taken from
+        the canvas hierarchy in one pass, BoxFunctions are shared through `BoxFunctionRegistry`. Hyper edges with
+        ids in `excluded_ids` are skipped.
         """
-        box_functions: set[BoxFunction] = set()
-        for hyper_edge in hypergraph.get_all_hyper_edges():
-            if hyper_edge.is_compound():
-                for subgraph in hyper_edge.get_hypergraphs_inside():
-                    box_functions.update(cls.get_all_box_functions(subgraph))
-            else:
-                from MVP.refactored.frontend.windows.main_diagram import MainDiagram
-                box_functions.add(BoxFunction(file_code=MainDiagram.get_function(hyper_edge.box_label),
-                                              main_function_name=hyper_edge.box_label))
-        return box_functions
+        from MVP.refactored.frontend.windows.main_diagram import MainDiagram
+        if hierarchy is None:
+            hierarchy = HypergraphManager.get_canvas_hierarchy()
+        labels = dict.fromkeys(hyper_edge.box_label for hyper_edge in hierarchy.get_atomic_hyper_edges(hypergraph)
+                               if hyper_edge.id not in excluded_ids)
+        return {BoxFunctionRegistry.get(label, MainDiagram.get_function(label)) for label in labels}
 
     @classmethod
     def get_box_functions_items_names(cls, box_functions: set[BoxFunction]) -> dict[BoxFunction, set[str]]:
@@ -106,7 +222,8 @@ class CodeGenerator:
                                 hypergraph: Hypergraph,
                                 renamed_functions: dict[BoxFunction, str],
                                 func_name: str,
-                                receiver: Receiver
+                                receiver: Receiver,
+                                report: OptimizationReport = None
                                 ) -> str:
         """
         Construct the main function for a given hypergraph.
@@ -114,7 +231,7 @@ class CodeGenerator:
         This method generates the complete main function for a hypergraph, including its
         definition, body, and return statement. It processes the hypergraph's structure,
         resolves input and output nodes, and ensures that all hyper edges are executed
-        in the correct order.
+        in the correct order. Boxes removed in the optimization report are not called.
         """
         diagram_inputs_as_nodes: list[Node] = cls.get_sorted_diagram_inputs(hypergraph, receiver, hypergraph.canvas_id)
 
@@ -123,7 +240,8 @@ class CodeGenerator:
         hyper_edge_queue: Queue[HyperEdge] = Queue()
         cls.get_queue_of_hyper_edges(hypergraph, hyper_edge_queue)
 
-        function_body, name_map = cls.create_main_function_content(hyper_edge_queue, renamed_functions, name_map, receiver)
+        function_body, name_map = cls.create_main_function_content(hyper_edge_queue, renamed_functions, name_map, receiver,
+                                                                   report)
 
         function_return = cls.create_main_function_return(receiver, hypergraph, name_map)
 
@@ -162,7 +280,8 @@ class CodeGenerator:
                                      queue: Queue[HyperEdge],
                                      renamed_functions: dict[BoxFunction, str],
                                      node_and_hyper_edge_to_variable_name: dict[int, str],
-                                     receiver: Receiver
+                                     receiver: Receiver,
+                                     report: OptimizationReport = None
                                      ) -> (str, dict[int, str]):
         """
         Generate the content of the main function for a given hypergraph.
@@ -170,12 +289,23 @@ class CodeGenerator:
         This method processes a queue of hyper edges and generates Python code
         for executing each hyper edge in the correct order. It maps source nodes
         to input variables and target nodes to output variables or tuple elements.
+        Dead boxes of the optimization report are skipped and targets of merged
+        boxes are mapped to the result variable of the box they were merged into.
         """
         main_function_content = ""
         index = 0
+        result_variables: dict[int, str] = {}  # result variables of called boxes, keyed by hyper edge id
         while not queue.empty():
             hyper_edge = queue.get()
+            kept_id = report.get_kept_id(hyper_edge.id) if report is not None else hyper_edge.id
+            if kept_id is None:
+                continue
+            if kept_id in result_variables:
+                variable = result_variables[kept_id]
+                cls._map_target_nodes(hyper_edge, variable, node_and_hyper_edge_to_variable_name, receiver)
+                continue
             variable = f"res_{index}"
+            result_variables[kept_id] = variable
             variable_definition = f"{variable} = {renamed_functions[hyper_edge.get_box_function()]}("
 
             for source_node in hyper_edge.get_source_nodes():
@@ -184,19 +314,27 @@ class CodeGenerator:
             variable_definition = variable_definition[:-2] + ")"
             main_function_content += f"\n\t{variable_definition}"
 
-            if len(hyper_edge.get_target_nodes()) > 1:
-                for i, target_node in enumerate(hyper_edge.get_target_nodes()):
-                    actual_hash: int = cls.get_input_actual_node_group_hash(target_node, receiver)
-                    if actual_hash not in node_and_hyper_edge_to_variable_name:
-                        node_and_hyper_edge_to_variable_name[actual_hash] = f"{variable}[{i}]"
-            else:
-                target_node = hyper_edge.get_target_nodes()[0]
-                actual_hash: int = cls.get_input_actual_node_group_hash(target_node, receiver)
-                node_and_hyper_edge_to_variable_name[actual_hash] = variable
-
+            cls._map_target_nodes(hyper_edge, variable, node_and_hyper_edge_to_variable_name, receiver)
             index += 1
         return main_function_content, node_and_hyper_edge_to_variable_name
 
+    @classmethod
+    def _map_target_nodes(cls,
+                          hyper_edge: HyperEdge,
+                          variable: str,
+                          node_and_hyper_edge_to_variable_name: dict[int, str],
+                          receiver: Receiver):
+        """Map target node groups of the hyper edge to its result variable or to elements of the result tuple."""
+        if len(hyper_edge.get_target_nodes()) > 1:
+            for i, target_node in enumerate(hyper_edge.get_target_nodes()):
+                actual_hash: int = cls.get_input_actual_node_group_hash(target_node, receiver)
+                if actual_hash not in node_and_hyper_edge_to_variable_name:
+                    node_and_hyper_edge_to_variable_name[actual_hash] = f"{variable}[{i}]"
+        else:
+            target_node = hyper_edge.get_target_nodes()[0]
+            actual_hash: int = cls.get_input_actual_node_group_hash(target_node, receiver)
+            node_and_hyper_edge_to_variable_name[actual_hash] = variable
+
     @classmethod
     def create_main_function_return(cls,
                                     receiver: Receiver,
@@ -305,44 +443,17 @@ class CodeGenerator:
         """
         Generate a queue of hyper edges for a given hypergraph in topological order.
 
-        This method processes the hypergraph to ensure that all hyper edges are added
-        to the queue in an order that respects their dependencies. It recursively explores
-        nested hypergraphs and ensures that each hyper edge is processed only once.
+        Order is taken from the cached topological schedule of the hypergraph, in which hyper edges of nested
+        hypergraphs follow their compound hyper edge. Each hyper edge is added to the queue only once.
+
+        :raises ValueError: if hyper edges form a cycle.
         """
         if seen_hyper_edges is None:
             seen_hyper_edges = set()
 
-        nodes_with_inputs: set[Node] = set(hypergraph.get_hypergraph_source())
-        to_check: list[HyperEdge] = hypergraph.get_all_hyper_edges()
-        hyper_edge_input_count_check: dict[HyperEdge, int] = {}
-
-        while to_check:
-            to_check_new: list[HyperEdge] = []
-            for hyper_edge in to_check:
-                if hyper_edge in seen_hyper_edges:
-                    continue
-
-                if hyper_edge not in hyper_edge_input_count_check:
-                    hyper_edge_input_count_check[hyper_edge] = 0
-                for node in hyper_edge.get_source_nodes():
-                    if node in nodes_with_inputs:
-                        hyper_edge_input_count_check[hyper_edge] += 1
-                if hyper_edge_input_count_check[hyper_edge] >= len(hyper_edge.get_source_nodes()):
-                    # Process this edge first
-                    if hyper_edge.box_label is not None:
-                        hyper_edge_queue.put(hyper_edge)
-                    seen_hyper_edges.add(hyper_edge)
-                    for target_node in hyper_edge.get_target_nodes():
-                        nodes_with_inputs.add(target_node)
-                        nodes_with_inputs.update(target_node.get_united_with_nodes())
-
-                    # Then recursive process inside graphs
-                    for subgraph in hyper_edge.get_hypergraphs_inside():
-                        cls.get_queue_of_hyper_edges(subgraph, hyper_edge_queue, seen_hyper_edges)
-                else:
-                    to_check_new.append(hyper_edge)
-                    hyper_edge_input_count_check[hyper_edge] = 0
-
-            if to_check == to_check_new:
-                break
-            to_check = to_check_new
+        for hyper_edge in hypergraph.get_topological_schedule().order:
+            if hyper_edge in seen_hyper_edges:
+                continue
+            seen_hyper_edges.add(hyper_edge)
+            if hyper_edge.box_label is not None:
+                hyper_edge_queue.put(hyper_edge)
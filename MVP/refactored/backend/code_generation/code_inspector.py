@@ -4,6 +4,8 @@ from typing import Optional, TYPE_CHECKING
 import astor  # Requires pip install astor
 import autopep8
 
+from MVP.refactored.backend.code_generation.scoped_renamer import ScopedRenamer
+
 if TYPE_CHECKING:
     from MVP.refactored.backend.box_functions.box_function import BoxFunction
 
@@ -129,23 +131,10 @@ class CodeInspector(ast.NodeTransformer):
         main_functions_new_names: dict[BoxFunction, str] = dict()
 
         for i, (box_function, names) in enumerate(box_functions_items_names.items()):
-            renamer = CodeInspector()
-
-            global_statements: set[str] = box_function.global_statements
-            helper_functions: set[str] = box_function.helper_functions
-            main_function: str = box_function.main_function
-
-            for name in names:
-                new_name = f'{name}_{i}'
-                # rename name to new_name in all global_statements, helper_functions or main_function if it contains it
-                global_statements = [renamer.refactor_code(global_statement, name, new_name)
-                                     for global_statement in global_statements]
-                helper_functions = [renamer.refactor_code(helper_function, name, new_name)
-                                    for helper_function in helper_functions]
-                main_function = renamer.refactor_code(main_function, name, new_name)
-
-                if name == box_function.main_function_name:
-                    main_functions_new_names[box_function] = new_name
+            global_statements, helper_functions, main_function, new_name = cls.rename_box_function(box_function,
+                                                                                                   names, i)
+            if new_name is not None:
+                main_functions_new_names[box_function] = new_name
 
             renamed_global_statements.update(global_statements)
             renamed_helper_functions.update(helper_functions)
@@ -153,6 +142,44 @@ class CodeInspector(ast.NodeTransformer):
 
         return renamed_global_statements, renamed_helper_functions, renamed_main_functions, main_functions_new_names
 
+    @classmethod
+    def rename_box_function(cls, box_function: BoxFunction, names: set[str], index: int) \
+            -> tuple[list[str], list[str], str, str | None]:
+        """
+        Append the index to the given names in global statements, helper functions and main function of the box
+        function.
+
+        Returns renamed global statements, helper functions, main function and the new name of the main function,
+        which is None if the main function name is not among the names. Every snippet is renamed in one pass, see
+        `ScopedRenamer`.
+        """
+        return cls.rename_sources(box_function.main_function_name, tuple(box_function.global_statements),
+                                  tuple(box_function.helper_functions), box_function.main_function, names, index)
+
+    @classmethod
+    def rename_sources(cls,
+                       main_function_name: str,
+                       global_statements: tuple[str, ...],
+                       helper_functions: tuple[str, ...],
+                       main_function: str,
+                       names: frozenset[str],
+                       index: int
+                       ) -> tuple[list[str], list[str], str, str | None]:
+        """
+        Rename the sources of a box function, see `rename_box_function`.
+
+        Takes only strings and tuples, so the call can be sent to another process.
+        """
+        new_names = {name: f'{name}_{index}' for name in names}
+        renamer = ScopedRenamer(new_names)
+
+        renamed_global_statements = [renamer.rename(global_statement) for global_statement in global_statements]
+        renamed_helper_functions = [renamer.rename(helper_function) for helper_function in helper_functions]
+        renamed_main_function = renamer.rename(main_function)
+
+        return renamed_global_statements, renamed_helper_functions, renamed_main_function, \
+            new_names.get(main_function_name)
+
     @classmethod
     def get_main_function(cls, code_str: str, main_method_name: str) -> Optional[str]:
         """
@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import ast
+
+import astor  # Requires pip install astor
+
+
+class ScopedRenamer(ast.NodeTransformer):
+    """
+    Renames module level names of code snippets by a complete map of old names to new names in one pass.
+
+    Every snippet is parsed once, all names of the map are replaced in one traversal and the tree is converted back to
+    source once. Names local to a function, lambda or comprehension (parameters, assigned names and nested
+    definitions, which are not declared `global`) shadow module level names and are left as they are, so a function
+    with parameters still refers to renamed module level variables and helper functions.
+    """
+
+    def __init__(self, new_names: dict[str, str]):
+        self.new_names = new_names
+        # names of enclosing functions, innermost last, True for local names and False for names declared `global`
+        self.scopes: list[dict[str, bool]] = []
+
+    def rename(self, code_str: str) -> str:
+        tree = ast.parse(code_str)
+        self.scopes = []
+        self.visit(tree)
+        return astor.to_source(tree)
+
+    def _get_new_name(self, name: str) -> str:
+        if name not in self.new_names:
+            return name
+        for scope in reversed(self.scopes):
+            if name in scope:
+                return name if scope[name] else self.new_names[name]
+        return self.new_names[name]
+
+    @staticmethod
+    def _get_parameters(arguments: ast.arguments) -> set[str]:
+        parameters = {arg.arg for arg in arguments.posonlyargs + arguments.args + arguments.kwonlyargs}
+        parameters.update(arg.arg for arg in (arguments.vararg, arguments.kwarg) if arg is not None)
+        return parameters
+
+    @staticmethod
+    def _get_local_names(body: list[ast.stmt]) -> tuple[set[str], set[str]]:
+        """Return names bound in the function body, without nested scopes, and names declared `global`."""
+        local_names: set[str] = set()
+        global_names: set[str] = set()
+        stack: list[ast.AST] = list(body)
+        while stack:
+            node = stack.pop()
+            if isinstance(node, ast.Global):
+                global_names.update(node.names)
+            elif isinstance(node, ast.Nonlocal):
+                local_names.update(node.names)
+            elif isinstance(node, ast.Name) and not isinstance(node.ctx, ast.Load):
+                local_names.add(node.id)
+            elif isinstance(node, (ast.Import, ast.ImportFrom)):
+                local_names.update((alias.asname or alias.name).split(".")[0] for alias in node.names)
+            elif isinstance(node, ast.ExceptHandler) and node.name:
+                local_names.add(node.name)
+
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                local_names.add(node.name)
+                stack.extend(node.decorator_list)
+                if not isinstance(node, ast.ClassDef):
+                    stack.extend(node.args.defaults + [default for default in node.args.kw_defaults if default])
+                continue
+            if isinstance(node, (ast.Lambda, ast.ListComp, ast.SetComp, ast.DictComp, ast.GeneratorExp)):
+                continue
+            stack.extend(ast.iter_child_nodes(node))
+        return local_names - global_names, global_names
+
+    def visit_FunctionDef(self, node):
+        node.name = self._get_new_name(node.name)
+        for decorator in node.decorator_list:
+            self.visit(decorator)
+        for default in node.args.defaults + node.args.kw_defaults:
+            if default is not None:
+                self.visit(default)
+
+        local_names, global_names = self._get_local_names(node.body)
+        scope = dict.fromkeys(self._get_parameters(node.args) | local_names, True)
+        scope.update(dict.fromkeys(global_names, False))
+        self.scopes.append(scope)
+        for stmt in node.body:
+            self.visit(stmt)
+        self.scopes.pop()
+        return node
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+
+    def visit_Lambda(self, node):
+        for default in node.args.defaults + node.args.kw_defaults:
+            if default is not None:
+                self.visit(default)
+        self.scopes.append(dict.fromkeys(self._get_parameters(node.args), True))
+        self.visit(node.body)
+        self.scopes.pop()
+        return node
+
+    def _visit_comprehension(self, node):
+        # the first iterable is evaluated in the enclosing scope
+        self.visit(node.generators[0].iter)
+        self.scopes.append({name.id: True for generator in node.generators for name in ast.walk(generator.target)
+                            if isinstance(name, ast.Name)})
+        for index, generator in enumerate(node.generators):
+            if index > 0:
+                self.visit(generator.iter)
+            for condition in generator.ifs:
+                self.visit(condition)
+        for field in ("elt", "key", "value"):
+            if hasattr(node, field):
+                self.visit(getattr(node, field))
+        self.scopes.pop()
+        return node
+
+    visit_ListComp = visit_SetComp = visit_DictComp = visit_GeneratorExp = _visit_comprehension
+
+    def visit_Global(self, node):
+        node.names = [self.new_names.get(name, name) for name in node.names]
+        return node
+
+    def visit_Name(self, node):
+        node.id = self._get_new_name(node.id)
+        return node
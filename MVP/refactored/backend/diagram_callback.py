@@ -1,5 +1,3 @@
-import logging
-
 from MVP.refactored.backend.box_functions.box_function import BoxFunction
 from MVP.refactored.backend.types.ActionType import ActionType
 from MVP.refactored.backend.types.GeneratorType import GeneratorType
@@ -10,22 +8,21 @@ from MVP.refactored.backend.generator import Generator
 from MVP.refactored.backend.hypergraph.hypergraph_manager import HypergraphManager
 from MVP.refactored.backend.hypergraph.node import Node
 from MVP.refactored.backend.resource import Resource
-
-logging.basicConfig(level=logging.INFO, format='%(asc_time)s - %(level_name)s - %(message)s')
-logger = logging.getLogger(__name__)
+from MVP.refactored.backend.tracing import Tracing, traced
 
 
+@Tracing.instrumented
 class Receiver:
     def __init__(self):
         self.listener = True
         # self.diagram = Diagram()
         self.diagrams: dict[int, Diagram] = {}  # key is canvas_id where diagram located
-        logger.info("Receiver initialized.")
 
     def add_new_canvas(self, canvas_id: int):
         self.diagrams[canvas_id] = Diagram()
         return self.diagrams[canvas_id]
 
+    @traced("receiver_callback", detail=lambda self, action, **kwargs: action.name)
     def receiver_callback(self, action: ActionType, **kwargs):
         resource_id = kwargs.get('resource_id')
         start_connection: ConnectionInfo | None = kwargs.get('start_connection')
@@ -43,7 +40,6 @@ class Receiver:
         generator_ids: list[int] = kwargs.get('generator_ids')
         new_label = kwargs.get('new_label')
 
-        logger.info(f"receiver_callback invoked with action: {action}, kwargs: {kwargs}")
         if action == ActionType.WIRE_CREATE:
             new_node = HypergraphManager.create_new_node(resource_id, canvas_id)
 
@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from itertools import islice
+from typing import Iterable, Iterator
+
+import numpy as np
+
+from MVP.refactored.backend.diagram_callback import Receiver
+from MVP.refactored.backend.execution.box_call_cache import BoxCallCache
+from MVP.refactored.backend.execution.compiled_diagram import CompiledDiagram
+from MVP.refactored.backend.execution.dataflow_executor import DataflowExecutor
+from MVP.refactored.backend.tracing import Tracing, traced
+
+
+@Tracing.instrumented
+class BatchExecutor:
+    """
+    Runs the diagram of a canvas over many rows of input values.
+
+    Row holds values of diagram inputs in input index order, the order of `CodeGenerator.get_sorted_diagram_inputs`.
+    Rows are an iterable of tuples or a NumPy array, fields of a structured array are taken in their order. Diagram is
+    compiled into one function, see `CompiledDiagram`, and rows are evaluated in chunks of `chunk_size` rows, so
+    evaluating a row is one function call. With an executor, usually a `ProcessPoolExecutor`, at most
+    `max_pending_chunks` chunks are evaluated at once and results are streamed back in row order.
+
+    With a `BoxCallCache` calls of cacheable boxes are shared across rows and runs. Workers of a process pool use
+    their own cache with the same limits, see `BoxCallCache.get_process_cache`.
+    """
+
+    def __init__(self, receiver: Receiver, canvas_id, executor: Executor = None, chunk_size: int = 1024,
+                 max_pending_chunks: int = 8, cache: BoxCallCache = None):
+        if chunk_size < 1 or max_pending_chunks < 1:
+            raise ValueError("Chunk size and number of pending chunks must be positive.")
+        self.dataflow_executor = DataflowExecutor(receiver, canvas_id)
+        self.executor = executor
+        self.cache = cache
+        self.chunk_size = chunk_size
+        self.max_pending_chunks = max_pending_chunks
+
+    def compile(self) -> CompiledDiagram:
+        return CompiledDiagram.from_plan(self.dataflow_executor.get_plan())
+
+    @traced("batch_run")
+    def run(self, rows: Iterable[tuple] | np.ndarray) -> Iterator[tuple]:
+        """
+        Return an iterator of tuples of diagram output values in output index order, one for every row.
+
+        Diagram is compiled when the iterator is created and rows are read as results are consumed.
+
+        :raises ValueError: if the diagram can not be planned.
+        """
+        compiled = self.compile()
+        chunks = self.get_chunks(rows)
+        if self.executor is None:
+            return (result for chunk in chunks for result in BatchExecutor.evaluate_chunk(compiled, chunk, self.cache))
+        return self._stream(compiled, chunks)
+
+    def _stream(self, compiled: CompiledDiagram, chunks: Iterator[list]) -> Iterator[tuple]:
+        pending: deque[Future] = deque()
+        try:
+            for chunk in chunks:
+                if self.cache is not None and isinstance(self.executor, ProcessPoolExecutor):
+                    future = self.executor.submit(BatchExecutor.evaluate_chunk_in_process, compiled, chunk,
+                                                  self.cache.max_entries, self.cache.max_bytes)
+                else:
+                    future = self.executor.submit(BatchExecutor.evaluate_chunk, compiled, chunk, self.cache)
+                pending.append(future)
+                if len(pending) >= self.max_pending_chunks:
+                    yield from pending.popleft().result()
+            while pending:
+                yield from pending.popleft().result()
+        finally:
+            for future in pending:
+                future.cancel()
+
+    def get_chunks(self, rows: Iterable[tuple] | np.ndarray) -> Iterator[list]:
+        if isinstance(rows, np.ndarray):
+            return (rows[start:start + self.chunk_size].tolist() for start in range(0, len(rows), self.chunk_size))
+        iterator = iter(rows)
+        return iter(lambda: list(islice(iterator, self.chunk_size)), [])
+
+    @staticmethod
+    def evaluate_chunk(compiled: CompiledDiagram, rows: list, cache: BoxCallCache = None) -> list[tuple]:
+        function = compiled.get_function(cache)
+        return [function(*row) for row in rows]
+
+    @staticmethod
+    def evaluate_chunk_in_process(compiled: CompiledDiagram, rows: list, max_entries: int,
+                                  max_bytes: int) -> list[tuple]:
+        """Evaluate the chunk with the cache of the worker process, used by workers of a process pool."""
+        return BatchExecutor.evaluate_chunk(compiled, rows, BoxCallCache.get_process_cache(max_entries, max_bytes))
@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import hashlib
+import pickle
+import threading
+from collections import OrderedDict
+from typing import Callable, Iterable
+
+from MVP.refactored.backend.box_functions.box_function_registry import BoxFunctionRegistry
+
+MISSING = object()  # returned by `BoxCallCache.get` for keys without a result
+
+
+class CacheStatistics:
+    """Counters of a box call cache, updated under its lock."""
+    __slots__ = ("hits", "misses", "evictions", "skipped")
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.skipped = 0  # calls whose arguments or result could not be pickled or did not fit the cache
+
+    def get_hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def __repr__(self):
+        return (f"CacheStatistics(hits={self.hits}, misses={self.misses}, evictions={self.evictions}, "
+                f"skipped={self.skipped})")
+
+
+class BoxCallCache:
+    """
+    Results of box function calls keyed by box label, SHA-256 of the box source and fingerprint of the arguments.
+
+    Only boxes declared cacheable are cached, see `is_cacheable`, their functions must be deterministic and must not
+    mutate arguments or results, as a hit returns the stored result object. Fingerprint is a digest of the pickled
+    arguments and the size of an entry is the size of its pickled result, calls with arguments or results which can
+    not be pickled are not cached. Least recently used entries are dropped when there are more than `max_entries`
+    entries or their total size exceeds `max_bytes`.
+
+    Keys include the source hash, so changing the code of a box never returns stale results, entries of old sources
+    are dropped as they age. One cache can be given to several executors and runs, e.g. `BoxCallCache.session`, and
+    is safe to use from several threads. Worker processes use their own cache, see `get_process_cache`.
+    """
+    session: BoxCallCache  # cache shared by executors of the application, created below
+    process_caches: dict[tuple[int, int], BoxCallCache] = {}
+    lock = threading.Lock()
+
+    def __init__(self, max_entries: int = 4096, max_bytes: int = 64 * 1024 * 1024):
+        if max_entries < 1 or max_bytes < 1:
+            raise ValueError("Cache limits must be positive.")
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.statistics = CacheStatistics()
+        self._entries: OrderedDict[tuple[str, str, bytes], tuple[object, int]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def is_cacheable(label: str) -> bool:
+        """Return whether the box function of the label is declared cacheable in the functions configuration."""
+        from MVP.refactored.frontend.windows.main_diagram import MainDiagram
+        return MainDiagram.get_function_metadata(label).get("cacheable") is True
+
+    @staticmethod
+    def get_process_cache(max_entries: int, max_bytes: int) -> BoxCallCache:
+        """Return the cache of this process with the given limits, used by workers of a process pool."""
+        key = (max_entries, max_bytes)
+        cache = BoxCallCache.process_caches.get(key)
+        if cache is None:
+            with BoxCallCache.lock:
+                cache = BoxCallCache.process_caches.setdefault(key, BoxCallCache(max_entries, max_bytes))
+        return cache
+
+    def get_key(self, label: str, code: str | None, arguments: Iterable) -> tuple[str, str, bytes] | None:
+        """Return the key of the call, None if the arguments can not be pickled."""
+        try:
+            data = pickle.dumps(tuple(arguments), pickle.HIGHEST_PROTOCOL)
+        except Exception:
+            with self._lock:
+                self.statistics.skipped += 1
+            return None
+        return *BoxFunctionRegistry.get_key(label, code), hashlib.blake2b(data, digest_size=16).digest()
+
+    def get(self, key: tuple[str, str, bytes]):
+        """Return the result stored under the key, `MISSING` if there is none."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.statistics.misses += 1
+                return MISSING
+            self._entries.move_to_end(key)
+            self.statistics.hits += 1
+            return entry[0]
+
+    def put(self, key: tuple[str, str, bytes], result):
+        """Store the result under the key, results which can not be pickled or exceed `max_bytes` are skipped."""
+        try:
+            size = len(pickle.dumps(result, pickle.HIGHEST_PROTOCOL)) + len(key[2])
+        except Exception:
+            size = None
+        with self._lock:
+            if size is None or size > self.max_bytes:
+                self.statistics.skipped += 1
+                return
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.size -= previous[1]
+            self._entries[key] = (result, size)
+            self.size += size
+            while len(self._entries) > self.max_entries or self.size > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.size -= evicted_size
+                self.statistics.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def wrap(self, label: str, code: str | None, function: Callable) -> Callable:
+        """Return the box function calling through the cache."""
+        def call(*arguments):
+            key = self.get_key(label, code, arguments)
+            if key is None:
+                return function(*arguments)
+            result = self.get(key)
+            if result is MISSING:
+                result = function(*arguments)
+                self.put(key, result)
+            return result
+        return call
+
+    def wrap_all(self, functions: dict[str, Callable], sources: dict[str, str]) -> dict[str, Callable]:
+        """Return box functions keyed by label, functions of cacheable labels are wrapped, see `wrap`."""
+        return {label: self.wrap(label, sources[label], function) if BoxCallCache.is_cacheable(label) else function
+                for label, function in functions.items()}
+
+
+BoxCallCache.session = BoxCallCache()
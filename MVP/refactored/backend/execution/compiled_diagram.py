@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import hashlib
+import threading
+from typing import Callable
+
+from MVP.refactored.backend.box_functions.box_function_registry import BoxFunctionRegistry
+from MVP.refactored.backend.execution.box_call_cache import BoxCallCache
+from MVP.refactored.backend.execution.dataflow_plan import DataflowPlan
+
+
+class CompiledDiagram:
+    """
+    Diagram of a canvas compiled into one Python function.
+
+    Function takes values of diagram inputs in input index order and returns the tuple of values of diagram outputs
+    in output index order, so running the diagram for a row of inputs is one function call. Description consists of
+    the function source and box sources only, so it can be sent to worker processes, every process compiles the
+    function once, see `get_function`. Labels declared cacheable are taken when the diagram is compiled.
+    """
+    functions: dict[object, Callable] = {}  # compiled functions of this process, keyed by digest and cache id
+    max_functions = 64  # the oldest functions are dropped, diagrams change while they are edited
+    lock = threading.Lock()
+
+    def __init__(self, source: str, labels: tuple[str, ...], sources: tuple[str, ...], input_indexes: tuple[int, ...],
+                 output_indexes: tuple[int, ...], cacheable_labels: frozenset[str] = frozenset()):
+        self.source = source
+        self.labels = labels  # box `box_<i>` of the function source calls the main function of label `i`
+        self.sources = sources
+        self.input_indexes = input_indexes
+        self.output_indexes = output_indexes
+        self.cacheable_labels = cacheable_labels
+        self.digest = hashlib.sha256(repr((source, labels, sources, sorted(cacheable_labels))).encode()).hexdigest()
+
+    @staticmethod
+    def from_plan(plan: DataflowPlan) -> CompiledDiagram:
+        """Compile the plan with the current sources of its box labels."""
+        from MVP.refactored.frontend.windows.main_diagram import MainDiagram
+        labels = tuple(plan.get_labels())
+        box_names = {label: f"box_{i}" for i, label in enumerate(labels)}
+        names: dict[int, str] = {}  # variable names of node groups
+
+        input_indexes = tuple(sorted(plan.inputs))
+        lines = [f"def diagram({', '.join(f'input_{index}' for index in input_indexes)}):"]
+        for index in input_indexes:
+            if plan.inputs[index] not in names:
+                names[plan.inputs[index]] = f"value_{len(names)}"
+                lines.append(f"    {names[plan.inputs[index]]} = input_{index}")
+
+        for step in plan.steps:
+            call = f"{box_names[step.label]}({', '.join(names[root_id] for root_id in step.sources)})"
+            if len(step.targets) > 1:
+                lines.append(f"    result = {call}")
+                for i, root_id in enumerate(step.targets):
+                    if root_id not in names:
+                        names[root_id] = f"value_{len(names)}"
+                        lines.append(f"    {names[root_id]} = result[{i}]")
+            elif step.targets and step.targets[0] not in names:
+                names[step.targets[0]] = f"value_{len(names)}"
+                lines.append(f"    {names[step.targets[0]]} = {call}")
+            else:
+                lines.append(f"    {call}")
+
+        output_indexes = tuple(index for index in sorted(plan.outputs) if plan.outputs[index] in names)
+        lines.append(f"    return ({''.join(names[plan.outputs[index]] + ', ' for index in output_indexes)})")
+        return CompiledDiagram("\n".join(lines) + "\n", labels, tuple(MainDiagram.get_function(label)
+                                                                      for label in labels),
+                               input_indexes, output_indexes,
+                               frozenset(label for label in labels if BoxCallCache.is_cacheable(label)))
+
+    def get_function(self, cache: BoxCallCache = None) -> Callable:
+        """
+        Return the function compiled in this process, box functions are taken from `BoxFunctionRegistry`.
+
+        With a cache, calls of cacheable boxes go through it, the function is compiled once per cache.
+        """
+        key = self.digest if cache is None else (self.digest, id(cache))  # function keeps its cache alive
+        function = CompiledDiagram.functions.get(key)
+        if function is None:
+            namespace = {}
+            for i, (label, code) in enumerate(zip(self.labels, self.sources)):
+                namespace[f"box_{i}"] = BoxFunctionRegistry.get_callable(label, code)
+                if cache is not None and label in self.cacheable_labels:
+                    namespace[f"box_{i}"] = cache.wrap(label, code, namespace[f"box_{i}"])
+            exec(compile(self.source, "<diagram>", "exec"), namespace)
+            with CompiledDiagram.lock:
+                function = CompiledDiagram.functions.setdefault(key, namespace["diagram"])
+                while len(CompiledDiagram.functions) > CompiledDiagram.max_functions:
+                    del CompiledDiagram.functions[next(iter(CompiledDiagram.functions))]
+        return function
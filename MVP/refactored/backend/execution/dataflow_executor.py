@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, ProcessPoolExecutor, wait
+from typing import Callable
+
+from MVP.refactored.backend.box_functions.box_function_registry import BoxFunctionRegistry
+from MVP.refactored.backend.diagram_callback import Receiver
+from MVP.refactored.backend.execution.box_call_cache import MISSING, BoxCallCache
+from MVP.refactored.backend.execution.dataflow_plan import DataflowPlan, DataflowStep
+from MVP.refactored.backend.tracing import Tracing, traced
+
+
+@Tracing.instrumented
+class DataflowExecutor:
+    """
+    Runs the diagram of a canvas directly on its hypergraphs, without generating code.
+
+    Every box function is compiled once, see `BoxFunctionRegistry.get_callable`. Boxes are started in dependency
+    level order as soon as values of all their source node groups are known. Without an executor boxes run one by
+    one in the calling thread. With a `ThreadPoolExecutor` independent boxes run concurrently, which pays off for
+    boxes doing I/O or releasing the GIL. With a `ProcessPoolExecutor` box label, source code and arguments are sent
+    to the worker, which compiles every box function once per process, so arguments and results must be picklable.
+
+    Plan of the canvas is cached until any hypergraph structure or box label changes, see `DataflowPlan`. With a
+    `BoxCallCache` results of cacheable boxes are reused across runs, with a process pool the cache is looked up
+    before a box is sent to a worker.
+    """
+
+    def __init__(self, receiver: Receiver, canvas_id, executor: Executor = None, cache: BoxCallCache = None):
+        self.receiver = receiver
+        self.canvas_id = canvas_id
+        self.executor = executor
+        self.cache = cache
+        self._plan: DataflowPlan | None = None
+
+    def get_plan(self) -> DataflowPlan:
+        if self._plan is None or not self._plan.is_current():
+            self._plan = DataflowPlan.from_canvas(self.receiver, self.canvas_id)
+        return self._plan
+
+    @traced("dataflow_run")
+    def run(self, inputs) -> dict[int, object]:
+        """
+        Run the diagram with the values of diagram inputs, a sequence or a dict keyed by input index.
+
+        Returns values of diagram outputs keyed by output index. Exception of a box is raised after boxes running
+        at that time are finished, boxes which were not started yet are not run.
+
+        :raises ValueError: if a value of a diagram input is missing or the diagram can not be planned.
+        """
+        from MVP.refactored.frontend.windows.main_diagram import MainDiagram
+        plan = self.get_plan()
+        values = plan.get_input_values(inputs)
+        sources = {label: MainDiagram.get_function(label) for label in plan.get_labels()}
+        functions = {label: BoxFunctionRegistry.get_callable(label, code) for label, code in sources.items()}
+        if self.cache is not None:
+            functions = self.cache.wrap_all(functions, sources)
+
+        missing = {step.index: sum(1 for root_id in set(step.sources) if root_id not in values)
+                   for step in plan.steps}
+        ready = deque(step for step in plan.steps if missing[step.index] == 0)
+
+        def complete(step: DataflowStep, result):
+            for root_id, value in zip(step.targets, step.get_target_values(result)):
+                if root_id in values:
+                    continue
+                values[root_id] = value
+                for consumer in plan.consumers.get(root_id, ()):
+                    missing[consumer.index] -= 1
+                    if missing[consumer.index] == 0:
+                        ready.append(consumer)
+
+        if self.executor is None:
+            while ready:
+                step = ready.popleft()
+                complete(step, functions[step.label](*(values[root_id] for root_id in step.sources)))
+            return plan.get_output_values(values)
+
+        pending: dict[Future, DataflowStep] = {}
+        try:
+            while ready or pending:
+                for step in ready:
+                    pending[self._submit(step, functions, sources, values)] = step
+                ready.clear()
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    complete(pending.pop(future), future.result())
+        finally:
+            for future in pending:
+                future.cancel()
+            wait(pending)
+        return plan.get_output_values(values)
+
+    def _submit(self, step: DataflowStep, functions: dict[str, Callable], sources: dict[str, str],
+                values: dict[int, object]) -> Future:
+        arguments = [values[root_id] for root_id in step.sources]
+        if not isinstance(self.executor, ProcessPoolExecutor):
+            return self.executor.submit(functions[step.label], *arguments)
+        key = None
+        if self.cache is not None and BoxCallCache.is_cacheable(step.label):
+            key = self.cache.get_key(step.label, sources[step.label], arguments)
+        if key is not None:
+            result = self.cache.get(key)
+            if result is not MISSING:
+                future = Future()
+                future.set_result(result)
+                return future
+        future = self.executor.submit(DataflowExecutor.call_box_function, step.label, sources[step.label], arguments)
+        if key is not None:
+            future.add_done_callback(lambda done: self._store(key, done))
+        return future
+
+    def _store(self, key: tuple[str, str, bytes], future: Future):
+        if not future.cancelled() and future.exception() is None:
+            self.cache.put(key, future.result())
+
+    @staticmethod
+    def call_box_function(label: str, code: str, arguments: list):
+        """Call the box function compiled in this process, used by workers of a process pool."""
+        return BoxFunctionRegistry.get_callable(label, code)(*arguments)
@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+from typing import Iterable
+
+from MVP.refactored.backend.execution.dataflow_plan import DataflowPlan, DataflowStep
+from MVP.refactored.backend.tracing import Tracing, traced
+
+
+class OptimizationReport:
+    """Boxes removed from the dataflow of a canvas by `DataflowOptimizer`, identified by hyper edge id."""
+    __slots__ = ("canvas_id", "dead", "merged")
+
+    def __init__(self, canvas_id, dead: list, merged: dict):
+        self.canvas_id = canvas_id
+        self.dead = dead  # boxes whose results reach no diagram output, in plan order
+        self.merged = merged  # boxes removed as repeated applications, mapped to the box computing their result
+
+    def get_kept_id(self, hyper_edge_id):
+        """Return id of the box computing results of the box, None if the box was removed as dead."""
+        kept_id = self.merged.get(hyper_edge_id, hyper_edge_id)
+        return None if kept_id in self.dead else kept_id
+
+    def get_removed_ids(self) -> list:
+        return self.dead + list(self.merged)
+
+    def get_key(self) -> tuple:
+        """Return hashable description of the removed boxes, generated code depends on it."""
+        return tuple(self.dead), tuple(self.merged.items())
+
+    def is_empty(self) -> bool:
+        return not self.dead and not self.merged
+
+    def __repr__(self):
+        return f"OptimizationReport(canvas_id={self.canvas_id}, dead={self.dead}, merged={self.merged})"
+
+
+@Tracing.instrumented
+class DataflowOptimizer:
+    """
+    Optimization passes over the dataflow of a canvas.
+
+    Passes work on the `DataflowPlan`, a flat copy of the hypergraphs of the canvas in which compound boxes are
+    replaced with their content, and return a new plan, registered hypergraphs are not modified. Repeated
+    applications of a pure box to the same node groups are merged into the first one, then boxes whose results reach
+    no diagram output are removed by walking the plan back from the outputs. Boxes without targets are kept, they
+    are called for their effects.
+
+    Box is pure if its metadata in the functions configuration declares it "pure" or "cacheable", see
+    `MainDiagram.get_function_metadata`. Boxes are removed by dead box elimination whether they are pure or not.
+    """
+
+    @staticmethod
+    def is_pure(label: str) -> bool:
+        from MVP.refactored.frontend.windows.main_diagram import MainDiagram
+        metadata = MainDiagram.get_function_metadata(label)
+        return metadata.get("pure") is True or metadata.get("cacheable") is True
+
+    @staticmethod
+    @traced("optimize")
+    def optimize(plan: DataflowPlan, pure_labels: Iterable[str] = None) -> tuple[DataflowPlan, OptimizationReport]:
+        """
+        Return the optimized plan and the report of removed boxes.
+
+        :param plan: Plan of the canvas, it is not modified.
+        :param pure_labels: Labels of boxes which may be merged, labels declared pure if None.
+        """
+        if pure_labels is None:
+            pure_labels = {label for label in plan.get_labels() if DataflowOptimizer.is_pure(label)}
+        steps, outputs, merged = DataflowOptimizer.merge_applications(plan.steps, plan.outputs, set(pure_labels))
+        steps, dead = DataflowOptimizer.remove_dead_steps(steps, outputs)
+        optimized = DataflowPlan(plan.canvas_id, steps, dict(plan.inputs), outputs)
+        optimized.version = plan.version  # optimized plan is as current as the plan it was made from
+        return optimized, OptimizationReport(plan.canvas_id, dead, merged)
+
+    @staticmethod
+    def merge_applications(steps: list[DataflowStep], outputs: dict[int, int],
+                           pure_labels: set[str]) -> tuple[list[DataflowStep], dict[int, int], dict]:
+        """
+        Merge applications of pure boxes to the same node groups, return kept steps, outputs and merged boxes.
+
+        Target node groups of a merged box are replaced with target groups of the kept box in the following steps,
+        so applications which become equal after a merge are merged as well.
+        """
+        replaced: dict[int, int] = {}  # target node groups of merged boxes mapped to groups of kept boxes
+        applications: dict[tuple, DataflowStep] = {}
+        kept: list[DataflowStep] = []
+        merged = {}
+        for step in steps:
+            sources = tuple(replaced.get(root_id, root_id) for root_id in step.sources)
+            key = (step.label, sources, len(step.targets))
+            if step.label in pure_labels and key in applications:
+                merged[step.hyper_edge_id] = applications[key].hyper_edge_id
+                for root_id, kept_root_id in zip(step.targets, applications[key].targets):
+                    if root_id != kept_root_id:
+                        replaced[root_id] = kept_root_id
+                continue
+            kept.append(DataflowStep(len(kept), step.hyper_edge_id, step.label, sources, step.targets))
+            if step.label in pure_labels:
+                applications[key] = kept[-1]
+        return kept, {index: replaced.get(root_id, root_id) for index, root_id in outputs.items()}, merged
+
+    @staticmethod
+    def remove_dead_steps(steps: list[DataflowStep], outputs: dict[int, int]) -> tuple[list[DataflowStep], list]:
+        """Return steps needed for diagram outputs or without targets and ids of removed boxes, both in plan order."""
+        needed: set[int] = set(outputs.values())
+        live: list[DataflowStep] = []
+        dead = []
+        for step in reversed(steps):
+            if not step.targets or needed.intersection(step.targets):
+                needed.update(step.sources)
+                live.append(step)
+            else:
+                dead.append(step.hyper_edge_id)
+        live.reverse()
+        dead.reverse()
+        return [DataflowStep(i, step.hyper_edge_id, step.label, step.sources, step.targets)
+                for i, step in enumerate(live)], dead
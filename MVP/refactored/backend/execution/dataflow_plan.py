@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+from MVP.refactored.backend.diagram_callback import Receiver
+from MVP.refactored.backend.hypergraph.hypergraph import Hypergraph
+from MVP.refactored.backend.hypergraph.hypergraph_manager import HypergraphManager
+from MVP.refactored.backend.hypergraph.topological_schedule import TopologicalSchedule
+
+
+class DataflowStep:
+    """Call of one atomic box: values of the source node groups are its arguments, result goes to target groups."""
+    __slots__ = ("index", "hyper_edge_id", "label", "sources", "targets")
+
+    def __init__(self, index: int, hyper_edge_id, label: str, sources: tuple[int, ...], targets: tuple[int, ...]):
+        self.index = index
+        self.hyper_edge_id = hyper_edge_id
+        self.label = label
+        self.sources = sources  # node group root ids in the connection index order
+        self.targets = targets
+
+    def get_target_values(self, result) -> list:
+        """Return values of target node groups, result of a box with several targets is unpacked."""
+        if len(self.targets) > 1:
+            return [result[i] for i in range(len(self.targets))]
+        return [result]
+
+
+class DataflowPlan:
+    """
+    Dataflow of a canvas, in which compound boxes are replaced with their content.
+
+    Plan is built from the inline projection of the canvas, see `CanvasHierarchy.inline`, so values pass sub diagram
+    boundaries as through spiders. Every node group is identified by the id of its root node. `steps` are ordered by
+    dependency level, `consumers` lists steps which take the value of a node group and `inputs` and `outputs` map
+    diagram input and output indexes of the canvas to node groups.
+    """
+
+    def __init__(self, canvas_id, steps: list[DataflowStep], inputs: dict[int, int], outputs: dict[int, int]):
+        self.canvas_id = canvas_id
+        # plan is built from hypergraphs of the active registry
+        self.structure_version = HypergraphManager.get_registry().structure_version
+        self.version = self.structure_version.version
+        self.steps = steps
+        self.inputs = inputs
+        self.outputs = outputs
+        self.consumers: dict[int, list[DataflowStep]] = {}
+        for step in steps:
+            for root_id in dict.fromkeys(step.sources):
+                self.consumers.setdefault(root_id, []).append(step)
+
+    @staticmethod
+    def from_canvas(receiver: Receiver, canvas_id) -> DataflowPlan:
+        """
+        Build the plan of the canvas.
+
+        :raises ValueError: if hyper edges form a cycle or a box takes a value which is neither a diagram input
+            nor a result of another box.
+        """
+        projection: Hypergraph = HypergraphManager.get_canvas_hierarchy(receiver).inline(canvas_id)
+        diagram = receiver.diagrams[canvas_id]
+
+        def get_root_id(node_id) -> int | None:
+            node = projection.nodes.get(node_id)
+            return node.find_group_root().id if node is not None else None
+
+        inputs = {connection.index: get_root_id(connection.id) for connection in diagram.input
+                  if get_root_id(connection.id) is not None}
+        outputs = {connection.index: get_root_id(connection.id) for connection in diagram.output
+                   if get_root_id(connection.id) is not None}
+
+        steps: list[DataflowStep] = []
+        available: set[int] = set(inputs.values())
+        for level in TopologicalSchedule.get_levels(projection):
+            for hyper_edge in level:
+                if hyper_edge.box_label is None:
+                    continue
+                step = DataflowStep(len(steps), hyper_edge.id, hyper_edge.box_label,
+                                    tuple(node.find_group_root().id for node in hyper_edge.get_source_nodes()),
+                                    tuple(node.find_group_root().id for node in hyper_edge.get_target_nodes()))
+                steps.append(step)
+                available.update(step.targets)
+
+        unavailable = [step.hyper_edge_id for step in steps if not available.issuperset(step.sources)]
+        if unavailable:
+            raise ValueError(f"Boxes {unavailable} of canvas {canvas_id} take values which are not diagram inputs "
+                             f"or box results.")
+        return DataflowPlan(canvas_id, steps, inputs, outputs)
+
+    def is_current(self) -> bool:
+        return self.version == self.structure_version.version
+
+    def get_labels(self) -> list[str]:
+        return list(dict.fromkeys(step.label for step in self.steps))
+
+    def get_input_values(self, inputs) -> dict[int, object]:
+        """
+        Map values of diagram inputs to node groups, inputs are a sequence or a dict keyed by input index.
+
+        :raises ValueError: if a value of a diagram input is missing.
+        """
+        if not isinstance(inputs, dict):
+            inputs = dict(enumerate(inputs))
+        missing = sorted(index for index in self.inputs if index not in inputs)
+        if missing:
+            raise ValueError(f"Values of diagram inputs {missing} of canvas {self.canvas_id} are missing.")
+        return {root_id: inputs[index] for index, root_id in self.inputs.items()}
+
+    def get_output_values(self, values: dict[int, object]) -> dict[int, object]:
+        """Return values of diagram outputs by output index, outputs not connected to any value are left out."""
+        return {index: values[root_id] for index, root_id in sorted(self.outputs.items()) if root_id in values}
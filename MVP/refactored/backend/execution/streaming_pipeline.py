@@ -0,0 +1,221 @@
+from __future__ import annotations
+
+import threading
+from queue import Empty, Full, Queue
+from time import perf_counter
+from typing import Callable, Iterable, Iterator
+
+from MVP.refactored.backend.box_functions.box_function_registry import BoxFunctionRegistry
+from MVP.refactored.backend.diagram_callback import Receiver
+from MVP.refactored.backend.execution.box_call_cache import BoxCallCache
+from MVP.refactored.backend.execution.dataflow_executor import DataflowExecutor
+from MVP.refactored.backend.execution.dataflow_plan import DataflowPlan, DataflowStep
+
+END = object()  # end of stream marker, passed along all queues after the last value
+
+
+class _Stopped(Exception):
+    """Raised in a worker waiting on a queue after the pipeline was stopped."""
+
+
+class StageStatistics:
+    """Throughput counters of a pipeline stage, updated by its worker thread."""
+    __slots__ = ("items", "busy_seconds", "input_wait_seconds", "output_wait_seconds")
+
+    def __init__(self):
+        self.items = 0
+        self.busy_seconds = 0.0  # time spent in the box function or the input iterator
+        self.input_wait_seconds = 0.0  # time spent waiting for values of the previous stages
+        self.output_wait_seconds = 0.0  # time spent waiting for free space in queues of the next stages
+
+    def get_throughput(self) -> float:
+        """Return items per second of busy time."""
+        return self.items / self.busy_seconds if self.busy_seconds > 0 else 0.0
+
+    def __repr__(self):
+        return (f"StageStatistics(items={self.items}, busy={self.busy_seconds:.3f}s, "
+                f"input_wait={self.input_wait_seconds:.3f}s, output_wait={self.output_wait_seconds:.3f}s)")
+
+
+class StreamingPipeline:
+    """
+    Runs the diagram of a canvas as a streaming pipeline.
+
+    Every atomic box is a stage running in its own thread, see `DataflowPlan`. Stages are connected along node
+    groups by bounded queues of `queue_size` values, node group consumed by several boxes or diagram outputs puts a
+    copy of every value into the queue of each of them, like a spider. Diagram inputs pull values from Python
+    iterators. Stage takes one value from every source node group, calls the box function and passes the result on,
+    so a slow box fills the queues in front of it and blocks the previous stages instead of buffering the stream.
+
+    Stream ends when any diagram input iterator is exhausted. Closing the iterator returned by `run` or an exception
+    of any stage stops all workers, they check it every `poll_interval` seconds while waiting on queues.
+    `input_statistics` and `stage_statistics` count values and time of every input and box, keyed by input index
+    and hyper edge id. One pipeline runs one stream at a time. With a `BoxCallCache` stages of cacheable boxes reuse
+    results of repeated values.
+    """
+
+    def __init__(self, receiver: Receiver, canvas_id, queue_size: int = 16, poll_interval: float = 0.05,
+                 cache: BoxCallCache = None):
+        if queue_size < 1:
+            raise ValueError("Queue size must be positive.")
+        self.dataflow_executor = DataflowExecutor(receiver, canvas_id)
+        self.cache = cache
+        self.queue_size = queue_size
+        self.poll_interval = poll_interval
+        self.input_statistics: dict[int, StageStatistics] = {}
+        self.stage_statistics: dict[object, StageStatistics] = {}
+        self._stop = threading.Event()
+        self._error: BaseException | None = None
+        self._threads: list[threading.Thread] = []
+
+    def run(self, inputs: dict[int, Iterable] | list[Iterable]) -> Iterator[tuple]:
+        """
+        Start the pipeline and return an iterator of tuples of diagram output values in output index order.
+
+        Inputs are iterables of values of diagram inputs, a sequence or a dict keyed by input index. Workers are
+        started when the first row is requested.
+
+        :raises ValueError: if an input iterable is missing or the diagram can not be planned.
+        """
+        from MVP.refactored.frontend.windows.main_diagram import MainDiagram
+        plan: DataflowPlan = self.dataflow_executor.get_plan()
+        if not isinstance(inputs, dict):
+            inputs = dict(enumerate(inputs))
+        missing = sorted(index for index in plan.inputs if index not in inputs)
+        if missing:
+            raise ValueError(f"Iterables of diagram inputs {missing} of canvas {plan.canvas_id} are missing.")
+        sources = {label: MainDiagram.get_function(label) for label in plan.get_labels()}
+        functions = {label: BoxFunctionRegistry.get_callable(label, code) for label, code in sources.items()}
+        if self.cache is not None:
+            functions = self.cache.wrap_all(functions, sources)
+        return self._stream(plan, functions, {index: iter(inputs[index]) for index in plan.inputs})
+
+    def _stream(self, plan: DataflowPlan, functions: dict[str, Callable],
+                iterators: dict[int, Iterator]) -> Iterator[tuple]:
+        self._stop.clear()
+        self._error = None
+        self._threads = []
+        self.input_statistics = {index: StageStatistics() for index in iterators}
+        self.stage_statistics = {step.hyper_edge_id: StageStatistics() for step in plan.steps}
+
+        consumer_queues: dict[int, list[Queue]] = {}  # queues of consumers of every node group
+
+        def connect(root_id: int) -> Queue:
+            queue = Queue(maxsize=self.queue_size)
+            consumer_queues.setdefault(root_id, []).append(queue)
+            return queue
+
+        output_queues = {index: connect(root_id) for index, root_id in sorted(plan.outputs.items())}
+        step_queues = {step.index: {root_id: connect(root_id) for root_id in dict.fromkeys(step.sources)}
+                       for step in plan.steps}
+
+        produced: set[int] = set()  # the first producer of a node group feeds its consumers
+        for index, iterator in iterators.items():
+            root_id = plan.inputs[index]
+            if root_id not in produced and root_id in consumer_queues:
+                self._start(f"input-{index}", self._feed, iterator, consumer_queues[root_id],
+                            self.input_statistics[index])
+            produced.add(root_id)
+        for step in plan.steps:
+            targets = []
+            for root_id in step.targets:
+                targets.append(consumer_queues.get(root_id, []) if root_id not in produced else [])
+                produced.add(root_id)
+            self._start(f"stage-{step.hyper_edge_id}", self._run_stage, step, functions[step.label],
+                        step_queues[step.index], targets, self.stage_statistics[step.hyper_edge_id])
+
+        output_queues = {index: queue for index, queue in output_queues.items() if plan.outputs[index] in produced}
+        try:
+            if not output_queues:
+                # boxes without sources never end, the stream ends with the other workers
+                for thread, step in zip(self._threads[-len(plan.steps):] if plan.steps else [], plan.steps):
+                    while step.sources and thread.is_alive() and not self._stop.is_set():
+                        thread.join(self.poll_interval)
+            while output_queues and not self._stop.is_set():
+                row = tuple(self._get(queue) for queue in output_queues.values())
+                if any(value is END for value in row):
+                    break
+                yield row
+        except _Stopped:
+            pass
+        finally:
+            self.close()
+        if self._error is not None:
+            raise self._error
+
+    def close(self):
+        """Stop all workers of the pipeline and wait for them."""
+        self._stop.set()
+        for thread in self._threads:
+            if thread is not threading.current_thread():
+                thread.join()
+
+    def _start(self, name: str, target: Callable, *args):
+        thread = threading.Thread(target=self._run_worker, args=(target, *args), name=name, daemon=True)
+        self._threads.append(thread)
+        thread.start()
+
+    def _run_worker(self, target: Callable, *args):
+        try:
+            target(*args)
+        except _Stopped:
+            pass
+        except BaseException as error:
+            if self._error is None:
+                self._error = error
+            self._stop.set()
+
+    def _feed(self, iterator: Iterator, queues: list[Queue], statistics: StageStatistics):
+        while True:
+            start = perf_counter()
+            value = next(iterator, END)
+            statistics.busy_seconds += perf_counter() - start
+            for queue in queues:
+                self._put(queue, value, statistics)
+            if value is END:
+                return
+            statistics.items += 1
+
+    def _run_stage(self, step: DataflowStep, function: Callable, queues: dict[int, Queue],
+                   targets: list[list[Queue]], statistics: StageStatistics):
+        while True:
+            if not queues and self._stop.is_set():
+                raise _Stopped()
+            values = {root_id: self._get(queue, statistics) for root_id, queue in queues.items()}
+            if any(value is END for value in values.values()):
+                for target_queues in targets:
+                    for queue in target_queues:
+                        self._put(queue, END, statistics)
+                return
+            start = perf_counter()
+            result = function(*(values[root_id] for root_id in step.sources))
+            target_values = step.get_target_values(result)
+            statistics.busy_seconds += perf_counter() - start
+            statistics.items += 1
+            for target_queues, value in zip(targets, target_values):
+                for queue in target_queues:
+                    self._put(queue, value, statistics)
+
+    def _get(self, queue: Queue, statistics: StageStatistics = None):
+        start = perf_counter()
+        while True:
+            try:
+                value = queue.get(timeout=self.poll_interval)
+                break
+            except Empty:
+                if self._stop.is_set():
+                    raise _Stopped()
+        if statistics is not None:
+            statistics.input_wait_seconds += perf_counter() - start
+        return value
+
+    def _put(self, queue: Queue, value, statistics: StageStatistics):
+        start = perf_counter()
+        while True:
+            try:
+                queue.put(value, timeout=self.poll_interval)
+                break
+            except Full:
+                if self._stop.is_set():
+                    raise _Stopped()
+        statistics.output_wait_seconds += perf_counter() - start
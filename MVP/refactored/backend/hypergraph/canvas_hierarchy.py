@@ -0,0 +1,200 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Iterable
+
+from MVP.refactored.backend.hypergraph.hyper_edge import HyperEdge
+from MVP.refactored.backend.hypergraph.hypergraph import Hypergraph
+from MVP.refactored.backend.hypergraph.node import Node
+from MVP.refactored.backend.hypergraph.structure_version import StructureVersion
+from MVP.refactored.backend.tracing import Tracing, traced
+
+if TYPE_CHECKING:
+    from MVP.refactored.backend.diagram_callback import Receiver
+    from MVP.refactored.backend.types.connection_info import ConnectionInfo
+
+
+@Tracing.instrumented
+class CanvasHierarchy:
+    """
+    Flattened view of the canvas tree of a project.
+
+    Compound hyper edge (sub diagram box) contains hypergraphs of the canvas `sub_diagram_canvas_id`. Hierarchy
+    indexes hypergraphs and compound hyper edges by canvas and the canvas tree in one pass over hypergraphs, so
+    nested projects are analyzed without looking up every compound hyper edge recursively. If a receiver is given,
+    ports of compound hyper edges are mapped to nodes of diagram inputs and outputs of the inner canvas.
+
+    Hierarchy is built by `HypergraphRegistry.get_canvas_hierarchy` and cached until any hypergraph structure changes.
+    """
+
+    def __init__(self, hypergraphs: Iterable[Hypergraph], receiver: Receiver = None,
+                 structure_version: StructureVersion = None):
+        self.receiver = receiver
+        # counter of the registry of the hypergraphs, active one by default
+        self.structure_version = structure_version if structure_version is not None else StructureVersion.get_active()
+        self.version = self.structure_version.version
+        self.hypergraphs_by_canvas: dict[int, list[Hypergraph]] = {}
+        self.compound_hyper_edges: dict[int, list[HyperEdge]] = {}  # keyed by canvas id of the compound hyper edge
+        self.children: dict[int, list[int]] = {}  # canvas tree, sub diagram canvases of every canvas
+        self.parent: dict[int, int] = {}
+        self.nodes: dict[int, Node] = {}
+
+        self._input_nodes: dict[int, list[Node | None]] = {}
+        self._output_nodes: dict[int, list[Node | None]] = {}
+        self._projections: dict[int, Hypergraph] = {}
+
+        for hypergraph in hypergraphs:
+            canvas_id = hypergraph.get_canvas_id()
+            self.hypergraphs_by_canvas.setdefault(canvas_id, []).append(hypergraph)
+            self.nodes.update(hypergraph.nodes)
+            for hyper_edge in hypergraph.edges.values():
+                if not hyper_edge.is_compound():
+                    continue
+                self.compound_hyper_edges.setdefault(canvas_id, []).append(hyper_edge)
+                if hyper_edge.sub_diagram_canvas_id not in self.parent:
+                    self.parent[hyper_edge.sub_diagram_canvas_id] = canvas_id
+                    self.children.setdefault(canvas_id, []).append(hyper_edge.sub_diagram_canvas_id)
+
+    def get_hypergraphs(self, canvas_id) -> list[Hypergraph]:
+        return self.hypergraphs_by_canvas.get(canvas_id, [])
+
+    def get_hypergraphs_inside(self, hyper_edge: HyperEdge) -> list[Hypergraph]:
+        if not hyper_edge.is_compound():
+            return []
+        return self.get_hypergraphs(hyper_edge.sub_diagram_canvas_id)
+
+    def get_descendant_canvas_ids(self, canvas_id) -> list:
+        """Return the canvas and all canvases nested in it, parents before their sub diagrams."""
+        result = []
+        visited = set()
+        stack = [canvas_id]
+        while stack:
+            current = stack.pop()
+            if current in visited:
+                continue
+            visited.add(current)
+            result.append(current)
+            stack.extend(reversed(self.children.get(current, [])))
+        return result
+
+    def get_nested_hypergraphs(self, hypergraph: Hypergraph) -> list[Hypergraph]:
+        """Return the hypergraph and all hypergraphs nested in its compound hyper edges, parents first."""
+        result: list[Hypergraph] = []
+        visited_canvases = set()
+        stack = [hypergraph]
+        while stack:
+            current = stack.pop()
+            result.append(current)
+            for hyper_edge in current.edges.values():
+                if hyper_edge.is_compound() and hyper_edge.sub_diagram_canvas_id not in visited_canvases:
+                    visited_canvases.add(hyper_edge.sub_diagram_canvas_id)
+                    stack.extend(reversed(self.get_hypergraphs(hyper_edge.sub_diagram_canvas_id)))
+        return result
+
+    def get_atomic_hyper_edges(self, hypergraph: Hypergraph) -> list[HyperEdge]:
+        """Return atomic hyper edges of the hypergraph and of all hypergraphs nested in its compound hyper edges."""
+        return [hyper_edge for nested in self.get_nested_hypergraphs(hypergraph)
+                for hyper_edge in nested.edges.values() if not hyper_edge.is_compound()]
+
+    def _get_port_nodes(self, connections: list[ConnectionInfo]) -> list[Node | None]:
+        nodes: list[Node | None] = [None] * (max((connection.index for connection in connections), default=-1) + 1)
+        for connection in connections:
+            nodes[connection.index] = self.nodes.get(connection.id)
+        return nodes
+
+    def get_input_nodes(self, canvas_id) -> list[Node | None]:
+        """Return nodes of diagram inputs of the canvas by input index, empty if the receiver is not known."""
+        if canvas_id not in self._input_nodes:
+            diagram = self.receiver.diagrams.get(canvas_id) if self.receiver is not None else None
+            self._input_nodes[canvas_id] = self._get_port_nodes(diagram.input) if diagram is not None else []
+        return self._input_nodes[canvas_id]
+
+    def get_output_nodes(self, canvas_id) -> list[Node | None]:
+        """Return nodes of diagram outputs of the canvas by output index, empty if the receiver is not known."""
+        if canvas_id not in self._output_nodes:
+            diagram = self.receiver.diagrams.get(canvas_id) if self.receiver is not None else None
+            self._output_nodes[canvas_id] = self._get_port_nodes(diagram.output) if diagram is not None else []
+        return self._output_nodes[canvas_id]
+
+    def get_port_mapping(self, hyper_edge: HyperEdge) -> list[tuple[Node, Node]]:
+        """
+        Return pairs of nodes connected through the boundary of the compound hyper edge.
+
+        Source node at connection index `i` is paired with the node of diagram input `i` of the inner canvas, target
+        node at connection index `i` with the node of diagram output `i`.
+        """
+        if not hyper_edge.is_compound():
+            return []
+        pairs: list[tuple[Node, Node]] = []
+        for ports, inner_nodes in ((hyper_edge.source_nodes, self.get_input_nodes(hyper_edge.sub_diagram_canvas_id)),
+                                   (hyper_edge.target_nodes, self.get_output_nodes(hyper_edge.sub_diagram_canvas_id))):
+            for conn_index, node in ports.items():
+                if conn_index < len(inner_nodes) and inner_nodes[conn_index] is not None:
+                    pairs.append((node, inner_nodes[conn_index]))
+        return pairs
+
+    @traced("inline")
+    def inline(self, canvas_id) -> Hypergraph:
+        """
+        Return one flat hypergraph of the canvas, in which compound hyper edges are replaced with their content.
+
+        Projection consists of copies of nodes and atomic hyper edges with the same ids, registered hypergraphs are
+        not modified. Node of a compound hyper edge port is united with the inner node of the same port, see
+        `get_port_mapping`, so values pass the boundary as through a spider. Ports without known inner node are left
+        unconnected. Projection has the id of the canvas, it is not registered and is cached with the hierarchy.
+        Copies are built while their own structure version is active, so building them does not invalidate caches of
+        the registry.
+        """
+        if canvas_id in self._projections:
+            return self._projections[canvas_id]
+        structure_version = StructureVersion()
+        token = StructureVersion.activate(structure_version)
+        try:
+            projection = self._build_projection(canvas_id, structure_version)
+        finally:
+            StructureVersion.restore(token)
+        self._projections[canvas_id] = projection
+        return projection
+
+    def _build_projection(self, canvas_id, structure_version: StructureVersion) -> Hypergraph:
+        hypergraphs = [hypergraph for canvas in self.get_descendant_canvas_ids(canvas_id)
+                       for hypergraph in self.get_hypergraphs(canvas)]
+        copies: dict[int, Node] = {}  # keyed by object identity of the original node
+        for hypergraph in hypergraphs:
+            for node in hypergraph.nodes.values():
+                node_copy = Node(node.id, is_special=node.is_special)
+                node_copy.is_compound = node.is_compound
+                copies[id(node)] = node_copy
+
+        def unite(node: Node, other: Node, linked: set[tuple[int, int]]):
+            if id(node) in copies and id(other) in copies and (id(other), id(node)) not in linked:
+                linked.add((id(node), id(other)))
+                copies[id(node)].union(copies[id(other)])
+
+        linked: set[tuple[int, int]] = set()
+        projection = Hypergraph(hypergraph_id=canvas_id, canvas_id=canvas_id, structure_version=structure_version)
+        for hypergraph in hypergraphs:
+            for node in hypergraph.nodes.values():
+                for other in node.directly_connected_to:
+                    unite(node, other, linked)
+            for hyper_edge in hypergraph.edges.values():
+                if hyper_edge.is_compound():
+                    for outer_node, inner_node in self.get_port_mapping(hyper_edge):
+                        unite(outer_node, inner_node, linked)
+                    continue
+                hyper_edge_copy = HyperEdge(hyper_edge.id, hyper_edge.box_function)
+                hyper_edge_copy.box_label = hyper_edge.box_label
+                for conn_index, node in hyper_edge.source_nodes.items():
+                    if id(node) in copies:
+                        hyper_edge_copy.source_nodes[conn_index] = copies[id(node)]
+                        copies[id(node)].append_output(hyper_edge_copy)
+                for conn_index, node in hyper_edge.target_nodes.items():
+                    if id(node) in copies:
+                        hyper_edge_copy.target_nodes[conn_index] = copies[id(node)]
+                        copies[id(node)].append_input(hyper_edge_copy)
+                hyper_edge_copy.touch()
+                projection.edges[hyper_edge_copy.id] = hyper_edge_copy
+
+        projection.nodes = {node_copy.id: node_copy for node_copy in copies.values()}
+        projection.update_hypergraph_sources()
+        projection.update_hypergraph_targets()
+        return projection
@@ -0,0 +1,288 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from MVP.refactored.backend.hypergraph.hypergraph import Hypergraph
+    from MVP.refactored.backend.hypergraph.node import Node
+
+
+def _gather(pointers: np.ndarray, indices: np.ndarray, rows: np.ndarray) -> np.ndarray:
+    """Return concatenated CSR rows `indices[pointers[row]:pointers[row + 1]]` for all given rows."""
+    starts = pointers[rows]
+    lengths = pointers[rows + 1] - starts
+    total = int(lengths.sum())
+    if total == 0:
+        return np.empty(0, dtype=indices.dtype)
+    offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+    return indices[offsets + np.arange(total)]
+
+
+def _unique_pairs(first: np.ndarray, second: np.ndarray, second_count: int) -> tuple[np.ndarray, np.ndarray]:
+    """Return distinct (first, second) pairs sorted by first and then by second element."""
+    second_count = max(second_count, 1)
+    pairs = np.unique(first.astype(np.int64) * second_count + second)
+    return (pairs // second_count).astype(np.int32), (pairs % second_count).astype(np.int32)
+
+
+def _read_only(array: np.ndarray) -> np.ndarray:
+    array.flags.writeable = False
+    return array
+
+
+class FrozenHypergraph:
+    """
+    Immutable compressed sparse row (CSR) snapshot of a hypergraph.
+
+    Nodes are numbered so that members of the same node group are next to each other. Hyper edge ports are stored
+    as CSR arrays, where `edge_source_nodes[edge_source_pointers[e]:edge_source_pointers[e + 1]]` are the node
+    indexes connected to the source ports of hyper edge `e` in the connection index order (same for targets).
+    Ids and labels are kept in tables, because ids are not always integers.
+
+    Snapshot does not follow later changes of the hypergraph, create a new one with `Hypergraph.freeze`.
+    """
+
+    def __init__(self,
+                 hypergraph_id: int,
+                 canvas_id: int,
+                 node_ids: tuple,
+                 node_group: np.ndarray,
+                 group_pointers: np.ndarray,
+                 source_node_mask: np.ndarray,
+                 hyper_edge_ids: tuple,
+                 hyper_edge_labels: tuple[str, ...],
+                 hyper_edge_sub_diagram_canvas_ids: tuple,
+                 edge_source_pointers: np.ndarray,
+                 edge_source_nodes: np.ndarray,
+                 edge_target_pointers: np.ndarray,
+                 edge_target_nodes: np.ndarray):
+        self.hypergraph_id = hypergraph_id
+        self.canvas_id = canvas_id
+
+        self.node_ids: tuple = node_ids
+        self.node_group: np.ndarray = _read_only(node_group)
+        self.group_pointers: np.ndarray = _read_only(group_pointers)
+        self.source_node_mask: np.ndarray = _read_only(source_node_mask)
+
+        self.hyper_edge_ids: tuple = hyper_edge_ids
+        self.hyper_edge_labels: tuple[str, ...] = hyper_edge_labels
+        self.hyper_edge_sub_diagram_canvas_ids: tuple = hyper_edge_sub_diagram_canvas_ids
+
+        self.edge_source_pointers: np.ndarray = _read_only(edge_source_pointers)
+        self.edge_source_nodes: np.ndarray = _read_only(edge_source_nodes)
+        self.edge_target_pointers: np.ndarray = _read_only(edge_target_pointers)
+        self.edge_target_nodes: np.ndarray = _read_only(edge_target_nodes)
+
+        self.node_index: dict = {node_id: index for index, node_id in enumerate(node_ids)}
+        self.hyper_edge_index: dict = {hyper_edge_id: index for index, hyper_edge_id in enumerate(hyper_edge_ids)}
+
+        # group -> hyper edge incidence (transposed CSR), every (group, hyper edge) pair is stored once
+        self.group_output_pointers, self.group_output_edges = self._create_group_incidence(
+            self.edge_source_pointers, self.edge_source_nodes)
+        self.group_input_pointers, self.group_input_edges = self._create_group_incidence(
+            self.edge_target_pointers, self.edge_target_nodes)
+
+    @classmethod
+    def from_hypergraph(cls, hypergraph: Hypergraph) -> FrozenHypergraph:
+        """Create a snapshot of the hypergraph."""
+        node_ids: list = []
+        node_index: dict = {}
+        node_group: list[int] = []
+        group_pointers: list[int] = [0]
+
+        def add_node_group(node: Node):
+            group_index = len(group_pointers) - 1
+            for node_from_group in [node] + node.get_united_with_nodes():
+                node_index[node_from_group.id] = len(node_ids)
+                node_ids.append(node_from_group.id)
+                node_group.append(group_index)
+            group_pointers.append(len(node_ids))
+
+        for node in hypergraph.nodes.values():
+            if node.id not in node_index:
+                add_node_group(node)
+
+        hyper_edges = hypergraph.get_all_hyper_edges()
+        edge_source_pointers: list[int] = [0]
+        edge_source_nodes: list[int] = []
+        edge_target_pointers: list[int] = [0]
+        edge_target_nodes: list[int] = []
+        for hyper_edge in hyper_edges:
+            for ports, pointers, nodes in ((edge_source_nodes, edge_source_pointers, hyper_edge.get_source_nodes()),
+                                           (edge_target_nodes, edge_target_pointers, hyper_edge.get_target_nodes())):
+                for node in nodes:
+                    if node.id not in node_index:
+                        add_node_group(node)
+                    ports.append(node_index[node.id])
+                pointers.append(len(ports))
+
+        source_node_mask = np.zeros(len(node_ids), dtype=bool)
+        for source_node_id in hypergraph.hypergraph_source:
+            if source_node_id in node_index:
+                source_node_mask[node_index[source_node_id]] = True
+
+        return cls(hypergraph_id=hypergraph.id,
+                   canvas_id=hypergraph.canvas_id,
+                   node_ids=tuple(node_ids),
+                   node_group=np.array(node_group, dtype=np.int32),
+                   group_pointers=np.array(group_pointers, dtype=np.int32),
+                   source_node_mask=source_node_mask,
+                   hyper_edge_ids=tuple(hyper_edge.id for hyper_edge in hyper_edges),
+                   hyper_edge_labels=tuple(hyper_edge.box_label for hyper_edge in hyper_edges),
+                   hyper_edge_sub_diagram_canvas_ids=tuple(
+                       hyper_edge.sub_diagram_canvas_id for hyper_edge in hyper_edges),
+                   edge_source_pointers=np.array(edge_source_pointers, dtype=np.int32),
+                   edge_source_nodes=np.array(edge_source_nodes, dtype=np.int32),
+                   edge_target_pointers=np.array(edge_target_pointers, dtype=np.int32),
+                   edge_target_nodes=np.array(edge_target_nodes, dtype=np.int32))
+
+    def _create_group_incidence(self, edge_pointers: np.ndarray, edge_nodes: np.ndarray) \
+            -> tuple[np.ndarray, np.ndarray]:
+        groups, edges = _unique_pairs(self.node_group[edge_nodes],
+                                      np.repeat(np.arange(self.hyper_edge_count, dtype=np.int32),
+                                                np.diff(edge_pointers)),
+                                      self.hyper_edge_count)
+        pointers = np.zeros(self.group_count + 1, dtype=np.int32)
+        np.cumsum(np.bincount(groups, minlength=self.group_count), out=pointers[1:])
+        return _read_only(pointers), _read_only(edges)
+
+    @property
+    def node_count(self) -> int:
+        return len(self.node_ids)
+
+    @property
+    def group_count(self) -> int:
+        return len(self.group_pointers) - 1
+
+    @property
+    def hyper_edge_count(self) -> int:
+        return len(self.hyper_edge_ids)
+
+    def get_group_node_ids(self, group: int) -> list:
+        return list(self.node_ids[self.group_pointers[group]:self.group_pointers[group + 1]])
+
+    def get_source_nodes(self, edge: int) -> np.ndarray:
+        """Return node indexes connected to the source ports of the hyper edge."""
+        return self.edge_source_nodes[self.edge_source_pointers[edge]:self.edge_source_pointers[edge + 1]]
+
+    def get_target_nodes(self, edge: int) -> np.ndarray:
+        """Return node indexes connected to the target ports of the hyper edge."""
+        return self.edge_target_nodes[self.edge_target_pointers[edge]:self.edge_target_pointers[edge + 1]]
+
+    def get_output_hyper_edges(self, group: int) -> np.ndarray:
+        """Return indexes of hyper edges that have the node group as a source."""
+        return self.group_output_edges[self.group_output_pointers[group]:self.group_output_pointers[group + 1]]
+
+    def get_input_hyper_edges(self, group: int) -> np.ndarray:
+        """Return indexes of hyper edges that have the node group as a target."""
+        return self.group_input_edges[self.group_input_pointers[group]:self.group_input_pointers[group + 1]]
+
+    def get_edge_source_degrees(self) -> np.ndarray:
+        """Return the number of source ports of every hyper edge."""
+        return np.diff(self.edge_source_pointers)
+
+    def get_edge_target_degrees(self) -> np.ndarray:
+        """Return the number of target ports of every hyper edge."""
+        return np.diff(self.edge_target_pointers)
+
+    def get_group_in_degrees(self) -> np.ndarray:
+        """Return the number of distinct input hyper edges of every node group."""
+        return np.diff(self.group_input_pointers)
+
+    def get_group_out_degrees(self) -> np.ndarray:
+        """Return the number of distinct output hyper edges of every node group."""
+        return np.diff(self.group_output_pointers)
+
+    def get_source_groups(self) -> np.ndarray:
+        """Return node groups that contain hypergraph sources."""
+        return np.unique(self.node_group[self.source_node_mask])
+
+    def get_sink_groups(self) -> np.ndarray:
+        """Return node groups without output hyper edges."""
+        return np.flatnonzero(self.get_group_out_degrees() == 0).astype(np.int32)
+
+    def get_reachable_groups(self, start_groups: np.ndarray) -> np.ndarray:
+        """Return boolean mask of node groups reachable from the start groups following hyper edge direction."""
+        reached = np.zeros(self.group_count, dtype=bool)
+        frontier = np.unique(np.asarray(start_groups, dtype=np.int32))
+        reached[frontier] = True
+        while len(frontier):
+            edges = np.unique(_gather(self.group_output_pointers, self.group_output_edges, frontier))
+            targets = self.node_group[_gather(self.edge_target_pointers, self.edge_target_nodes, edges)]
+            frontier = np.unique(targets[~reached[targets]])
+            reached[frontier] = True
+        return reached
+
+    def get_hypergraph_target_ids(self) -> list:
+        """Return ids of nodes in sink node groups reachable from hypergraph sources."""
+        targets = self.get_reachable_groups(self.get_source_groups())
+        targets[self.get_group_out_degrees() > 0] = False
+        return [self.node_ids[index] for index in np.flatnonzero(targets[self.node_group])]
+
+    def get_topological_levels(self) -> list[np.ndarray]:
+        """
+        Return hyper edge indexes grouped by levels of topological order with Kahn's algorithm.
+
+        Node group is ready when it has no input hyper edges or when any hyper edge that outputs to it is done, so a
+        spider can feed a value back into a group, which already has a value. Hyper edge is ready when all its source
+        node groups are ready. Hyper edges in one level do not depend on each other and are ordered by index.
+        Every hyper edge and node group is visited once, so it takes O(N + E).
+
+        :raises ValueError: if hyper edges form a cycle.
+        """
+        consumer_groups = np.repeat(np.arange(self.group_count, dtype=np.int32), np.diff(self.group_output_pointers))
+        initially_ready = self.get_group_in_degrees() == 0
+        edge_pending = np.bincount(self.group_output_edges[~initially_ready[consumer_groups]],
+                                   minlength=self.hyper_edge_count).tolist()
+
+        # levels are usually small, so the loop runs over lists instead of paying NumPy call overhead per level
+        group_ready = initially_ready.tolist()
+        node_group = self.node_group.tolist()
+        edge_target_pointers = self.edge_target_pointers.tolist()
+        edge_target_nodes = self.edge_target_nodes.tolist()
+        group_output_pointers = self.group_output_pointers.tolist()
+        group_output_edges = self.group_output_edges.tolist()
+
+        levels: list[np.ndarray] = []
+        scheduled = 0
+        ready = [edge for edge, pending in enumerate(edge_pending) if pending == 0]
+        while ready:
+            levels.append(np.array(ready, dtype=np.int32))
+            scheduled += len(ready)
+            next_ready: list[int] = []
+            for edge in ready:
+                for node in edge_target_nodes[edge_target_pointers[edge]:edge_target_pointers[edge + 1]]:
+                    group = node_group[node]
+                    if group_ready[group]:
+                        continue
+                    group_ready[group] = True
+                    for consumer in group_output_edges[group_output_pointers[group]:group_output_pointers[group + 1]]:
+                        edge_pending[consumer] -= 1
+                        if edge_pending[consumer] == 0:
+                            next_ready.append(consumer)
+            ready = sorted(next_ready)
+
+        if scheduled < self.hyper_edge_count:
+            cycle_ids = [self.hyper_edge_ids[edge] for edge, pending in enumerate(edge_pending) if pending > 0]
+            raise ValueError(f"Hyper edges {cycle_ids} of hypergraph {self.hypergraph_id} form a cycle.")
+        return levels
+
+    def get_topological_order(self) -> np.ndarray:
+        """Return hyper edge indexes in topological order, see `get_topological_levels`."""
+        levels = self.get_topological_levels()
+        return np.concatenate(levels) if levels else np.empty(0, dtype=np.int32)
+
+    def to_dict(self) -> dict:
+        """Return a dictionary representation of the hypergraph in the same format as `Hypergraph.to_dict`."""
+        return {
+            "id": self.hypergraph_id,
+            "hyperEdges": [{
+                "id": hyper_edge_id,
+                "sourceNodes": [self.node_ids[node] for node in self.get_source_nodes(edge)],
+                "targetNodes": [self.node_ids[node] for node in self.get_target_nodes(edge)],
+            } for edge, hyper_edge_id in enumerate(self.hyper_edge_ids)],
+            "nodeGroups": [self.get_group_node_ids(group) for group in range(self.group_count)],
+            "sourceNodes": [self.node_ids[node] for node in np.flatnonzero(self.source_node_mask)],
+        }
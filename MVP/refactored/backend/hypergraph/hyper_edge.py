@@ -1,8 +1,11 @@
 from __future__ import annotations
 
+from collections.abc import Iterator, MutableMapping
 from typing import TYPE_CHECKING
 
 from MVP.refactored.backend.box_functions.box_function import BoxFunction
+from MVP.refactored.backend.box_functions.box_function_registry import BoxFunctionRegistry
+from MVP.refactored.backend.hypergraph.structure_version import StructureVersion
 from MVP.refactored.backend.id_generator import IdGenerator
 
 if TYPE_CHECKING:
@@ -10,7 +13,83 @@ if TYPE_CHECKING:
     from MVP.refactored.backend.hypergraph.hypergraph import Hypergraph
 
 
+class PortMap(MutableMapping):
+    """
+    Mapping from connection index to the node connected to that port.
+
+    Nodes are kept in a list indexed by connection index, free ports are None. The list itself is handed out as
+    the ordered view of nodes and is copied on the next change, so views are never modified and are free while
+    ports do not change.
+    """
+    __slots__ = ("nodes", "count", "view")
+
+    def __init__(self, ports: dict[int, Node] = None):
+        self.nodes: list[Node | None] = []
+        self.count = 0
+        self.view: list[Node] | None = None
+        for conn_index, node in (ports or {}).items():
+            self[conn_index] = node
+
+    def __getitem__(self, conn_index: int) -> Node:
+        if 0 <= conn_index < len(self.nodes) and self.nodes[conn_index] is not None:
+            return self.nodes[conn_index]
+        raise KeyError(conn_index)
+
+    def __setitem__(self, conn_index: int, node: Node):
+        if conn_index < 0:
+            raise ValueError(f"Connection index can not be negative, got {conn_index}.")
+        self._before_change()
+        if conn_index >= len(self.nodes):
+            self.nodes.extend([None] * (conn_index + 1 - len(self.nodes)))
+        if self.nodes[conn_index] is None:
+            self.count += 1
+        self.nodes[conn_index] = node
+
+    def __delitem__(self, conn_index: int):
+        self[conn_index]  # raises KeyError for free ports
+        self._before_change()
+        self.nodes[conn_index] = None
+        self.count -= 1
+        while self.nodes and self.nodes[-1] is None:
+            self.nodes.pop()
+
+    def __iter__(self) -> Iterator[int]:
+        return (conn_index for conn_index, node in enumerate(self.nodes) if node is not None)
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __contains__(self, conn_index) -> bool:
+        return isinstance(conn_index, int) and 0 <= conn_index < len(self.nodes) and self.nodes[conn_index] is not None
+
+    def __repr__(self) -> str:
+        return f"PortMap({dict(self.items())})"
+
+    def clear(self):
+        self.nodes = []
+        self.count = 0
+        self.view = None
+
+    def get_nodes(self) -> list[Node]:
+        """Return nodes ordered by connection index, returned list must not be modified."""
+        if self.view is None:
+            self.view = self.nodes if self.count == len(self.nodes) else [node for node in self.nodes if node is not None]
+        return self.view
+
+    def _before_change(self):
+        if self.view is self.nodes:
+            self.nodes = list(self.nodes)
+        self.view = None
+
+
 class HyperEdge:
+    """
+    Hyper edge (box) of a hypergraph.
+
+    Changes of source and target nodes bump the active `StructureVersion`, so hyper edges must be changed while
+    their registry is active.
+    """
+    __slots__ = ("id", "box_function", "_source_nodes", "_target_nodes", "sub_diagram_canvas_id", "box_label")
 
     def __init__(self, hyper_edge_id=None, box_function: BoxFunction = None, sub_diagram_canvas_id=-1):
         if hyper_edge_id is None:
@@ -18,13 +97,35 @@ class HyperEdge:
         self.id = hyper_edge_id
         self.box_function: BoxFunction | None = box_function
 
-        self.source_nodes: dict[int, Node] = dict()  # key is connection index, it is necessary for keeping the right queue
-        self.target_nodes: dict[int, Node] = dict()
+        self._source_nodes = PortMap()  # key is connection index, it is necessary for keeping the right queue
+        self._target_nodes = PortMap()
 
         self.sub_diagram_canvas_id = sub_diagram_canvas_id
 
         self.box_label = ""
 
+    @property
+    def source_nodes(self) -> PortMap:
+        return self._source_nodes
+
+    @source_nodes.setter
+    def source_nodes(self, source_nodes: dict[int, Node]):
+        self._source_nodes = PortMap(source_nodes)
+        self.touch()
+
+    @property
+    def target_nodes(self) -> PortMap:
+        return self._target_nodes
+
+    @target_nodes.setter
+    def target_nodes(self, target_nodes: dict[int, Node]):
+        self._target_nodes = PortMap(target_nodes)
+        self.touch()
+
+    def touch(self):
+        """Mark source or target nodes as changed, so adjacency views cached at StructureVersion are rebuilt."""
+        StructureVersion.get_active().bump()
+
     def get_hypergraphs_inside(self) -> list[Hypergraph]:
         # why dynamically get hypergraphs?
         # Because in sub diagram hypergraphs can be modified, deleted, added and that handling is tricky,
@@ -40,49 +141,23 @@ class HyperEdge:
 
     def set_sub_diagram_canvas_id(self, canvas_id: int):
         self.sub_diagram_canvas_id = canvas_id
-
-    def swap_id(self, new_id: int):
-        self.id = new_id
-
-    def remove_all_source_nodes(self):
-        self.source_nodes.clear()
-
-    def remove_all_target_nodes(self):
-        self.target_nodes.clear()
-
-    def remove_source_connection_by_index(self, conn_index: int):
-        """NB! It deletes connection and all connections with index more that current connection index,
-        their connection decreases.
-        """
-        if conn_index in self.source_nodes:
-            del self.source_nodes[conn_index]
-        for key in self.source_nodes.keys():
-            if key > conn_index:
-                self.source_nodes[key - 1] = self.source_nodes[key]
-                del self.source_nodes[key]
-
-    def remove_target_connection_by_index(self, conn_index: int):
-        """NB! It deletes connection and all connections with index more that current connection index,
-        their connection decreases.
-        """
-        if conn_index in self.source_nodes:
-            del self.target_nodes[conn_index]
-        for key in self.target_nodes.keys():
-            if key > conn_index:
-                self.target_nodes[key - 1] = self.target_nodes[key]
-                del self.target_nodes[key]
+        StructureVersion.get_active().bump()
 
     def get_source_nodes(self) -> list[Node]:
         """
+        Returned list is cached until source nodes change, so it must not be modified.
+
         :return Ordered list of source nodes(vertices):
         """
-        return [item[1] for item in sorted(self.source_nodes.items(), key=lambda item: item[0])]
+        return self._source_nodes.get_nodes()
 
     def get_target_nodes(self) -> list[Node]:
         """
+        Returned list is cached until target nodes change, so it must not be modified.
+
         :return Ordered list of target nodes(vertices):
         """
-        return [item[1] for item in sorted(self.target_nodes.items(), key=lambda item: item[0])]
+        return self._target_nodes.get_nodes()
 
     def get_source_node_connection_index(self, node: Node) -> int | None:
         for conn_index, source_node in self.source_nodes.items():
@@ -97,28 +172,35 @@ class HyperEdge:
         return None
 
     def get_box_function(self) -> BoxFunction:
+        """Return shared BoxFunction of the box label, see `BoxFunctionRegistry`."""
         from MVP.refactored.frontend.windows.main_diagram import MainDiagram
-        return BoxFunction(main_function_name=self.box_label,
-                           file_code=MainDiagram.get_function(self.box_label))
+        return BoxFunctionRegistry.get(self.box_label, MainDiagram.get_function(self.box_label))
 
     def set_source_node(self, conn_index: int, node: Node):
         if conn_index in self.source_nodes:
             self.set_source_node(conn_index + 1, self.source_nodes[conn_index])
         self.source_nodes[conn_index] = node
+        self.touch()
 
     def set_target_node(self, conn_index: int, node: Node):
         if conn_index in self.target_nodes:
             self.set_target_node(conn_index + 1, self.target_nodes[conn_index])
         self.target_nodes[conn_index] = node
+        self.touch()
 
     def set_box_label(self, label: str):
-        self.box_label = label
+        if label != self.box_label:
+            self.box_label = label
+            # inline projections and dataflow plans copy labels
+            StructureVersion.get_active().bump()
 
     def append_target_node(self, node: Node):
         self.target_nodes[len(self.target_nodes)] = node
+        self.touch()
 
     def append_source_node(self, node: Node):
         self.source_nodes[len(self.source_nodes)] = node
+        self.touch()
 
     def append_source_nodes(self, nodes: list[Node]):
         for node in nodes:
@@ -126,9 +208,11 @@ class HyperEdge:
 
     def remove_all_source_nodes(self):
         self.source_nodes.clear()
+        self.touch()
 
     def remove_all_target_nodes(self):
         self.target_nodes.clear()
+        self.touch()
 
     def remove_source_connection_by_index(self, conn_index: int):
         """NB! It deletes connection and all connections with index more that current connection index,
@@ -140,6 +224,7 @@ class HyperEdge:
             if key > conn_index:
                 self.source_nodes[key - 1] = self.source_nodes[key]
                 del self.source_nodes[key]
+        self.touch()
 
     def remove_target_connection_by_index(self, conn_index: int):
         """NB! It deletes connection and all connections with index more that current connection index,
@@ -151,24 +236,29 @@ class HyperEdge:
             if key > conn_index:
                 self.target_nodes[key - 1] = self.target_nodes[key]
                 del self.target_nodes[key]
+        self.touch()
 
     def remove_source_node_by_connection_index(self, conn_index: int):
         if conn_index in self.source_nodes:
             del self.source_nodes[conn_index]
+            self.touch()
 
     def remove_target_node_by_connection_index(self, conn_index: int):
         if conn_index in self.target_nodes:
             del self.target_nodes[conn_index]
+            self.touch()
 
     def remove_source_node_by_reference(self, node: Node):
         connection_index = self.get_source_node_connection_index(node)
         if connection_index is not None:
             del self.source_nodes[connection_index]
+            self.touch()
 
     def remove_target_node_by_reference(self, node: Node):
         connection_index = self.get_target_node_connection_index(node)
         if connection_index is not None:
             del self.target_nodes[connection_index]
+            self.touch()
 
     def remove_self(self):
         for node in self.source_nodes.values():
@@ -177,6 +267,7 @@ class HyperEdge:
             node.remove_input(self)
         self.source_nodes.clear()
         self.target_nodes.clear()
+        self.touch()
 
     def swap_id(self, new_id: int):
         self.id = new_id
@@ -1,35 +1,47 @@
 from __future__ import annotations
 
-import logging
+from itertools import chain
 from queue import Queue
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Iterable
 
 from MVP.refactored.backend.id_generator import IdGenerator
+from MVP.refactored.backend.tracing import Tracing, traced
 
 if TYPE_CHECKING:
     from MVP.refactored.backend.hypergraph.node import Node
 
+from MVP.refactored.backend.hypergraph.frozen_hypergraph import FrozenHypergraph
 from MVP.refactored.backend.hypergraph.hyper_edge import HyperEdge
-
-logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s', )
-logger = logging.getLogger(__name__)
-message_start = "\x1b[33;20m"
-message_end = "\x1b[0m"
+from MVP.refactored.backend.hypergraph.reachability_index import ReachabilityIndex
+from MVP.refactored.backend.hypergraph.structure_version import StructureVersion
+from MVP.refactored.backend.hypergraph.topological_schedule import TopologicalSchedule
 
 
+@Tracing.instrumented
 class Hypergraph:
     """Hypergraph class."""
 
-    def __init__(self, hypergraph_id=None, canvas_id=None):
+    def __init__(self, hypergraph_id=None, canvas_id=None, structure_version: StructureVersion = None):
         self.id = hypergraph_id
         if hypergraph_id is None:
             self.id = IdGenerator.id()
         self.canvas_id = canvas_id
+        # counter of the owning registry, see `StructureVersion`
+        self.structure_version = structure_version if structure_version is not None else StructureVersion.get_active()
         self.hypergraph_source: dict[int, Node] = {}
+        # nodes of node groups without output hyper edges, kept up to date by every method that changes them
+        self.hypergraph_target: dict[int, Node] = {}
         self.nodes: dict[int, Node] = {}
         self.edges: dict[int, HyperEdge] = {}
 
-        logger.debug(message_start + f"Creating hypergraph with id {self.id}" + message_end)
+        # adjacency views of nodes cached at StructureVersion, children and parents depend on other nodes
+        self._children_nodes: dict[int, list[Node]] = {}
+        self._parent_nodes: dict[int, list[Node]] = {}
+        self._adjacency_version = -1
+        self._topological_schedule: TopologicalSchedule | None = None
+        self._topological_schedule_version = -1
+        self._reachability_index: ReachabilityIndex | None = None
+        self._reachability_index_version = -1
 
     def get_node_by_id(self, node_id: int) -> Node | None:
         return self.nodes.get(node_id)
@@ -40,6 +52,9 @@ class Hypergraph:
     def get_all_nodes_ids(self) -> list[int]:
         return list(self.nodes.keys())
 
+    def get_nodes_by_ids(self, node_ids: Iterable[int]) -> list[Node]:
+        return [self.nodes[node_id] for node_id in node_ids if node_id in self.nodes]
+
     def get_all_hyper_edges(self) -> list[HyperEdge]:
         return list(self.edges.values())
 
@@ -53,23 +68,33 @@ class Hypergraph:
         return list(self.hypergraph_source.keys())
 
     def get_hypergraph_target(self) -> list[Node]:
-        queue = Queue()
-        target_nodes: dict[int, Node] = dict()
-        for node in self.get_hypergraph_source():
-            queue.put(node)
-
-        while not queue.empty():
-            node = queue.get()
-            output_hyper_edges: list[HyperEdge] = node.get_output_hyper_edges()
-            if len(output_hyper_edges) == 0:
-                target_nodes[node.id] = node
-                for united_with in node.get_united_with_nodes():
-                    target_nodes[united_with.id] = united_with
-
-            for output_hyper_edge in output_hyper_edges:
-                for target_node in output_hyper_edge.get_target_nodes():
-                    queue.put(target_node)
-        return list(target_nodes.values())
+        """Return all nodes of node groups without output hyper edges."""
+        return list(self.hypergraph_target.values())
+
+    def get_hypergraph_target_ids(self) -> list[int]:
+        return list(self.hypergraph_target.keys())
+
+    def get_children_nodes(self, node: Node) -> list[Node]:
+        """Return `Node.get_children_nodes`, cached until the structure changes, so it must not be modified."""
+        self._check_adjacency_version()
+        children_nodes = self._children_nodes.get(node.id)
+        if children_nodes is None:
+            children_nodes = self._children_nodes[node.id] = node.get_children_nodes()
+        return children_nodes
+
+    def get_parent_nodes(self, node: Node) -> list[Node]:
+        """Return `Node.get_parent_nodes`, cached until the structure changes, so it must not be modified."""
+        self._check_adjacency_version()
+        parent_nodes = self._parent_nodes.get(node.id)
+        if parent_nodes is None:
+            parent_nodes = self._parent_nodes[node.id] = node.get_parent_nodes()
+        return parent_nodes
+
+    def _check_adjacency_version(self):
+        if self._adjacency_version != self.structure_version.version:
+            self._children_nodes.clear()
+            self._parent_nodes.clear()
+            self._adjacency_version = self.structure_version.version
 
     def get_canvas_id(self) -> int:
         return self.canvas_id
@@ -83,7 +108,7 @@ class Hypergraph:
 
     def add_node(self, node: Node):
         self.nodes[node.id] = node
-        if len(node.get_parent_nodes()) == 0:
+        if len(self.get_parent_nodes(node)) == 0:
             self.hypergraph_source[node.id] = node
             for directly_connected in node.get_united_with_nodes():
                 self.nodes[directly_connected.id] = directly_connected
@@ -91,6 +116,7 @@ class Hypergraph:
         else:
             for directly_connected in node.get_united_with_nodes():
                 self.nodes[directly_connected.id] = directly_connected
+        self.update_node_group_targets([node])
 
     def add_nodes(self, nodes: list[Node]):
         for node in nodes:
@@ -98,29 +124,36 @@ class Hypergraph:
 
     def add_edge(self, edge: HyperEdge):
         self.edges[edge.id] = edge
+        for source_node in edge.get_source_nodes():
+            for node_from_group in source_node.get_group_members():
+                self.hypergraph_target.pop(node_from_group.id, None)
+        self.structure_version.bump()
 
     def add_edges(self, edges: list[HyperEdge]):
         for edge in edges:
             self.add_edge(edge)
 
     def remove_node(self, node_to_remove_id: int):
+        """
+        Remove node from the hypergraph.
+
+        Hypergraph can become disconnected after that, use `split_into_connected_components` to handle it.
+        """
         removed_node = self.nodes.pop(node_to_remove_id)
-        removed_node_united_with_nodes = removed_node.get_united_with_nodes()
+        group_members = removed_node.get_united_with_nodes()
         removed_node.remove_self()
 
         if node_to_remove_id in self.hypergraph_source:
             self.hypergraph_source.pop(node_to_remove_id)
-
-        for directly_connected in removed_node_united_with_nodes:
-            for source_node in self.hypergraph_source.values():
-                if not source_node.is_connected_to(directly_connected):
-                    self.nodes.pop(directly_connected.id)
-                    if directly_connected.id in self.hypergraph_source:
-                        self.hypergraph_source.pop(directly_connected.id)
-                    break
+        self.hypergraph_target.pop(node_to_remove_id, None)
+        # the rest of the group could lose the member with output hyper edges
+        self.update_node_group_targets(group_members)
 
     def remove_hyper_edge(self, edge_to_remove_id: int) -> HyperEdge:
-        self.edges[edge_to_remove_id].remove_self()
+        hyper_edge = self.edges[edge_to_remove_id]
+        source_nodes = hyper_edge.get_source_nodes()
+        hyper_edge.remove_self()
+        self.update_node_group_targets(source_nodes)
         return self.edges.pop(edge_to_remove_id)
 
     def swap_hyper_edge_id(self, prev_id: int, new_id: int) -> bool:
@@ -145,6 +178,7 @@ class Hypergraph:
         for directly_connected in node.get_united_with_nodes():
             self.nodes[directly_connected.id] = directly_connected
             self.hypergraph_source[directly_connected.id] = directly_connected
+        self.update_node_group_targets([node])
 
     def add_hypergraph_sources(self, nodes: list[Node]):
         for node in nodes:
@@ -160,7 +194,7 @@ class Hypergraph:
         visited: set[int] = set()
         for source_node in self.get_hypergraph_source():
             queue.put(source_node)
-            for connected_node in source_node.get_children_nodes() + source_node.get_united_with_nodes():
+            for connected_node in chain(self.get_children_nodes(source_node), source_node.get_group_members()):
                 queue.put(connected_node)
 
         while not queue.empty():
@@ -168,9 +202,10 @@ class Hypergraph:
             # self.add_node(child_node) TODO maybe use this? (not good because adds complexity, but exclude some possible errors with hypergraph source)
             self.nodes[child_node.id] = child_node
             visited.add(child_node.id)
-            for connected_node in child_node.get_children_nodes() + child_node.get_united_with_nodes():
+            for connected_node in chain(self.get_children_nodes(child_node), child_node.get_group_members()):
                 if connected_node.id not in visited:
                     queue.put(connected_node)
+        self.update_hypergraph_targets()
 
     def update_edges(self):
         """
@@ -178,24 +213,134 @@ class Hypergraph:
         Must be called when the source node is added.
         """
         self.edges.clear()
+        self.structure_version.bump()
         queue: Queue[Node] = Queue()
         visited_nodes: set[int] = set()
         for source_node in self.get_hypergraph_source():
-            hyper_edges: list[HyperEdge] = source_node.get_output_hyper_edges() + source_node.get_input_hyper_edges()
-            for hyper_edge in hyper_edges:
+            for hyper_edge in chain(source_node.get_output_hyper_edges(), source_node.get_input_hyper_edges()):
                 self.edges[hyper_edge.id] = hyper_edge  # update hyper edges
-            for connected_node in source_node.get_children_nodes() + source_node.get_united_with_nodes():
+            for connected_node in chain(self.get_children_nodes(source_node), source_node.get_group_members()):
                 queue.put(connected_node)  # add next level nodes to queue
 
         while not queue.empty():
             node = queue.get()  # current level node
             visited_nodes.add(node.id)
-            for hyper_edge in node.get_output_hyper_edges() + node.get_input_hyper_edges():
+            for hyper_edge in chain(node.get_output_hyper_edges(), node.get_input_hyper_edges()):
                 self.edges[hyper_edge.id] = hyper_edge  # update hyper edges
-            for connected_node in node.get_children_nodes() + node.get_united_with_nodes():
+            for connected_node in chain(self.get_children_nodes(node), node.get_group_members()):
                 if connected_node.id not in visited_nodes:
                     queue.put(connected_node)  # add next level nodes to queue
 
+    def merge(self, other: Hypergraph):
+        """Add all nodes, hyper edges and sources of the other hypergraph to this hypergraph."""
+        self.nodes.update(other.nodes)
+        self.edges.update(other.edges)
+        self.hypergraph_source.update(other.hypergraph_source)
+        self.hypergraph_target.update(other.hypergraph_target)
+        self.structure_version.bump()
+
+    def update_node_group_sources(self, nodes: list[Node]):
+        """
+        Update hypergraph sources of node groups of the given nodes.
+
+        Node group is a source if it does not have parent nodes.
+        """
+        for node in nodes:
+            node_group = [node] + node.get_united_with_nodes()
+            if len(self.get_parent_nodes(node)) == 0:
+                for node_from_group in node_group:
+                    self.nodes[node_from_group.id] = node_from_group
+                    self.hypergraph_source[node_from_group.id] = node_from_group
+            else:
+                for node_from_group in node_group:
+                    self.hypergraph_source.pop(node_from_group.id, None)
+
+    def update_node_group_targets(self, nodes: list[Node]):
+        """
+        Update hypergraph targets of node groups of the given nodes.
+
+        Node group is a target if none of its members has output hyper edges. It must be called for every node
+        group, which gains or loses output hyper edges or members, so targets are never searched for.
+        """
+        for node in nodes:
+            if not node.has_output_hyper_edges():
+                for node_from_group in node.get_group_members():
+                    if node_from_group.id in self.nodes:
+                        self.hypergraph_target[node_from_group.id] = node_from_group
+            else:
+                for node_from_group in node.get_group_members():
+                    self.hypergraph_target.pop(node_from_group.id, None)
+
+    def update_hypergraph_sources(self):
+        """Set all hypergraph nodes without parent nodes as hypergraph sources."""
+        self.hypergraph_source.clear()
+        for node in self.nodes.values():
+            if len(self.get_parent_nodes(node)) == 0:
+                self.hypergraph_source[node.id] = node
+
+    def update_hypergraph_targets(self):
+        """Set all hypergraph nodes of node groups without output hyper edges as hypergraph targets."""
+        self.hypergraph_target.clear()
+        for node in self.nodes.values():
+            if not node.has_output_hyper_edges():
+                self.hypergraph_target[node.id] = node
+
+    def label_connected_components(self) -> tuple[dict[Node, int], dict[HyperEdge, int]]:
+        """
+        Label every node and hyper edge with the index of the connected component it belongs to.
+
+        Nodes are connected if they are in the same node group or if they are connected to the same hyper edge.
+        All labels are set in one traversal. Hyper edges without any connected nodes are not labelled.
+        """
+        node_labels: dict[Node, int] = {}
+        hyper_edge_labels: dict[HyperEdge, int] = {}
+        label = 0
+        for start_node in self.nodes.values():
+            if start_node in node_labels:
+                continue
+            stack: list[Node] = [start_node]
+            while stack:
+                node = stack.pop()
+                if node in node_labels:
+                    continue
+                node_group = node.get_group_members()
+                for node_from_group in node_group:
+                    node_labels[node_from_group] = label
+                for node_from_group in node_group:
+                    for hyper_edge in node_from_group.inputs + node_from_group.outputs:
+                        if hyper_edge in hyper_edge_labels:
+                            continue
+                        hyper_edge_labels[hyper_edge] = label
+                        for hyper_edge_node in list(hyper_edge.source_nodes.values()) + list(
+                                hyper_edge.target_nodes.values()):
+                            if hyper_edge_node not in node_labels:
+                                stack.append(hyper_edge_node)
+            label += 1
+        return node_labels, hyper_edge_labels
+
+    @traced("split_into_connected_components")
+    def split_into_connected_components(self) -> list[Hypergraph]:
+        """
+        Create a hypergraph for every connected component of this hypergraph.
+
+        Components are created directly from `label_connected_components` labels. If the hypergraph is still
+        connected, the only created hypergraph keeps the id of this hypergraph.
+        """
+        node_labels, hyper_edge_labels = self.label_connected_components()
+        component_count = len(set(node_labels.values()))
+        components: list[Hypergraph] = [
+            Hypergraph(hypergraph_id=self.id if component_count == 1 else None, canvas_id=self.canvas_id,
+                       structure_version=self.structure_version)
+            for _ in range(component_count)]
+        for node, label in node_labels.items():
+            components[label].nodes[node.id] = node
+        for hyper_edge, label in hyper_edge_labels.items():
+            components[label].edges[hyper_edge.id] = hyper_edge
+        for component in components:
+            component.update_hypergraph_sources()
+            component.update_hypergraph_targets()
+        return components
+
     def get_node_groups(self) -> list[list[int]]:
         """
         Return list of node groups.
@@ -218,6 +363,40 @@ class Hypergraph:
 
         return node_groups
 
+    def get_topological_schedule(self) -> TopologicalSchedule:
+        """
+        Return execution schedule of hyper edges, descending into compound hyper edges.
+
+        Schedule is cached until any hypergraph structure changes.
+
+        :raises ValueError: if hyper edges form a cycle.
+        """
+        if self._topological_schedule_version != self.structure_version.version:
+            self._topological_schedule = TopologicalSchedule.from_hypergraph(self)
+            self._topological_schedule_version = self.structure_version.version
+        return self._topological_schedule
+
+    @traced("reachability_index")
+    def get_reachability_index(self) -> ReachabilityIndex:
+        """
+        Return ancestry and connectivity index of the hypergraph nodes.
+
+        Index is built on the first call and cached until any hypergraph structure changes.
+        """
+        if self._reachability_index_version != self.structure_version.version:
+            self._reachability_index = ReachabilityIndex(self.freeze())
+            self._reachability_index_version = self.structure_version.version
+        return self._reachability_index
+
+    @traced("freeze")
+    def freeze(self) -> FrozenHypergraph:
+        """
+        Return an immutable CSR snapshot of the hypergraph.
+
+        Snapshot is backed by NumPy arrays, so large read-only passes can avoid traversing nodes and hyper edges.
+        """
+        return FrozenHypergraph.from_hypergraph(self)
+
     def to_dict(self) -> dict:
         """Return a dictionary representation of the hypergraph."""
         return {
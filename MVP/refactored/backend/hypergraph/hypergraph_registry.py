@@ -0,0 +1,477 @@
+from __future__ import annotations
+
+from contextlib import contextmanager
+from typing import Iterator, TYPE_CHECKING
+
+from MVP.refactored.backend.hypergraph.canvas_hierarchy import CanvasHierarchy
+from MVP.refactored.backend.hypergraph.hypergraph import Hypergraph
+from MVP.refactored.backend.hypergraph.hyper_edge import HyperEdge
+from MVP.refactored.backend.hypergraph.node import Node
+from MVP.refactored.backend.hypergraph.structure_version import StructureVersion
+from MVP.refactored.backend.id_generator import IdGenerator
+from MVP.refactored.backend.tracing import Tracing, traced
+
+if TYPE_CHECKING:
+    from MVP.refactored.backend.code_generation.code_generation_cache import CodeGenerationCache
+    from MVP.refactored.backend.diagram_callback import Receiver
+
+
+@Tracing.instrumented
+class HypergraphRegistry:
+    """
+    Hypergraphs of one project together with their id allocator and lookup indexes.
+
+    Every registry has its own hypergraphs, id generator, structure version and code generation caches, so several
+    projects can be loaded, analyzed and code-generated at the same time, one registry per thread or process.
+    Registry itself is not thread-safe. Usually it is used through `HypergraphManager`, see `HypergraphManager.use`.
+
+    Registries in one process still share:
+    - box function configuration `MainDiagram.label_content` and `label_metadata`, it is not thread-safe to change
+      it while other threads generate or run code;
+    - analyzed box functions and compiled callables of `BoxFunctionRegistry`, they are keyed by label and source
+      code and guarded by its lock, so registries get the same instances for the same code;
+    - `BoxCallCache.session` and caches of worker processes of `BoxCallCache.get_process_cache`, guarded by their
+      locks;
+    - `Tracing`, enabling and disabling it replaces methods of instrumented classes for every thread, so it is not
+      thread-safe, while a tracer collects from all threads under its lock.
+    """
+
+    def __init__(self, id_generator: IdGenerator = None, structure_version: StructureVersion = None):
+        self.id_generator: IdGenerator = id_generator if id_generator is not None else IdGenerator()
+        # structure change counter of nodes, hyper edges and hypergraphs of the registry
+        self.structure_version: StructureVersion = \
+            structure_version if structure_version is not None else StructureVersion()
+        self.hypergraphs: set[Hypergraph] = set()
+        # lookup tables, they are kept in sync with hypergraphs by every method that adds, removes or modifies hypergraphs
+        self.node_id_to_hypergraph: dict[int, Hypergraph] = {}
+        self.hyper_edge_id_to_hypergraph: dict[int, Hypergraph] = {}
+        self.canvas_id_to_hypergraphs: dict[int, set[Hypergraph]] = {}
+        # deferred maintenance of an open batch, see `batch`
+        self.batch_depth: int = 0
+        # union-find of hypergraphs that must be combined, keyed by object identity like node group hyper edges
+        self.batch_merge_parent: dict[int, Hypergraph] = {}
+        self.batch_merged: list[Hypergraph] = []  # all hypergraphs in the union-find
+        self.batch_canvas_id: dict[int, int] = {}  # canvas id of combined hypergraph, kept at union-find root
+        self.batch_dirty: dict[int, Hypergraph] = {}  # hypergraphs that need split detection and source recomputation
+        self.canvas_hierarchy: CanvasHierarchy | None = None  # cached at structure version, see `get_canvas_hierarchy`
+        self.code_generation_caches: dict[int, CodeGenerationCache] = {}  # last generation of every canvas id
+
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """
+        Defer hypergraph maintenance until the end of the block.
+
+        Inside the batch nodes and hyper edges are connected and removed right away, so lookups by node and hyper
+        edge id keep working, but combining hypergraphs, split detection and recomputation of hypergraph sources and
+        targets are only recorded. When the outermost batch exits, recorded hypergraphs are combined once and every
+        touched hypergraph is split into connected components, which also recomputes its sources and targets.
+        Replaying a whole project in one batch costs O(N + E) instead of maintaining hypergraphs after every event.
+
+        NB! Hypergraph sources, targets and `get_graph_by_source_node_id` are not up to date inside the batch.
+        """
+        self.batch_depth += 1
+        try:
+            yield
+        finally:
+            self.batch_depth -= 1
+            if self.batch_depth == 0:
+                self._commit_batch()
+
+    def in_batch(self) -> bool:
+        return self.batch_depth > 0
+
+    @traced("remove_node")
+    def remove_node(self, node_id: int):
+        """
+        Removes a node from the hypergraph and handles the case where deleting the node causes the hypergraph to
+        split into multiple disconnected hypergraphs.
+
+        This function performs the following steps:
+        1. Removes the specified node from its hypergraph.
+        2. Labels connected components of the hypergraph in one traversal.
+        3. If the hypergraph splits, removes the original hypergraph and creates new hypergraphs for each disconnected component.
+
+        :param node_id: The unique identifier of the node to be removed.
+        """
+        hypergraph: Hypergraph = self.get_graph_by_node_id(node_id)
+        if hypergraph is None:
+            return
+        if self.in_batch():
+            hypergraph.remove_node(node_id)
+            self.node_id_to_hypergraph.pop(node_id, None)
+            self.batch_dirty[id(hypergraph)] = hypergraph
+            return
+        self._remove_from_lookup_tables(hypergraph)
+        hypergraph.remove_node(node_id)
+
+        self.split_hypergraph(hypergraph)
+
+    @traced("remove_hyper_edge")
+    def remove_hyper_edge(self, hyper_edge_id: int):
+        """
+        Removes a hyper edge from the hypergraph and handles the case where deleting the edge causes the hypergraph to
+        split into multiple disconnected hypergraphs.
+
+        This function performs the following steps:
+        1. Removes the specified hyper edge from its hypergraph.
+        2. Labels connected components of the hypergraph in one traversal.
+        3. If the hypergraph splits, removes the original hypergraph and creates new hypergraphs for each disconnected component.
+
+        :param hyper_edge_id: The unique identifier of the node to be removed.
+        """
+        hypergraph: Hypergraph = self.get_graph_by_hyper_edge_id(hyper_edge_id)
+        if hypergraph is None:
+            return  # TODO, investigate when it can be None
+        hypergraph.remove_hyper_edge(hyper_edge_id)  # remove hyper edge from hypergraph
+        self.hyper_edge_id_to_hypergraph.pop(hyper_edge_id, None)
+
+        if self.in_batch():
+            self.batch_dirty[id(hypergraph)] = hypergraph
+            return
+        self.split_hypergraph(hypergraph)
+
+    @traced("split_hypergraph")
+    def split_hypergraph(self, hypergraph: Hypergraph):
+        """
+        Replace the hypergraph with hypergraphs created from its connected components.
+
+        If the hypergraph is still connected, it is replaced with a hypergraph with the same id, but with updated
+        nodes, hyper edges and sources. If nothing is left, the hypergraph is removed.
+        """
+        components: list[Hypergraph] = hypergraph.split_into_connected_components()
+
+        if hypergraph in self.hypergraphs:
+            self.remove_hypergraph(hypergraph)
+        for component in components:
+            self.add_hypergraph(component)
+
+    @traced("swap_hyper_edge_id")
+    def swap_hyper_edge_id(self, prev_id: int, new_id: int):
+        """
+        Replaces a hyper-edge ID in the corresponding hypergraph.
+
+        :param prev_id: The current hyper-edge ID.
+        :param new_id: The new hyper-edge ID.
+        """
+        hypergraph: Hypergraph = self.get_graph_by_hyper_edge_id(prev_id)
+        if hypergraph is not None:  # TODO investigate when it is none
+            if hypergraph.swap_hyper_edge_id(prev_id, new_id):
+                self.hyper_edge_id_to_hypergraph.pop(prev_id, None)
+                self.hyper_edge_id_to_hypergraph[new_id] = hypergraph
+
+    @traced("create_new_node")
+    def create_new_node(self, node_id: int, canvas_id: int) -> Node:
+        """
+        Create new hypergraph when spider/diagram input/diagram output/wire is created.
+
+        :return: Created node
+        """
+        new_hypergraph: Hypergraph = Hypergraph(canvas_id=canvas_id, structure_version=self.structure_version)
+        new_node = Node(node_id)
+
+        new_hypergraph.add_hypergraph_source(new_node)
+        self.add_hypergraph(new_hypergraph)
+        return new_node
+
+    @traced("union_nodes")
+    def union_nodes(self, node: Node, unite_with_id: int):
+        unite_with = self.get_node_by_node_id(unite_with_id)
+        unite_with_hypergraph: Hypergraph = self.get_graph_by_node_id(
+            unite_with.id)  # always exits, because node is always forms a hypergraph
+        node_hypergraph: Hypergraph = self.get_graph_by_node_id(node.id)
+
+        node.union(unite_with)
+        if not node_hypergraph == unite_with_hypergraph:
+            self.combine_hypergraphs([node_hypergraph, unite_with_hypergraph], [node, unite_with])
+        else:
+            self._update_node_groups(node_hypergraph, [node])
+
+    @traced("connect_node_with_input_hyper_edge")
+    def connect_node_with_input_hyper_edge(self, node: Node, hyper_edge_id: int) -> HyperEdge:
+        """
+        After hypergraph creation is done, make connectivity of node, with node/hyper edge and
+        theirs hyper graphs.
+        In this case, to given node (first arg) input should be added node|hyper edge.
+
+        :return: HyperEdge that was added to the node
+        """
+        node_hypergraph: Hypergraph = self.get_graph_by_node_id(node.id)
+        connect_to_hypergraph: Hypergraph = self.get_graph_by_hyper_edge_id(hyper_edge_id)
+
+        if connect_to_hypergraph is None:
+            hyper_edge = HyperEdge(hyper_edge_id)
+        else:
+            hyper_edge = connect_to_hypergraph.get_hyper_edge_by_id(hyper_edge_id)
+        # box = hyper edge
+        hyper_edge.append_target_node(node)
+        node.append_input(hyper_edge)
+        if connect_to_hypergraph is None:  # It is an autonomous box
+            node_hypergraph.add_edge(hyper_edge)
+            self.hyper_edge_id_to_hypergraph[hyper_edge.id] = node_hypergraph
+            self._update_node_groups(node_hypergraph, [node])
+        elif not node_hypergraph == connect_to_hypergraph:
+            # if node's and hyper edge's hypergraph is the same, it means that new wire between spider and the box is added
+            # nothing to combine
+            # It is box that already have some connections => forms hypergraph
+            self.combine_hypergraphs([node_hypergraph, connect_to_hypergraph], [node])
+        else:
+            self._update_node_groups(node_hypergraph, [node])
+
+        return hyper_edge
+
+    @traced("connect_node_with_output_hyper_edge")
+    def connect_node_with_output_hyper_edge(self, node: Node, hyper_edge_id: int) -> HyperEdge:
+        """
+        After hypergraph creation is done, make connectivity of node, with node/hyper edge and
+        theirs hyper graphs.
+        In this case, to given node (first arg) output should be added node|hyper edge.
+
+        :return: HyperEdge that was added to the node
+        """
+        node_hypergraph: Hypergraph = self.get_graph_by_node_id(node.id)
+        connect_to_hypergraph: Hypergraph = self.get_graph_by_hyper_edge_id(hyper_edge_id)
+
+        if connect_to_hypergraph is None:
+            hyper_edge = HyperEdge(hyper_edge_id)
+        else:
+            hyper_edge = connect_to_hypergraph.get_hyper_edge_by_id(hyper_edge_id)
+        # box = hyper edge
+        hyper_edge.append_source_node(node)
+        node.append_output(hyper_edge)
+        # target node groups of the hyper edge get a parent, so they can stop being sources
+        connected_nodes = [node, *hyper_edge.get_target_nodes()]
+        if connect_to_hypergraph is None:  # It is an autonomous box
+            node_hypergraph.add_edge(hyper_edge)
+            self.hyper_edge_id_to_hypergraph[hyper_edge.id] = node_hypergraph
+        elif not node_hypergraph == connect_to_hypergraph:
+            # if node's and hyper edge's hypergraph is the same, it means that new wire between spider and the box is added
+            # nothing to combine
+            # It is box that already have some connections => forms hypergraph
+            self.combine_hypergraphs([node_hypergraph, connect_to_hypergraph], connected_nodes)
+        else:
+            self._update_node_groups(node_hypergraph, connected_nodes)
+
+        return hyper_edge
+
+    @traced("combine_hypergraphs")
+    def combine_hypergraphs(self, hypergraphs: list[Hypergraph], connected_nodes: list[Node] = None) -> Hypergraph:
+        """Combine two or more hypergraphs.
+
+        Smaller hypergraphs are merged into the largest one in place, so combining costs time proportional to
+        the size of the smaller hypergraphs. The largest hypergraph keeps its id.
+
+        Only node groups of `connected_nodes` (nodes that were connected to make the hypergraphs combine) can stop
+        being sources or targets. If they are not given, all sources and targets of the combined hypergraph are
+        checked.
+
+        Inside a batch hypergraphs are only recorded to be combined when the batch ends, and the first hypergraph
+        is returned.
+
+        NB!!!
+        When combining hypergraphs from different canvases, combined hypergraph will have canvas id from the first element!!!
+        """
+
+        if self.in_batch():
+            self._defer_combine(hypergraphs)
+            return hypergraphs[0]
+
+        combined_hypergraph = self._merge_into_largest(hypergraphs)
+
+        if connected_nodes is None:
+            combined_hypergraph.update_node_group_sources(combined_hypergraph.get_hypergraph_source())
+            combined_hypergraph.update_hypergraph_targets()
+        else:
+            combined_hypergraph.update_node_group_sources(connected_nodes)
+            combined_hypergraph.update_node_group_targets(connected_nodes)
+
+        self._set_canvas_id(combined_hypergraph, hypergraphs[0].get_canvas_id())
+        return combined_hypergraph
+
+    def _merge_into_largest(self, hypergraphs: list[Hypergraph]) -> Hypergraph:
+        """Merge hypergraphs into the largest one and point lookup tables to it. Sources and targets are not updated."""
+        combined_hypergraph: Hypergraph = max(hypergraphs, key=lambda x: len(x.nodes) + len(x.edges))
+        merged: set[Hypergraph] = {combined_hypergraph}
+        for hypergraph in hypergraphs:
+            if hypergraph in merged:
+                continue
+            merged.add(hypergraph)
+            self.remove_hypergraph(hypergraph)
+            combined_hypergraph.merge(hypergraph)
+            for node_id in hypergraph.nodes:
+                self.node_id_to_hypergraph[node_id] = combined_hypergraph
+            for hyper_edge_id in hypergraph.edges:
+                self.hyper_edge_id_to_hypergraph[hyper_edge_id] = combined_hypergraph
+        return combined_hypergraph
+
+    def _set_canvas_id(self, hypergraph: Hypergraph, canvas_id: int):
+        if hypergraph.get_canvas_id() != canvas_id:
+            self.canvas_id_to_hypergraphs.get(hypergraph.get_canvas_id(), set()).discard(hypergraph)
+            hypergraph.set_canvas_id(canvas_id)
+            self.canvas_id_to_hypergraphs.setdefault(canvas_id, set()).add(hypergraph)
+
+    def _update_node_groups(self, hypergraph: Hypergraph, nodes: list[Node]):
+        if self.in_batch():
+            self.batch_dirty[id(hypergraph)] = hypergraph
+        else:
+            hypergraph.update_node_group_sources(nodes)
+            hypergraph.update_node_group_targets(nodes)
+
+    def _find_batch_root(self, hypergraph: Hypergraph) -> Hypergraph:
+        parent = self.batch_merge_parent
+        root = hypergraph
+        while parent[id(root)] is not root:
+            root = parent[id(root)]
+        while parent[id(hypergraph)] is not root:
+            parent[id(hypergraph)], hypergraph = root, parent[id(hypergraph)]
+        return root
+
+    def _defer_combine(self, hypergraphs: list[Hypergraph]):
+        """Record that hypergraphs must be combined, canvas id of the first hypergraph's group is kept."""
+        parent = self.batch_merge_parent
+        for hypergraph in hypergraphs:
+            if id(hypergraph) not in parent:
+                parent[id(hypergraph)] = hypergraph
+                self.batch_merged.append(hypergraph)
+                self.batch_canvas_id[id(hypergraph)] = hypergraph.get_canvas_id()
+        root = self._find_batch_root(hypergraphs[0])
+        for hypergraph in hypergraphs[1:]:
+            other_root = self._find_batch_root(hypergraph)
+            if other_root is not root:
+                parent[id(other_root)] = root
+
+    @traced("commit_batch")
+    def _commit_batch(self):
+        """Combine hypergraphs recorded in the batch, then split and recompute sources of all touched hypergraphs."""
+        groups: dict[int, list[Hypergraph]] = {}
+        for hypergraph in self.batch_merged:
+            root = self._find_batch_root(hypergraph)
+            groups.setdefault(id(root), []).append(hypergraph)
+
+        touched: list[Hypergraph] = [hypergraph for hypergraph in self.batch_dirty.values()
+                                     if id(hypergraph) not in self.batch_merge_parent]
+        for root_key, group in groups.items():
+            group = [hypergraph for hypergraph in group if self._is_registered(hypergraph)]
+            if not group:
+                continue
+            combined_hypergraph = self._merge_into_largest(group)
+            self._set_canvas_id(combined_hypergraph, self.batch_canvas_id[root_key])
+            touched.append(combined_hypergraph)
+
+        self.batch_merge_parent.clear()
+        self.batch_merged.clear()
+        self.batch_canvas_id.clear()
+        self.batch_dirty.clear()
+
+        for hypergraph in touched:
+            if self._is_registered(hypergraph):
+                self.split_hypergraph(hypergraph)
+
+    def get_node_by_node_id(self, node_id: int):
+        hypergraph = self.get_graph_by_node_id(node_id)
+        if hypergraph is not None:
+            return hypergraph.get_node_by_id(node_id)
+        return None
+
+    def get_hyper_edge_by_id(self, hyper_edge_id: int) -> HyperEdge | None:
+        graph = self.get_graph_by_hyper_edge_id(hyper_edge_id)
+        if graph is not None:
+            return graph.get_hyper_edge_by_id(hyper_edge_id)
+        return None
+
+    def get_graph_by_node_id(self, node_id: int) -> Hypergraph | None:
+        hypergraph = self.node_id_to_hypergraph.get(node_id)
+        if self._is_registered(hypergraph) and node_id in hypergraph.nodes:
+            return hypergraph
+        return None
+
+    def get_graph_by_hyper_edge_id(self, hyper_edge_id: int) -> Hypergraph | None:
+        hypergraph = self.hyper_edge_id_to_hypergraph.get(hyper_edge_id)
+        if self._is_registered(hypergraph) and hyper_edge_id in hypergraph.edges:
+            return hypergraph
+        return None
+
+    def get_graph_by_source_node_id(self, source_node_id: int) -> Hypergraph | None:
+        hypergraph = self.get_graph_by_node_id(source_node_id)
+        if hypergraph is None:
+            return None
+        node = hypergraph.get_node_by_id(source_node_id)
+        for node_from_group in [node] + node.get_united_with_nodes():
+            if node_from_group.id in hypergraph.hypergraph_source:
+                return hypergraph
+        return None
+
+    def is_connected(self, node_id: int, other_node_id: int) -> bool:
+        """Return True if nodes are in the same hypergraph and connected by hyper edges or a node group."""
+        hypergraph = self.get_graph_by_node_id(node_id)
+        if hypergraph is None or hypergraph is not self.get_graph_by_node_id(other_node_id):
+            return False
+        return hypergraph.get_reachability_index().is_connected(node_id, other_node_id)
+
+    def get_feeding_hyper_edge_ids(self, node_id: int) -> list[int]:
+        """Return ids of hyper edges (boxes) whose results flow into the node, e.g. to highlight them."""
+        hypergraph = self.get_graph_by_node_id(node_id)
+        if hypergraph is None:
+            return []
+        return hypergraph.get_reachability_index().get_feeding_hyper_edge_ids(node_id)
+
+    def get_graphs_by_canvas_id(self, canvas_id: int) -> list[Hypergraph]:
+        return [graph for graph in self.canvas_id_to_hypergraphs.get(canvas_id, ())
+                if self._is_registered(graph) and graph.get_canvas_id() == canvas_id]
+
+    def get_canvas_hierarchy(self, receiver: Receiver = None) -> CanvasHierarchy:
+        """
+        Return flattened view of the canvas tree of all hypergraphs, see `CanvasHierarchy`.
+
+        Hierarchy is cached until any hypergraph structure of the registry changes or another receiver is given.
+        """
+        hierarchy = self.canvas_hierarchy
+        if (hierarchy is None or hierarchy.version != self.structure_version.version
+                or hierarchy.receiver is not receiver):
+            hierarchy = self.canvas_hierarchy = CanvasHierarchy(self.hypergraphs, receiver, self.structure_version)
+        return hierarchy
+
+    @traced("add_hypergraph")
+    def add_hypergraph(self, hypergraph: Hypergraph):
+        self.hypergraphs.add(hypergraph)
+        self.structure_version.bump()  # hypergraphs inside compound hyper edges are looked up by canvas id
+        self._add_to_lookup_tables(hypergraph)
+        self.canvas_id_to_hypergraphs.setdefault(hypergraph.get_canvas_id(), set()).add(hypergraph)
+
+    @traced("remove_hypergraph")
+    def remove_hypergraph(self, hypergraph: Hypergraph):
+        self.hypergraphs.remove(hypergraph)
+        self.structure_version.bump()
+        self._remove_from_lookup_tables(hypergraph)
+        self.canvas_id_to_hypergraphs.get(hypergraph.get_canvas_id(), set()).discard(hypergraph)
+
+    def clear(self):
+        """Remove all hypergraphs and lookup table entries."""
+        self.hypergraphs.clear()
+        self.node_id_to_hypergraph.clear()
+        self.hyper_edge_id_to_hypergraph.clear()
+        self.canvas_id_to_hypergraphs.clear()
+        self.batch_merge_parent.clear()
+        self.batch_merged.clear()
+        self.batch_canvas_id.clear()
+        self.batch_dirty.clear()
+        self.canvas_hierarchy = None
+        self.code_generation_caches.clear()
+
+    def _is_registered(self, hypergraph: Hypergraph | None) -> bool:
+        return hypergraph is not None and hypergraph in self.hypergraphs
+
+    def _add_to_lookup_tables(self, hypergraph: Hypergraph):
+        """Point all nodes and hyper edges of the hypergraph to it in the lookup tables."""
+        for node_id in hypergraph.nodes:
+            self.node_id_to_hypergraph[node_id] = hypergraph
+        for hyper_edge_id in hypergraph.edges:
+            self.hyper_edge_id_to_hypergraph[hyper_edge_id] = hypergraph
+
+    def _remove_from_lookup_tables(self, hypergraph: Hypergraph):
+        """Remove lookup table entries of the hypergraph, entries that already point to other hypergraph are kept."""
+        for node_id in hypergraph.nodes:
+            if self.node_id_to_hypergraph.get(node_id) is hypergraph:
+                del self.node_id_to_hypergraph[node_id]
+        for hyper_edge_id in hypergraph.edges:
+            if self.hyper_edge_id_to_hypergraph.get(hyper_edge_id) is hypergraph:
+                del self.hyper_edge_id_to_hypergraph[hyper_edge_id]
@@ -0,0 +1,325 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import mmap
+import struct
+from typing import Any, Iterable
+
+import numpy as np
+
+from MVP.refactored.backend.hypergraph.hyper_edge import HyperEdge
+from MVP.refactored.backend.hypergraph.hypergraph import Hypergraph
+from MVP.refactored.backend.hypergraph.hypergraph_manager import HypergraphManager
+from MVP.refactored.backend.hypergraph.hypergraph_registry import HypergraphRegistry
+from MVP.refactored.backend.hypergraph.node import Node
+
+MAGIC = b"IVHGSNAP"
+FORMAT_VERSION = 1
+_HEADER = struct.Struct("<8sII")  # magic, format version, section count
+_SECTION = struct.Struct("<32s8sQQ")  # name, dtype or "json", offset, byte length
+_JSON = "json"
+_DIGEST_SIZE = 16
+
+# node flags
+SPECIAL = 1
+COMPOUND = 2
+SOURCE = 4
+MEMBER = 8  # node is in `Hypergraph.nodes`, not only referenced by its hyper edges or node group
+
+
+def _pack_values(values: list) -> np.ndarray | list:
+    """Pack ids into int64 array if all of them are integers, otherwise keep them for the JSON section."""
+    if all(type(value) is int and -2 ** 63 <= value < 2 ** 63 for value in values):
+        return np.array(values, dtype="<i8")
+    return values
+
+
+def _item(values: np.ndarray | list, index: int) -> Any:
+    value = values[index]
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def _to_csr(rows: list[list[int]]) -> tuple[np.ndarray, np.ndarray]:
+    pointers = np.zeros(len(rows) + 1, dtype="<i4")
+    np.cumsum([len(row) for row in rows], out=pointers[1:])
+    return pointers, np.fromiter((item for row in rows for item in row), dtype="<i4", count=int(pointers[-1]))
+
+
+class HypergraphSnapshot:
+    """
+    Compact binary snapshot of hypergraphs.
+
+    File starts with a header (magic, format version, section count) and a directory of sections. Every section is
+    a little-endian array aligned to 8 bytes, so it is read with `numpy.frombuffer` without copying, also from a
+    memory-mapped file. Ids, canvas ids and labels that are not integers are stored in JSON sections.
+
+    Nodes and hyper edges of all hypergraphs are numbered, hypergraph `h` owns nodes up to `hypergraph_bounds[2h]`
+    and hyper edges up to `hypergraph_bounds[2h + 1]`. Connections are CSR arrays of these numbers: node
+    inputs/outputs, direct connections of node groups and hyper edge ports, where free ports are -1.
+
+    Snapshot also stores a digest of every hypergraph, so changed hypergraphs are found without restoring them.
+    """
+
+    def __init__(self, sections: dict[str, Any], buffer=None):
+        self.sections = sections
+        self.buffer = buffer  # keeps memory-mapped file open while arrays use it
+
+    def __getitem__(self, name: str) -> Any:
+        return self.sections[name]
+
+    @property
+    def hypergraph_count(self) -> int:
+        return len(self.sections["hypergraph_bounds"]) // 2
+
+    @staticmethod
+    def from_hypergraphs(hypergraphs: Iterable[Hypergraph]) -> HypergraphSnapshot:
+        hypergraphs = list(hypergraphs)
+        node_index: dict[int, int] = {}  # keyed by object identity, so nodes with equal ids are not mixed up
+        nodes: list[Node] = []
+        node_flags: list[int] = []
+        hyper_edge_index: dict[int, int] = {}
+        hyper_edges: list[HyperEdge] = []
+        hyper_edge_flags: list[int] = []
+        bounds: list[int] = []
+
+        def add_node(node: Node, flags: int):
+            if id(node) not in node_index:
+                node_index[id(node)] = len(nodes)
+                nodes.append(node)
+                node_flags.append(flags)
+
+        def add_hyper_edge(hyper_edge: HyperEdge, flags: int):
+            if id(hyper_edge) not in hyper_edge_index:
+                hyper_edge_index[id(hyper_edge)] = len(hyper_edges)
+                hyper_edges.append(hyper_edge)
+                hyper_edge_flags.append(flags)
+
+        for hypergraph in hypergraphs:
+            first_node, first_hyper_edge = len(nodes), len(hyper_edges)
+            for node in hypergraph.nodes.values():
+                add_node(node, MEMBER | (SOURCE if node.id in hypergraph.hypergraph_source else 0))
+            for hyper_edge in hypergraph.edges.values():
+                add_hyper_edge(hyper_edge, MEMBER)
+            # nodes and hyper edges that are only referenced are kept next to the hypergraph that references them
+            node_position, hyper_edge_position = first_node, first_hyper_edge
+            while node_position < len(nodes) or hyper_edge_position < len(hyper_edges):
+                if node_position < len(nodes):
+                    node = nodes[node_position]
+                    for hyper_edge in node.inputs + node.outputs:
+                        add_hyper_edge(hyper_edge, 0)
+                    for connected_node in node.directly_connected_to:
+                        add_node(connected_node, 0)
+                    node_position += 1
+                else:
+                    hyper_edge = hyper_edges[hyper_edge_position]
+                    for node in hyper_edge.get_source_nodes() + hyper_edge.get_target_nodes():
+                        add_node(node, 0)
+                    hyper_edge_position += 1
+            bounds += [len(nodes), len(hyper_edges)]
+
+        for index, node in enumerate(nodes):
+            node_flags[index] |= (SPECIAL if node.is_special else 0) | (COMPOUND if node.is_compound else 0)
+
+        def ports(port_map) -> list[int]:
+            return [-1 if node is None else node_index[id(node)] for node in port_map.nodes]
+
+        sections: dict[str, Any] = {
+            "hypergraph_ids": _pack_values([hypergraph.id for hypergraph in hypergraphs]),
+            "hypergraph_canvas": _pack_values([hypergraph.canvas_id for hypergraph in hypergraphs]),
+            "hypergraph_bounds": np.array(bounds, dtype="<i4"),
+            "node_ids": _pack_values([node.id for node in nodes]),
+            "node_flags": np.array(node_flags, dtype="|u1"),
+            "edge_ids": _pack_values([hyper_edge.id for hyper_edge in hyper_edges]),
+            "edge_flags": np.array(hyper_edge_flags, dtype="|u1"),
+            "edge_sub_canvas": _pack_values([hyper_edge.sub_diagram_canvas_id for hyper_edge in hyper_edges]),
+            "edge_labels": [hyper_edge.box_label for hyper_edge in hyper_edges],
+        }
+        for name, rows in (
+                ("node_inputs", [[hyper_edge_index[id(hyper_edge)] for hyper_edge in node.inputs] for node in nodes]),
+                ("node_outputs", [[hyper_edge_index[id(hyper_edge)] for hyper_edge in node.outputs] for node in nodes]),
+                ("node_links", [[node_index[id(other)] for other in node.directly_connected_to] for node in nodes]),
+                ("edge_sources", [ports(hyper_edge.source_nodes) for hyper_edge in hyper_edges]),
+                ("edge_targets", [ports(hyper_edge.target_nodes) for hyper_edge in hyper_edges])):
+            sections[name + "_ptr"], sections[name] = _to_csr(rows)
+
+        snapshot = HypergraphSnapshot(sections)
+        sections["hypergraph_digests"] = np.frombuffer(
+            b"".join(snapshot._digest(index) for index in range(len(hypergraphs))), dtype="|u1")
+        return snapshot
+
+    def _get_ranges(self, index: int) -> tuple[int, int, int, int]:
+        bounds = self.sections["hypergraph_bounds"]
+        first_node, first_hyper_edge = (0, 0) if index == 0 else (int(bounds[2 * index - 2]),
+                                                                  int(bounds[2 * index - 1]))
+        return first_node, int(bounds[2 * index]), first_hyper_edge, int(bounds[2 * index + 1])
+
+    def _digest(self, index: int) -> bytes:
+        """Digest of the hypergraph content, numbers of nodes and hyper edges are made relative to the hypergraph."""
+        first_node, last_node, first_hyper_edge, last_hyper_edge = self._get_ranges(index)
+        digest = hashlib.blake2b(digest_size=_DIGEST_SIZE)
+
+        def update(value: Any):
+            if isinstance(value, np.ndarray):
+                digest.update(np.ascontiguousarray(value).tobytes())
+            else:
+                digest.update(json.dumps(value).encode())
+
+        update([_item(self["hypergraph_ids"], index), _item(self["hypergraph_canvas"], index)])
+        for name in ("node_ids", "node_flags"):
+            update(self[name][first_node:last_node])
+        for name in ("edge_ids", "edge_flags", "edge_sub_canvas", "edge_labels"):
+            update(self[name][first_hyper_edge:last_hyper_edge])
+        for name, first, last, offset in (("node_inputs", first_node, last_node, first_hyper_edge),
+                                          ("node_outputs", first_node, last_node, first_hyper_edge),
+                                          ("node_links", first_node, last_node, first_node),
+                                          ("edge_sources", first_hyper_edge, last_hyper_edge, first_node),
+                                          ("edge_targets", first_hyper_edge, last_hyper_edge, first_node)):
+            pointers = self[name + "_ptr"]
+            values = self[name][pointers[first]:pointers[last]]
+            update(pointers[first:last + 1] - pointers[first])
+            update(np.where(values >= 0, values - offset, values))
+        return digest.digest()
+
+    def get_digests(self) -> dict:
+        """Return digest of every hypergraph by hypergraph id."""
+        digests = self.sections["hypergraph_digests"]
+        return {hypergraph_id: bytes(digests[index * _DIGEST_SIZE:(index + 1) * _DIGEST_SIZE])
+                for index, hypergraph_id in enumerate(self._to_list(self["hypergraph_ids"]))}
+
+    def diff(self, other: HypergraphSnapshot) -> dict[str, list]:
+        """Return ids of hypergraphs that were added, removed or changed in the other snapshot."""
+        digests, other_digests = self.get_digests(), other.get_digests()
+        return {
+            "added": [hypergraph_id for hypergraph_id in other_digests if hypergraph_id not in digests],
+            "removed": [hypergraph_id for hypergraph_id in digests if hypergraph_id not in other_digests],
+            "changed": [hypergraph_id for hypergraph_id, digest in other_digests.items()
+                        if hypergraph_id in digests and digests[hypergraph_id] != digest],
+        }
+
+    def to_bytes(self) -> bytes:
+        encoded: list[tuple[str, str, bytes]] = []
+        for name, value in self.sections.items():
+            if isinstance(value, np.ndarray):
+                encoded.append((name, value.dtype.str, np.ascontiguousarray(value).tobytes()))
+            else:
+                encoded.append((name, _JSON, json.dumps(value).encode()))
+
+        offset = _HEADER.size + _SECTION.size * len(encoded)
+        directory = [_HEADER.pack(MAGIC, FORMAT_VERSION, len(encoded))]
+        data: list[bytes] = []
+        for name, dtype, content in encoded:
+            padding = -offset % 8
+            data.append(b"\0" * padding + content)
+            offset += padding
+            directory.append(_SECTION.pack(name.encode(), dtype.encode(), offset, len(content)))
+            offset += len(content)
+        return b"".join(directory + data)
+
+    def write(self, path: str):
+        with open(path, "wb") as file:
+            file.write(self.to_bytes())
+
+    @staticmethod
+    def from_buffer(buffer) -> HypergraphSnapshot:
+        """
+        Read snapshot from bytes or other buffer, arrays are views of the buffer.
+
+        :raises ValueError: if the buffer is not a snapshot of supported format version.
+        """
+        magic, version, section_count = _HEADER.unpack_from(buffer, 0)
+        if magic != MAGIC:
+            raise ValueError("Buffer is not a hypergraph snapshot.")
+        if version != FORMAT_VERSION:
+            raise ValueError(f"Unsupported hypergraph snapshot format version {version}.")
+        sections: dict[str, Any] = {}
+        for index in range(section_count):
+            name, dtype, offset, length = _SECTION.unpack_from(buffer, _HEADER.size + index * _SECTION.size)
+            name, dtype = name.rstrip(b"\0").decode(), dtype.rstrip(b"\0").decode()
+            if dtype == _JSON:
+                sections[name] = json.loads(bytes(buffer[offset:offset + length]).decode())
+            else:
+                dtype = np.dtype(dtype)
+                sections[name] = np.frombuffer(buffer, dtype=dtype, count=length // dtype.itemsize, offset=offset)
+        return HypergraphSnapshot(sections, buffer)
+
+    @staticmethod
+    def read(path: str) -> HypergraphSnapshot:
+        """Read memory-mapped snapshot file, arrays are loaded lazily by the operating system."""
+        with open(path, "rb") as file:
+            buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        return HypergraphSnapshot.from_buffer(buffer)
+
+    @staticmethod
+    def _to_list(values: np.ndarray | list) -> list:
+        return values.tolist() if isinstance(values, np.ndarray) else list(values)
+
+    def restore(self, registry: HypergraphRegistry = None) -> list[Hypergraph]:
+        """
+        Create hypergraphs of the snapshot and add them to the registry, by default to the active one.
+
+        Id generator of the registry is moved past the restored integer ids, so new ids do not collide with them.
+        """
+        if registry is None:
+            registry = HypergraphManager.get_registry()
+        with HypergraphManager.use(registry):  # restored nodes and hyper edges bump the structure version of registry
+            return self._restore(registry)
+
+    def _restore(self, registry: HypergraphRegistry) -> list[Hypergraph]:
+        node_ids = self._to_list(self["node_ids"])
+        node_flags = self["node_flags"].tolist()
+        edge_ids = self._to_list(self["edge_ids"])
+
+        nodes = [Node(node_id, is_special=bool(flags & SPECIAL)) for node_id, flags in zip(node_ids, node_flags)]
+        hyper_edges = [HyperEdge(hyper_edge_id) for hyper_edge_id in edge_ids]
+        for hyper_edge, label, sub_diagram_canvas_id in zip(hyper_edges, self["edge_labels"],
+                                                             self._to_list(self["edge_sub_canvas"])):
+            hyper_edge.box_label = label
+            hyper_edge.sub_diagram_canvas_id = sub_diagram_canvas_id
+
+        def rows(name: str) -> Iterable[list[int]]:
+            pointers = self[name + "_ptr"].tolist()
+            values = self[name].tolist()
+            return (values[pointers[index]:pointers[index + 1]] for index in range(len(pointers) - 1))
+
+        for hyper_edge, sources, targets in zip(hyper_edges, rows("edge_sources"), rows("edge_targets")):
+            hyper_edge.source_nodes = {port: nodes[node] for port, node in enumerate(sources) if node >= 0}
+            hyper_edge.target_nodes = {port: nodes[node] for port, node in enumerate(targets) if node >= 0}
+        for node, flags, inputs, outputs in zip(nodes, node_flags, rows("node_inputs"), rows("node_outputs")):
+            node.is_compound = bool(flags & COMPOUND)
+            node.set_inputs([hyper_edges[hyper_edge] for hyper_edge in inputs])
+            node.set_outputs([hyper_edges[hyper_edge] for hyper_edge in outputs])
+        linked: set[tuple[int, int]] = set()
+        for index, links in enumerate(rows("node_links")):
+            for other in links:
+                if (other, index) not in linked:
+                    linked.add((index, other))
+                    nodes[index].union(nodes[other])
+
+        hypergraphs: list[Hypergraph] = []
+        first_node, first_hyper_edge = 0, 0
+        bounds = self["hypergraph_bounds"].tolist()
+        canvas_ids = self._to_list(self["hypergraph_canvas"])
+        for index, hypergraph_id in enumerate(self._to_list(self["hypergraph_ids"])):
+            last_node, last_hyper_edge = bounds[2 * index], bounds[2 * index + 1]
+            hypergraph = Hypergraph(hypergraph_id=hypergraph_id, canvas_id=canvas_ids[index],
+                                    structure_version=registry.structure_version)
+            for node, flags in zip(nodes[first_node:last_node], node_flags[first_node:last_node]):
+                if flags & MEMBER:
+                    hypergraph.nodes[node.id] = node
+                if flags & SOURCE:
+                    hypergraph.hypergraph_source[node.id] = node
+            for hyper_edge, flags in zip(hyper_edges[first_hyper_edge:last_hyper_edge],
+                                         self["edge_flags"][first_hyper_edge:last_hyper_edge].tolist()):
+                if flags & MEMBER:
+                    hypergraph.edges[hyper_edge.id] = hyper_edge
+            hypergraph.update_hypergraph_targets()
+            registry.add_hypergraph(hypergraph)
+            hypergraphs.append(hypergraph)
+            first_node, first_hyper_edge = last_node, last_hyper_edge
+
+        integer_ids = [value for value in node_ids + edge_ids + self._to_list(self["hypergraph_ids"])
+                       if type(value) is int]
+        if integer_ids:
+            registry.id_generator.reserve(max(integer_ids))
+        return hypergraphs
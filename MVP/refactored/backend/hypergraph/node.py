@@ -1,202 +1,376 @@
 from __future__ import annotations
 
+from itertools import chain
 from queue import Queue
-from typing import Self
+from typing import Iterable, Iterator, Self
 from typing import TYPE_CHECKING
 
+from MVP.refactored.backend.hypergraph.structure_version import StructureVersion
 from MVP.refactored.backend.id_generator import IdGenerator
 
 if TYPE_CHECKING:
     from MVP.refactored.backend.hypergraph.hyper_edge import HyperEdge
+    from MVP.refactored.backend.hypergraph.hypergraph import Hypergraph
+
+
+class HyperEdgeCounter:
+    """
+    Multiset of hyper edges attached to the members of a node group.
+
+    Hyper edges are keyed by object identity, because their ids can be swapped while they are attached to nodes.
+    Most hyper edges are attached to a single member, so only counts greater than one are stored.
+    """
+    __slots__ = ("hyper_edges", "extra_counts")
+
+    def __init__(self, hyper_edges: list[HyperEdge] = None):
+        self.hyper_edges: dict[int, HyperEdge] = {}
+        self.extra_counts: dict[int, int] | None = None  # key -> count, only for counts greater than one
+        for hyper_edge in hyper_edges or []:
+            self.add(hyper_edge)
+
+    def get_count(self, hyper_edge: HyperEdge) -> int:
+        key = id(hyper_edge)
+        if key not in self.hyper_edges:
+            return 0
+        return self.extra_counts.get(key, 1) if self.extra_counts else 1
+
+    def add(self, hyper_edge: HyperEdge, count: int = 1):
+        key = id(hyper_edge)
+        if key in self.hyper_edges:
+            count += self.get_count(hyper_edge)
+        else:
+            self.hyper_edges[key] = hyper_edge
+        if count > 1:
+            if self.extra_counts is None:
+                self.extra_counts = {}
+            self.extra_counts[key] = count
+
+    def discard(self, hyper_edge: HyperEdge):
+        key = id(hyper_edge)
+        count = self.get_count(hyper_edge)
+        if count == 0:
+            return
+        if count == 1:
+            del self.hyper_edges[key]
+        elif count == 2:
+            del self.extra_counts[key]
+        else:
+            self.extra_counts[key] = count - 1
+
+    def update(self, other: HyperEdgeCounter):
+        for hyper_edge in other.hyper_edges.values():
+            self.add(hyper_edge, other.get_count(hyper_edge))
+
+    def get_hyper_edges(self) -> list[HyperEdge]:
+        return list(self.hyper_edges.values())
+
+
+class NodeGroup:
+    """
+    Union-find record of a node group.
+
+    Only the representative (root) node of a group owns a NodeGroup. It keeps all group members and the hyper edges
+    attached to them, so group queries are answered without traversing `directly_connected_to`. Node gets its record
+    on the first union, queries about a group of one node are answered from the node itself.
+    """
+    __slots__ = ("members", "inputs", "outputs", "group_hash")
+
+    def __init__(self, node: Node):
+        self.members: dict[int, Node] = {node.id: node}
+        self.inputs = HyperEdgeCounter(node.inputs)
+        self.outputs = HyperEdgeCounter(node.outputs)
+        self.group_hash: int | None = None
+
+    def merge(self, other: NodeGroup):
+        self.members.update(other.members)
+        self.inputs.update(other.inputs)
+        self.outputs.update(other.outputs)
+        self.group_hash = None
+
+    def get_group_hash(self) -> int:
+        if self.group_hash is None:
+            self.group_hash = hash(tuple(sorted(self.members.keys())))
+        return self.group_hash
 
 
 class Node:
+    """
+    Node (vertex) of a hypergraph.
+
+    Changes of hyper edges and node groups bump the active `StructureVersion`, so nodes must be changed while their
+    registry is active. Adjacency views are cached by `Hypergraph`, so a node keeps only its own connections.
+    """
+    __slots__ = ("id", "_inputs", "_outputs", "is_special", "is_compound", "_directly_connected_to", "_parent",
+                 "_group")
+
     def __init__(self, node_id: int = None, is_special=False):
         if node_id is None:
             node_id = IdGenerator.id()
         self.id = node_id
-        self.inputs: list[HyperEdge] = []
-        self.outputs: list[HyperEdge] = []
+        self._inputs: list[HyperEdge] = []
+        self._outputs: list[HyperEdge] = []
         self.is_special = is_special  # if it diagram input/output
         self.is_compound = False  # if it is several nodes, for example, input/output and wire => two nodes in one, spider and wire.
-        self.directly_connected_to: list[Node] = []
+        self._directly_connected_to: list[Node] = []
         # Should be modified that we can determine how each node connected to another
 
+        # union-find index of node groups, maintained by union and remove_self
+        self._parent: Node = self
+        self._group: NodeGroup | None = None  # record of the root node, created on the first union
+
+    @property
+    def inputs(self) -> list[HyperEdge]:
+        return self._inputs
+
+    @inputs.setter
+    def inputs(self, inputs: list[HyperEdge]):
+        self.set_inputs(inputs)
+
+    @property
+    def outputs(self) -> list[HyperEdge]:
+        return self._outputs
+
+    @outputs.setter
+    def outputs(self, outputs: list[HyperEdge]):
+        self.set_outputs(outputs)
+
+    @property
+    def directly_connected_to(self) -> list[Node]:
+        return self._directly_connected_to
+
+    @directly_connected_to.setter
+    def directly_connected_to(self, nodes: list[Node]):
+        affected: dict[int, Node] = {node.id: node for node in self.get_group_members()}
+        for node in nodes:
+            affected.update((member.id, member) for member in node.get_group_members())
+        self._directly_connected_to = list(nodes)
+        Node.regroup(list(affected.values()))
+
+    def find_group_root(self) -> Node:
+        """Return the representative node of the node group, compressing the path on the way."""
+        root = self
+        while root._parent is not root:
+            root = root._parent
+        node = self
+        while node._parent is not root:
+            node._parent, node = root, node._parent
+        return root
+
+    def get_group(self) -> NodeGroup:
+        """Return the record of the node group, node without united nodes gets its record on the first call."""
+        root = self.find_group_root()
+        if root._group is None:
+            root._group = NodeGroup(root)
+        return root._group
+
+    def get_group_members(self) -> Iterable[Node]:
+        """Return all nodes of the node group, including this node."""
+        group = self.find_group_root()._group
+        return group.members.values() if group is not None else (self,)
+
+    @staticmethod
+    def link(node: Node, other: Node):
+        """Merge node groups of two nodes, attaching the smaller group to the larger one."""
+        root = node.find_group_root()
+        other_root = other.find_group_root()
+        if root is other_root:
+            return
+        if len(root.get_group().members) < len(other_root.get_group().members):
+            root, other_root = other_root, root
+        root._group.merge(other_root._group)
+        other_root._group = None
+        other_root._parent = root
+        StructureVersion.get_active().bump()
+
+    @staticmethod
+    def regroup(nodes: list[Node]):
+        """
+        Rebuild node groups of the given nodes from their `directly_connected_to` lists.
+
+        Union-find can not split groups, so it is used when connection between nodes is removed.
+        Given nodes must contain all members of the groups they belong to.
+        """
+        for node in nodes:
+            node._parent = node
+            node._group = None
+        for node in nodes:
+            for directly_connected_to in node._directly_connected_to:
+                Node.link(node, directly_connected_to)
+        StructureVersion.get_active().bump()
+
     def get_directly_connected_to(self) -> list[Node]:
         return self.directly_connected_to
 
     def get_hypergraph_source_nodes(self) -> list[Self]:
-        visited: set[int] = set()
-        source_nodes: list[Node] = list()
-        queue: Queue[Node] = Queue()
-        visited.add(self.id)
-        if len(self.get_input_hyper_edges()) == 0:
-            source_nodes.append(self)
-        for hyper_edge in self.get_input_hyper_edges() + self.get_output_hyper_edges():
-            for node in hyper_edge.get_source_nodes() + hyper_edge.get_target_nodes():
-                queue.put(node)
-        while not queue.empty():
-            node: Node = queue.get()
-            visited.add(node.id)
-            if len(node.get_input_hyper_edges()) == 0:
-                source_nodes.append(node)
-            else:
-                for hyper_edge in self.get_input_hyper_edges() + self.get_output_hyper_edges():
-                    for hyper_edge_node in hyper_edge.get_source_nodes() + hyper_edge.get_target_nodes():
-                        if hyper_edge_node.id not in visited:
-                            queue.put(hyper_edge_node)
-        return list(source_nodes)
+        """Return nodes connected to this node, whose node groups have no input hyper edges."""
+        hypergraph = self._get_indexed_hypergraph()
+        if hypergraph is not None:
+            return hypergraph.get_nodes_by_ids(
+                hypergraph.get_reachability_index().get_connected_source_node_ids(self.id))
+        return [node for node in self._get_connected_nodes() if len(node.get_input_hyper_edges()) == 0]
 
     def get_hypergraph_target_nodes(self) -> list[Self]:
-        visited: set[int] = set()
-        target_nodes: list[Node] = list()
+        """Return nodes connected to this node, whose node groups have no output hyper edges."""
+        hypergraph = self._get_indexed_hypergraph()
+        if hypergraph is not None:
+            return hypergraph.get_nodes_by_ids(
+                hypergraph.get_reachability_index().get_connected_target_node_ids(self.id))
+        return [node for node in self._get_connected_nodes() if not node.has_output_hyper_edges()]
+
+    def _get_indexed_hypergraph(self) -> Hypergraph | None:
+        """
+        Return the registered hypergraph of the node, if its reachability index answers queries about the node.
+
+        Registered hypergraphs are connected components, except during a batch, when combining is deferred.
+        """
+        from MVP.refactored.backend.hypergraph.hypergraph_manager import HypergraphManager
+
+        registry = HypergraphManager.get_registry()
+        if registry.in_batch():
+            return None
+        hypergraph = registry.get_graph_by_node_id(self.id)
+        if hypergraph is None or hypergraph.nodes.get(self.id) is not self:
+            return None
+        return hypergraph
+
+    def _get_connected_nodes(self) -> Iterator[Self]:
+        """Yield nodes connected to this node by hyper edges in any direction or by node groups, breadth first."""
+        visited: set[int] = {self.id}
         queue: Queue[Node] = Queue()
-        visited.add(self.id)
-        if len(self.get_output_hyper_edges()) == 0:
-            target_nodes.append(self)
-        for hyper_edge in self.get_input_hyper_edges() + self.get_output_hyper_edges():
-            for node in hyper_edge.get_source_nodes() + hyper_edge.get_target_nodes():
-                queue.put(node)
+        queue.put(self)
         while not queue.empty():
             node: Node = queue.get()
-            visited.add(node.id)
-            if len(node.get_output_hyper_edges()) == 0:
-                target_nodes.append(node)
-            else:
-                for hyper_edge in self.get_input_hyper_edges() + self.get_output_hyper_edges():
-                    for hyper_edge_node in hyper_edge.get_source_nodes() + hyper_edge.get_target_nodes():
-                        if hyper_edge_node.id not in visited:
-                            queue.put(hyper_edge_node)
-        return target_nodes
+            yield node
+            connected_nodes = chain(node.get_group_members(),
+                                    *(hyper_edge.get_source_nodes() + hyper_edge.get_target_nodes()
+                                      for hyper_edge in node.get_input_hyper_edges() + node.get_output_hyper_edges()))
+            for connected_node in connected_nodes:
+                if connected_node.id not in visited:
+                    visited.add(connected_node.id)
+                    queue.put(connected_node)
 
     def get_children_nodes(self) -> list[Self]:
+        """Return nodes of node groups connected to output hyper edges, `Hypergraph.get_children_nodes` caches it."""
         children_nodes: dict[int, Node] = dict()
         for output_hyper_edge in self.get_output_hyper_edges():
             for node in output_hyper_edge.get_target_nodes():
                 children_nodes[node.id] = node
-                for directly_connected_to in node.get_united_with_nodes():
+                for directly_connected_to in node.get_group_members():
                     children_nodes[directly_connected_to.id] = directly_connected_to
         if self.id in children_nodes:  # can sometimes occur, related to spider
             children_nodes.pop(self.id)
         return list(children_nodes.values())
 
     def get_parent_nodes(self) -> list[Self]:
+        """Return nodes of node groups connected to input hyper edges, `Hypergraph.get_parent_nodes` caches it."""
         parent_nodes: dict[int, Node] = dict()
         for input_hyper_edge in self.get_input_hyper_edges():
             for node in input_hyper_edge.get_source_nodes():
                 parent_nodes[node.id] = node
-                for directly_connected_to in node.get_united_with_nodes():
+                for directly_connected_to in node.get_group_members():
                     parent_nodes[directly_connected_to.id] = directly_connected_to
         return list(parent_nodes.values())
 
     def get_input_hyper_edges(self) -> list[HyperEdge]:
-        inputs = []
-        visited = set()
-        queue = Queue()
-        visited.add(self)
-        inputs.extend(self.inputs)
-        for other in self.directly_connected_to:
-            queue.put(other)
-
-        while not queue.empty():
-            node = queue.get()
-            if node not in visited:
-                visited.add(node)
-                inputs.extend(node.inputs)
-                for other in node.directly_connected_to:
-                    queue.put(other)
-        return inputs
+        group = self.find_group_root()._group
+        return group.inputs.get_hyper_edges() if group is not None else list(self._inputs)
 
     def get_output_hyper_edges(self) -> list[HyperEdge]:
-        outputs: set[HyperEdge] = set()
-        visited = set()
-        queue = Queue()
-        visited.add(self)
-        outputs.update(self.outputs)
-        for other in self.directly_connected_to:
-            queue.put(other)
+        group = self.find_group_root()._group
+        return group.outputs.get_hyper_edges() if group is not None else list(self._outputs)
 
-        while not queue.empty():
-            node = queue.get()
-            if node not in visited:
-                visited.add(node)
-                outputs.update(node.outputs)
-                for other in node.directly_connected_to:
-                    queue.put(other)
-        return list(outputs)
+    def has_output_hyper_edges(self) -> bool:
+        """Return True if any node of the node group has output hyper edges."""
+        group = self.find_group_root()._group
+        return len(group.outputs.hyper_edges) > 0 if group is not None else len(self._outputs) > 0
 
     def get_united_with_nodes(self) -> list[Node]:
-        united_with_nodes: set[Node] = set()
-        visited: set = set()
-        queue: Queue[Node] = Queue()
-        visited.add(self)
-        for directly_connected_to_node in self.directly_connected_to:
-            queue.put(directly_connected_to_node)
-        while not queue.empty():
-            node: Node = queue.get()
-            if node not in visited:
-                united_with_nodes.add(node)
-                visited.add(node)
-            for directly_connected_to_node in node.directly_connected_to:
-                if directly_connected_to_node not in visited:
-                    queue.put(directly_connected_to_node)
-        return list(united_with_nodes)
+        return [node for node in self.get_group_members() if node is not self]
 
     def set_inputs(self, inputs: list[HyperEdge]):
-        self.inputs = inputs
+        group = self.find_group_root()._group
+        if group is not None:
+            for input_hyper_edge in self._inputs:
+                group.inputs.discard(input_hyper_edge)
+        self._inputs = list(inputs)
+        if group is not None:
+            for input_hyper_edge in self._inputs:
+                group.inputs.add(input_hyper_edge)
+        StructureVersion.get_active().bump()
+
+    def set_outputs(self, outputs: list[HyperEdge]):
+        group = self.find_group_root()._group
+        if group is not None:
+            for output in self._outputs:
+                group.outputs.discard(output)
+        self._outputs = list(outputs)
+        if group is not None:
+            for output in self._outputs:
+                group.outputs.add(output)
+        StructureVersion.get_active().bump()
 
     def append_input(self, input_hyper_edge: HyperEdge):
-        if input_hyper_edge not in self.inputs:
-            self.inputs.append(input_hyper_edge)
+        if input_hyper_edge not in self._inputs:
+            self._inputs.append(input_hyper_edge)
+            group = self.find_group_root()._group
+            if group is not None:
+                group.inputs.add(input_hyper_edge)
+            StructureVersion.get_active().bump()
 
     def append_output(self, output: HyperEdge):
-        if output not in self.outputs:
-            self.outputs.append(output)
+        if output not in self._outputs:
+            self._outputs.append(output)
+            group = self.find_group_root()._group
+            if group is not None:
+                group.outputs.add(output)
+            StructureVersion.get_active().bump()
 
     def remove_self(self):
-        for connected_to_node in self.directly_connected_to:
-            connected_to_node.directly_connected_to.remove(self)
-        self.directly_connected_to.clear()
-        for input_hyper_edge in self.inputs:
+        group_members = self.get_united_with_nodes()
+        for connected_to_node in self._directly_connected_to:
+            connected_to_node._directly_connected_to.remove(self)
+        self._directly_connected_to.clear()
+        for input_hyper_edge in self._inputs:
             input_hyper_edge.remove_target_node_by_reference(self)
-        for output in self.outputs:
+        for output in self._outputs:
             output.remove_source_node_by_reference(self)
 
-        self.inputs.clear()
-        self.outputs.clear()
+        self._inputs.clear()
+        self._outputs.clear()
+        # removed node could be a bridge inside its group, so the rest of the group is regrouped
+        Node.regroup(group_members + [self])
 
     def remove_input(self, input_hyper_edge: HyperEdge):
-        if input_hyper_edge in self.inputs:
-            self.inputs.remove(input_hyper_edge)
+        if input_hyper_edge in self._inputs:
+            self._inputs.remove(input_hyper_edge)
+            group = self.find_group_root()._group
+            if group is not None:
+                group.inputs.discard(input_hyper_edge)
+            StructureVersion.get_active().bump()
 
     def remove_output(self, output_hyper_edge: HyperEdge):
-        if output_hyper_edge in self.outputs:
-            self.outputs.remove(output_hyper_edge)
+        if output_hyper_edge in self._outputs:
+            self._outputs.remove(output_hyper_edge)
+            group = self.find_group_root()._group
+            if group is not None:
+                group.outputs.discard(output_hyper_edge)
+            StructureVersion.get_active().bump()
 
     def union(self, other: Self):
-        self.directly_connected_to.append(other)
-        other.directly_connected_to.append(self)
+        self._directly_connected_to.append(other)
+        other._directly_connected_to.append(self)
+        Node.link(self, other)
 
     def is_connected_to(self, target_node: Self) -> bool:
         if self.equals_to_node_group(target_node):
             return True
-        visited: set[int] = set()
-        queue: Queue[Node] = Queue()
-        visited.add(self.id)
-        for hyper_edge in self.get_input_hyper_edges() + self.get_output_hyper_edges():
-            for node in hyper_edge.get_source_nodes() + hyper_edge.get_target_nodes():
-                if node.id not in visited:
-                    queue.put(node)
-        while not queue.empty():
-            node: Node = queue.get()
-            visited.add(node.id)
-            if node.equals_to_node_group(target_node):
-                return True
-            for hyper_edge in node.get_input_hyper_edges() + node.get_output_hyper_edges():
-                for hyper_edge_node in hyper_edge.get_source_nodes() + hyper_edge.get_target_nodes():
-                    if hyper_edge_node.id not in visited:
-                        queue.put(hyper_edge_node)
-        return False
+        hypergraph = self._get_indexed_hypergraph()
+        if hypergraph is not None:
+            if hypergraph.nodes.get(target_node.id) is target_node:
+                return hypergraph.get_reachability_index().is_connected(self.id, target_node.id)
+            if target_node._get_indexed_hypergraph() is not None:
+                return False  # nodes are in different connected components
+        return any(node.equals_to_node_group(target_node) for node in self._get_connected_nodes())
 
     def __str__(self) -> str:
         """Return a string representation of the node."""
@@ -207,7 +381,8 @@ class Node:
             return False
         if self.id == other.id:
             return True
-        return any(node.id == other.id for node in self.get_united_with_nodes())
+        group = self.find_group_root()._group
+        return group is not None and other.id in group.members
 
     def __eq__(self, other):
         if not isinstance(other, Node):
@@ -218,7 +393,5 @@ class Node:
         return hash(self.id)
 
     def node_group_hash(self):
-        group = [self.id]
-        for node in self.get_united_with_nodes():
-            group.append(node.id)
-        return hash(tuple(sorted(group)))
+        group = self.find_group_root()._group
+        return group.get_group_hash() if group is not None else hash((self.id,))
@@ -0,0 +1,183 @@
+from __future__ import annotations
+
+import numpy as np
+
+from MVP.refactored.backend.hypergraph.frozen_hypergraph import FrozenHypergraph, _gather, _unique_pairs
+
+_ONE = np.uint64(1)
+_WORD_BITS = np.uint64(64)
+
+
+class ReachabilityIndex:
+    """
+    Transitive closure of a hypergraph packed into bitsets.
+
+    Node groups of the frozen snapshot are numbered, row `descendants[g]` is a bitset of node groups reachable from
+    group `g` through at least one hyper edge, `ancestors[g]` is a bitset of groups that reach `g`. Rows are NumPy
+    uint64 arrays, so ancestry of many groups is answered with word-parallel OR/AND. Connectivity ignores hyper edge
+    direction and is answered with component labels.
+
+    Index takes `group_count^2 / 8` bytes, it is built lazily by `Hypergraph.get_reachability_index` and rebuilt
+    after any structure change.
+    """
+
+    def __init__(self, frozen: FrozenHypergraph):
+        self.frozen = frozen
+        self.word_count = (frozen.group_count + 63) // 64
+        # hyper edge of every target port, used to find hyper edges that output into a set of node groups
+        self.target_port_edges = np.repeat(np.arange(frozen.hyper_edge_count, dtype=np.int32),
+                                           frozen.get_edge_target_degrees())
+
+        self.component: np.ndarray = self._label_components()
+        self.descendants: np.ndarray = self._close(
+            *self._create_successors(frozen.group_output_pointers, frozen.group_output_edges,
+                                     frozen.edge_target_pointers, frozen.edge_target_nodes))
+        self.ancestors: np.ndarray = self._close(
+            *self._create_successors(frozen.group_input_pointers, frozen.group_input_edges,
+                                     frozen.edge_source_pointers, frozen.edge_source_nodes))
+
+    def _create_successors(self, group_pointers: np.ndarray, group_edges: np.ndarray,
+                           edge_pointers: np.ndarray, edge_nodes: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Return CSR of node groups reachable with one hyper edge in the given direction."""
+        frozen = self.frozen
+        pair_groups = np.repeat(np.arange(frozen.group_count, dtype=np.int32), np.diff(group_pointers))
+        next_groups = frozen.node_group[_gather(edge_pointers, edge_nodes, group_edges)]
+        groups, next_groups = _unique_pairs(np.repeat(pair_groups, np.diff(edge_pointers)[group_edges]),
+                                            next_groups,
+                                            frozen.group_count)
+        pointers = np.zeros(frozen.group_count + 1, dtype=np.int32)
+        np.cumsum(np.bincount(groups, minlength=frozen.group_count), out=pointers[1:])
+        return pointers, next_groups
+
+    def _close(self, pointers: np.ndarray, next_groups: np.ndarray) -> np.ndarray:
+        """
+        Return bitset rows of node groups reachable from every group.
+
+        Groups are closed in DFS post order, so every group is closed after all groups it reaches. If there are
+        cycles, the pass is repeated until no row changes.
+        """
+        group_count = self.frozen.group_count
+        rows = np.zeros((group_count, self.word_count), dtype="<u8")
+        for group in range(group_count):
+            successors = next_groups[pointers[group]:pointers[group + 1]]
+            np.bitwise_or.at(rows[group], successors // 64, _ONE << (successors.astype(np.uint64) % _WORD_BITS))
+
+        order, has_cycle = self._post_order(pointers.tolist(), next_groups.tolist())
+        changed = True
+        while changed:
+            changed = False
+            for group in order:
+                successors = next_groups[pointers[group]:pointers[group + 1]]
+                if len(successors) == 0:
+                    continue
+                row = rows[group] | np.bitwise_or.reduce(rows[successors], axis=0)
+                if has_cycle and not np.array_equal(row, rows[group]):
+                    changed = True
+                rows[group] = row
+        rows.flags.writeable = False
+        return rows
+
+    def _post_order(self, pointers: list[int], next_groups: list[int]) -> tuple[list[int], bool]:
+        """Return node groups in DFS post order and whether a cycle was found."""
+        state = [0] * self.frozen.group_count  # 0 - not visited, 1 - on stack, 2 - done
+        order: list[int] = []
+        has_cycle = False
+        for start in range(self.frozen.group_count):
+            if state[start]:
+                continue
+            state[start] = 1
+            stack: list[tuple[int, int]] = [(start, pointers[start])]
+            while stack:
+                group, position = stack[-1]
+                if position == pointers[group + 1]:
+                    stack.pop()
+                    state[group] = 2
+                    order.append(group)
+                    continue
+                stack[-1] = (group, position + 1)
+                next_group = next_groups[position]
+                if state[next_group] == 0:
+                    state[next_group] = 1
+                    stack.append((next_group, pointers[next_group]))
+                elif state[next_group] == 1:
+                    has_cycle = True
+        return order, has_cycle
+
+    def _label_components(self) -> np.ndarray:
+        """Label node groups connected by hyper edges in any direction with the smallest group in the component."""
+        frozen = self.frozen
+        parent = list(range(frozen.group_count))
+
+        def find(group: int) -> int:
+            while parent[group] != group:
+                parent[group] = parent[parent[group]]
+                group = parent[group]
+            return group
+
+        port_groups = np.concatenate((frozen.node_group[frozen.edge_source_nodes],
+                                      frozen.node_group[frozen.edge_target_nodes])).tolist()
+        port_edges = np.concatenate((np.repeat(np.arange(frozen.hyper_edge_count, dtype=np.int32),
+                                               frozen.get_edge_source_degrees()),
+                                     self.target_port_edges)).tolist()
+        first_group: dict[int, int] = {}
+        for edge, group in zip(port_edges, port_groups):
+            if edge not in first_group:
+                first_group[edge] = group
+                continue
+            root, other_root = find(first_group[edge]), find(group)
+            if root != other_root:
+                parent[max(root, other_root)] = min(root, other_root)
+        return np.array([find(group) for group in range(frozen.group_count)], dtype=np.int32)
+
+    def _to_mask(self, row: np.ndarray) -> np.ndarray:
+        return np.unpackbits(row.view(np.uint8), bitorder="little")[:self.frozen.group_count].astype(bool)
+
+    def _to_node_ids(self, group_mask: np.ndarray) -> list:
+        return [self.frozen.node_ids[node] for node in np.flatnonzero(group_mask[self.frozen.node_group])]
+
+    def get_group(self, node_id) -> int:
+        return int(self.frozen.node_group[self.frozen.node_index[node_id]])
+
+    def is_connected(self, node_id, other_node_id) -> bool:
+        """Return True if nodes are connected by hyper edges in any direction or are in the same node group."""
+        return bool(self.component[self.get_group(node_id)] == self.component[self.get_group(other_node_id)])
+
+    def get_connected_source_node_ids(self, node_id) -> list:
+        """Return ids of nodes connected to the node, whose node groups have no input hyper edges."""
+        connected = self.component == self.component[self.get_group(node_id)]
+        return self._to_node_ids(connected & (self.frozen.get_group_in_degrees() == 0))
+
+    def get_connected_target_node_ids(self, node_id) -> list:
+        """Return ids of nodes connected to the node, whose node groups have no output hyper edges."""
+        connected = self.component == self.component[self.get_group(node_id)]
+        return self._to_node_ids(connected & (self.frozen.get_group_out_degrees() == 0))
+
+    def is_ancestor(self, ancestor_id, node_id) -> bool:
+        """Return True if the node is reachable from the ancestor following hyper edge direction."""
+        group = self.get_group(node_id)
+        word = self.descendants[self.get_group(ancestor_id), group // 64]
+        return bool((word >> np.uint64(group % 64)) & _ONE)
+
+    def get_descendant_mask(self, node_ids: list) -> np.ndarray:
+        """Return boolean mask of node groups reachable from any of the nodes."""
+        groups = [self.get_group(node_id) for node_id in node_ids]
+        return self._to_mask(np.bitwise_or.reduce(self.descendants[groups], axis=0))
+
+    def get_ancestor_mask(self, node_ids: list) -> np.ndarray:
+        """Return boolean mask of node groups that reach any of the nodes."""
+        groups = [self.get_group(node_id) for node_id in node_ids]
+        return self._to_mask(np.bitwise_or.reduce(self.ancestors[groups], axis=0))
+
+    def get_descendant_node_ids(self, node_id) -> list:
+        return self._to_node_ids(self.get_descendant_mask([node_id]))
+
+    def get_ancestor_node_ids(self, node_id) -> list:
+        return self._to_node_ids(self.get_ancestor_mask([node_id]))
+
+    def get_feeding_hyper_edge_ids(self, node_id) -> list:
+        """Return ids of hyper edges (boxes) whose results flow into the node, directly or through other boxes."""
+        groups = self.get_ancestor_mask([node_id])
+        groups[self.get_group(node_id)] = True
+        feeding = np.zeros(self.frozen.hyper_edge_count, dtype=bool)
+        feeding[self.target_port_edges[groups[self.frozen.node_group[self.frozen.edge_target_nodes]]]] = True
+        return [self.frozen.hyper_edge_ids[edge] for edge in np.flatnonzero(feeding)]
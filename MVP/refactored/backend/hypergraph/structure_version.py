@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+import threading
+from contextvars import ContextVar, Token
+
+
+class StructureVersion:
+    """
+    Counter of hypergraph structure changes.
+
+    Every hypergraph registry owns a counter, which is active in the current thread or asyncio task while the
+    registry is used, see `HypergraphManager.use`. Changes of hyper edge connections and node groups bump the active
+    counter, so nodes and hyper edges do not keep a reference to it. Hypergraphs keep the counter of the registry
+    they were created for and bump it when their hyper edges change, registries bump it when registered hypergraphs
+    change. Cached adjacency views and schedules of a hypergraph remember the version they were built at, so they
+    stay valid through read-only passes and are rebuilt lazily after any change in the same registry, changes in
+    other registries do not invalidate them.
+    """
+    default: StructureVersion
+
+    def __init__(self):
+        self.version = 0
+        self.lock = threading.Lock()
+
+    def bump(self):
+        with self.lock:
+            self.version += 1
+
+    @staticmethod
+    def get_active() -> StructureVersion:
+        return _active_structure_version.get()
+
+    @staticmethod
+    def activate(structure_version: StructureVersion) -> Token:
+        """Make the counter active in the current context, returned token restores the previous one."""
+        return _active_structure_version.set(structure_version)
+
+    @staticmethod
+    def restore(token: Token):
+        _active_structure_version.reset(token)
+
+
+StructureVersion.default = StructureVersion()
+_active_structure_version: ContextVar[StructureVersion] = ContextVar("active_structure_version",
+                                                                     default=StructureVersion.default)
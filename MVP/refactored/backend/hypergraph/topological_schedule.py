@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from MVP.refactored.backend.tracing import Tracing, traced
+
+if TYPE_CHECKING:
+    from MVP.refactored.backend.hypergraph.hypergraph import Hypergraph
+    from MVP.refactored.backend.hypergraph.hyper_edge import HyperEdge
+
+
+@Tracing.instrumented
+class TopologicalSchedule:
+    """
+    Execution schedule of hyper edges of a hypergraph.
+
+    `levels` group hyper edges of the hypergraph itself, hyper edges of one level only depend on hyper edges of
+    previous levels, so they can be executed concurrently. Compound hyper edge is a single unit in levels.
+    `order` is a linear execution order, where hyper edges of hypergraphs inside a compound hyper edge follow
+    the compound hyper edge.
+    """
+
+    def __init__(self, order: list[HyperEdge], levels: list[list[HyperEdge]]):
+        self.order = order
+        self.levels = levels
+
+    @staticmethod
+    @traced("topological_schedule")
+    def from_hypergraph(hypergraph: Hypergraph) -> TopologicalSchedule:
+        levels = TopologicalSchedule.get_levels(hypergraph)
+        order: list[HyperEdge] = []
+        seen: set[int] = set()
+        for level in levels:
+            for hyper_edge in level:
+                TopologicalSchedule._add_to_order(hyper_edge, order, seen)
+        return TopologicalSchedule(order, levels)
+
+    @staticmethod
+    def get_levels(hypergraph: Hypergraph) -> list[list[HyperEdge]]:
+        """
+        Group hyper edges of the hypergraph into levels, see `FrozenHypergraph.get_topological_levels`.
+
+        :raises ValueError: if hyper edges form a cycle.
+        """
+        hyper_edges = hypergraph.get_all_hyper_edges()  # in the order of hyper edge indexes of the snapshot
+        return [[hyper_edges[index] for index in level.tolist()]
+                for level in hypergraph.freeze().get_topological_levels()]
+
+    @staticmethod
+    def _add_to_order(hyper_edge: HyperEdge, order: list[HyperEdge], seen: set[int]):
+        if id(hyper_edge) in seen:
+            return
+        seen.add(id(hyper_edge))
+        order.append(hyper_edge)
+        for subgraph in hyper_edge.get_hypergraphs_inside():
+            # order of the subgraph already contains hyper edges of its own compound hyper edges
+            for inner_hyper_edge in subgraph.get_topological_schedule().order:
+                if id(inner_hyper_edge) not in seen:
+                    seen.add(id(inner_hyper_edge))
+                    order.append(inner_hyper_edge)
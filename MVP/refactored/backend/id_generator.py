@@ -1,7 +1,50 @@
+from __future__ import annotations
+
+import threading
+from contextvars import ContextVar, Token
+
+
 class IdGenerator:
-    id_counter = -1
+    """
+    Allocator of unique ids.
+
+    `IdGenerator.id()` allocates from the generator that is active in the current thread or asyncio task. By default
+    it is the process-wide `default` generator, every hypergraph registry owns its own generator and activates it in
+    `HypergraphManager.use`.
+    """
+    default: IdGenerator
+
+    def __init__(self, id_counter: int = -1):
+        self.id_counter = id_counter
+        self.lock = threading.Lock()
+
+    def next_id(self) -> int:
+        with self.lock:
+            self.id_counter += 1  # TODO temp solution
+            return self.id_counter
+
+    def reserve(self, used_id: int):
+        """Make sure that ids up to `used_id` are not allocated, e.g. after loading saved nodes."""
+        with self.lock:
+            self.id_counter = max(self.id_counter, used_id)
 
     @staticmethod
     def id():
-        IdGenerator.id_counter += 1  # TODO temp solution
-        return IdGenerator.id_counter
+        return _active_id_generator.get().next_id()
+
+    @staticmethod
+    def get_active() -> IdGenerator:
+        return _active_id_generator.get()
+
+    @staticmethod
+    def activate(id_generator: IdGenerator) -> Token:
+        """Make the generator active in the current context, returned token restores the previous one."""
+        return _active_id_generator.set(id_generator)
+
+    @staticmethod
+    def restore(token: Token):
+        _active_id_generator.reset(token)
+
+
+IdGenerator.default = IdGenerator()
+_active_id_generator: ContextVar[IdGenerator] = ContextVar("active_id_generator", default=IdGenerator.default)
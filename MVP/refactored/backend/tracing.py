@@ -0,0 +1,202 @@
+from __future__ import annotations
+
+import functools
+import inspect
+import json
+import threading
+from contextlib import contextmanager
+from enum import Enum
+from time import perf_counter
+from typing import Any, Callable, Iterator
+
+
+class Tracer:
+    """
+    Collected counters, operation timers and optionally structured events.
+
+    Every traced operation increments its counter and adds its duration to its timer. If `capture_events` is set,
+    every call is also stored as an event with its arguments, at most `max_events` events are kept.
+    """
+
+    def __init__(self, capture_events: bool = False, max_events: int = 100_000):
+        self.capture_events = capture_events
+        self.max_events = max_events
+        self.counters: dict[str, int] = {}
+        self.timers: dict[str, list[float]] = {}  # operation -> [count, total seconds, max seconds]
+        self.events: list[dict] = []
+        self.dropped_events = 0
+        self.start_time = perf_counter()
+        self.lock = threading.Lock()
+
+    def count(self, name: str, amount: int = 1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def record(self, operation: str, start: float, duration: float, fields: dict | None = None):
+        with self.lock:
+            self.counters[operation] = self.counters.get(operation, 0) + 1
+            timer = self.timers.get(operation)
+            if timer is None:
+                self.timers[operation] = [1, duration, duration]
+            else:
+                timer[0] += 1
+                timer[1] += duration
+                timer[2] = max(timer[2], duration)
+            if fields is None:
+                return
+            if len(self.events) >= self.max_events:
+                self.dropped_events += 1
+                return
+            self.events.append({"operation": operation,
+                                "start": start - self.start_time,
+                                "duration": duration,
+                                "fields": fields})
+
+    def to_dict(self) -> dict:
+        """Return a JSON serializable representation, times are in seconds."""
+        with self.lock:
+            return {
+                "counters": dict(self.counters),
+                "timers": {operation: {"count": count, "total": total, "mean": total / count, "max": maximum}
+                           for operation, (count, total, maximum) in self.timers.items()},
+                "events": list(self.events),
+                "droppedEvents": self.dropped_events,
+            }
+
+    def to_json(self, indent: int | None = None) -> str:
+        return json.dumps(self.to_dict(), indent=indent)
+
+    def export_json(self, path: str):
+        with open(path, "w") as file:
+            file.write(self.to_json(indent=2))
+
+
+class Tracing:
+    """
+    Opt-in tracing of operations.
+
+    Methods are marked with `traced` and their classes with `Tracing.instrumented`. Marking does not change methods,
+    they are wrapped with timing code only while tracing is enabled, so disabled tracing costs nothing.
+
+    Example:
+        with Tracing.trace(capture_events=True) as tracer:
+            ...
+        tracer.export_json("trace.json")
+    """
+    tracer: Tracer | None = None
+    instrumented_classes: list[type] = []
+    original_methods: dict[tuple[type, str], Any] = {}
+
+    @staticmethod
+    def instrumented(cls: type) -> type:
+        """Class decorator, registers the class so its `traced` methods are wrapped when tracing is enabled."""
+        Tracing.instrumented_classes.append(cls)
+        if Tracing.tracer is not None:
+            Tracing._wrap_class(cls)
+        return cls
+
+    @staticmethod
+    def enable(tracer: Tracer = None) -> Tracer:
+        if Tracing.tracer is not None:
+            Tracing.disable()
+        Tracing.tracer = tracer if tracer is not None else Tracer()
+        for cls in Tracing.instrumented_classes:
+            Tracing._wrap_class(cls)
+        return Tracing.tracer
+
+    @staticmethod
+    def disable() -> Tracer | None:
+        """Restore original methods and return the tracer that was collecting."""
+        for (cls, name), method in Tracing.original_methods.items():
+            setattr(cls, name, method)
+        Tracing.original_methods.clear()
+        tracer, Tracing.tracer = Tracing.tracer, None
+        return tracer
+
+    @staticmethod
+    @contextmanager
+    def trace(capture_events: bool = False, max_events: int = 100_000) -> Iterator[Tracer]:
+        tracer = Tracing.enable(Tracer(capture_events, max_events))
+        try:
+            yield tracer
+        finally:
+            Tracing.disable()
+
+    @staticmethod
+    def count(name: str, amount: int = 1):
+        """Increment a counter if tracing is enabled."""
+        if Tracing.tracer is not None:
+            Tracing.tracer.count(name, amount)
+
+    @staticmethod
+    def _wrap_class(cls: type):
+        for name, attribute in list(cls.__dict__.items()):
+            function = attribute.__func__ if isinstance(attribute, (staticmethod, classmethod)) else attribute
+            operation = getattr(function, "traced_operation", None)
+            if operation is None:
+                continue
+            wrapper = Tracing._wrap_function(function, operation, getattr(function, "traced_detail", None))
+            if isinstance(attribute, staticmethod):
+                wrapper = staticmethod(wrapper)
+            elif isinstance(attribute, classmethod):
+                wrapper = classmethod(wrapper)
+            Tracing.original_methods[(cls, name)] = attribute
+            setattr(cls, name, wrapper)
+
+    @staticmethod
+    def _wrap_function(function: Callable, operation: str, detail: Callable | None) -> Callable:
+        signature = inspect.signature(function)
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            tracer = Tracing.tracer
+            if tracer is None:
+                return function(*args, **kwargs)
+            name = operation if detail is None else f"{operation}.{detail(*args, **kwargs)}"
+            start = perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                duration = perf_counter() - start
+                fields = None
+                if tracer.capture_events:
+                    bound = signature.bind_partial(*args, **kwargs)
+                    fields = {key: _summarize(value) for key, value in bound.arguments.items()
+                              if key not in ("self", "cls")}
+                tracer.record(name, start, duration, fields)
+
+        return wrapper
+
+
+def traced(operation: str, detail: Callable[..., str] = None) -> Callable:
+    """
+    Mark method as a traced operation, the method itself is returned unchanged.
+
+    :param operation: Name of the counter and timer of the operation.
+    :param detail: Optional function of the method arguments, its result is appended to the operation name.
+    """
+
+    def mark(function: Callable) -> Callable:
+        function.traced_operation = operation
+        function.traced_detail = detail
+        return function
+
+    return mark
+
+
+def _summarize(value: Any, depth: int = 0) -> Any:
+    """Convert argument to a small JSON serializable value, objects with id are replaced with their id."""
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    if isinstance(value, Enum):
+        return value.name
+    if isinstance(value, str):
+        return value
+    if depth < 2 and isinstance(value, dict):
+        return {str(key): _summarize(item, depth + 1) for key, item in value.items()}
+    if depth < 2 and isinstance(value, (list, tuple, set)):
+        return [_summarize(item, depth + 1) for item in value]
+    item_id = getattr(value, "id", None)
+    if isinstance(item_id, (int, str)):
+        return item_id
+    return type(value).__name__
@@ -0,0 +1,73 @@
+"""
+Benchmark of batched diagram execution.
+
+Fuel cost diagram `(distance, litres) -> consumption -> cost(consumption, price)` is run over `ROW_COUNT` rows by
+`DataflowExecutor` row by row, as reference for small row counts only, and by `BatchExecutor` in the calling thread
+and in a process pool.
+
+Run from the repository root:
+    python -m MVP.refactored.benchmarks.batch_benchmark
+"""
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from MVP.refactored.backend.box_functions.box_function_registry import BoxFunctionRegistry
+from MVP.refactored.backend.diagram_callback import Receiver
+from MVP.refactored.backend.execution.batch_executor import BatchExecutor
+from MVP.refactored.backend.execution.dataflow_executor import DataflowExecutor
+from MVP.refactored.backend.hypergraph.hypergraph_manager import HypergraphManager
+from MVP.refactored.backend.hypergraph.hypergraph_registry import HypergraphRegistry
+from MVP.refactored.backend.types.connection_info import ConnectionInfo
+from MVP.refactored.backend.types.connection_side import ConnectionSide
+from MVP.refactored.frontend.windows.main_diagram import MainDiagram
+
+CANVAS_ID = 1
+ROW_COUNT = [10_000, 100_000, 500_000]
+MAX_ROW_BY_ROW_COUNT = 100_000
+CHUNK_SIZE = 10_000
+
+
+def create_fuel_diagram() -> Receiver:
+    receiver = Receiver()
+    diagram = receiver.add_new_canvas(CANVAS_ID)
+    nodes = {node_id: HypergraphManager.create_new_node(node_id, CANVAS_ID) for node_id in range(1, 6)}
+    for hyper_edge_id, label, sources, target in ((10, "consumption", (1, 2), 3), (11, "cost", (3, 4), 5)):
+        for source in sources:
+            HypergraphManager.connect_node_with_output_hyper_edge(nodes[source], hyper_edge_id)
+        HypergraphManager.connect_node_with_input_hyper_edge(nodes[target], hyper_edge_id).set_box_label(label)
+    for index, node_id in enumerate((1, 2, 4)):
+        diagram.add_input(ConnectionInfo(index, ConnectionSide.LEFT, node_id))
+    diagram.add_output(ConnectionInfo(0, ConnectionSide.RIGHT, 5))
+    return receiver
+
+
+def measure(function, *args) -> float:
+    start = time.perf_counter()
+    function(*args)
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    MainDiagram.label_content = {
+        "consumption": "def consumption(distance, litres):\n    return litres / distance * 100\n",
+        "cost": "def cost(consumption, price):\n    return round(consumption * price, 2)\n"}
+    BoxFunctionRegistry.invalidate()
+    print(f"{'rows':>7} {'row by row, ms':>15} {'batch, ms':>10} {'structured array, ms':>21} {'process pool, ms':>17}")
+    with HypergraphManager.use(HypergraphRegistry()), ProcessPoolExecutor() as pool:
+        receiver = create_fuel_diagram()
+        for row_count in ROW_COUNT:
+            rows = [(100 + i % 500, 5 + i % 7, 1.5 + i % 3) for i in range(row_count)]
+            array = np.array(rows, dtype=[("distance", np.int64), ("litres", np.int64), ("price", np.float64)])
+            executor = DataflowExecutor(receiver, CANVAS_ID)
+            row_by_row = (f"{measure(lambda: [executor.run(row) for row in rows]):>15.1f}"
+                          if row_count <= MAX_ROW_BY_ROW_COUNT else f"{'-':>15}")
+            batch = measure(lambda: list(BatchExecutor(receiver, CANVAS_ID, chunk_size=CHUNK_SIZE).run(rows)))
+            structured = measure(lambda: list(BatchExecutor(receiver, CANVAS_ID, chunk_size=CHUNK_SIZE).run(array)))
+            parallel = measure(lambda: list(BatchExecutor(receiver, CANVAS_ID, pool, chunk_size=CHUNK_SIZE).run(rows)))
+            print(f"{row_count:>7} {row_by_row} {batch:>10.1f} {structured:>21.1f} {parallel:>17.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+Benchmark of the box call cache.
+
+Fuel cost diagram of `batch_benchmark` with a slow cacheable `consumption` box, computing the result in a loop as a
+stand-in for a table lookup, is run over `ROW_COUNT` rows with `DISTINCT_PAIRS` distinct (distance, litres) pairs.
+`BatchExecutor` runs without a cache, with an empty cache and once more with the filled cache.
+
+Run from the repository root:
+    python -m MVP.refactored.benchmarks.box_call_cache_benchmark
+"""
+from MVP.refactored.backend.box_functions.box_function_registry import BoxFunctionRegistry
+from MVP.refactored.backend.execution.batch_executor import BatchExecutor
+from MVP.refactored.backend.execution.box_call_cache import BoxCallCache
+from MVP.refactored.backend.hypergraph.hypergraph_manager import HypergraphManager
+from MVP.refactored.backend.hypergraph.hypergraph_registry import HypergraphRegistry
+from MVP.refactored.benchmarks.batch_benchmark import CANVAS_ID, create_fuel_diagram, measure
+from MVP.refactored.frontend.windows.main_diagram import MainDiagram
+
+ROW_COUNT = [10_000, 50_000]
+DISTINCT_PAIRS = 500
+CHUNK_SIZE = 1_000
+
+
+def main():
+    MainDiagram.label_content = {
+        "consumption": "def consumption(distance, litres):\n"
+                       "    total = 0.0\n"
+                       "    for _ in range(1000):\n"
+                       "        total += litres / distance\n"
+                       "    return total / 10\n",
+        "cost": "def cost(consumption, price):\n    return round(consumption * price, 2)\n"}
+    MainDiagram.label_metadata = {"consumption": {"cacheable": True}}
+    BoxFunctionRegistry.invalidate()
+    print(f"{'rows':>7} {'no cache, ms':>13} {'cold cache, ms':>15} {'warm cache, ms':>15} {'hit rate':>9}")
+    with HypergraphManager.use(HypergraphRegistry()):
+        receiver = create_fuel_diagram()
+        for row_count in ROW_COUNT:
+            rows = [(100 + i % DISTINCT_PAIRS, 5 + i % DISTINCT_PAIRS % 7, 1.5 + i % 3) for i in range(row_count)]
+            cache = BoxCallCache()
+            uncached = measure(lambda: list(BatchExecutor(receiver, CANVAS_ID, chunk_size=CHUNK_SIZE).run(rows)))
+            cold = measure(lambda: list(BatchExecutor(receiver, CANVAS_ID, chunk_size=CHUNK_SIZE,
+                                                      cache=cache).run(rows)))
+            warm = measure(lambda: list(BatchExecutor(receiver, CANVAS_ID, chunk_size=CHUNK_SIZE,
+                                                      cache=cache).run(rows)))
+            print(f"{row_count:>7} {uncached:>13.1f} {cold:>15.1f} {warm:>15.1f} "
+                  f"{cache.statistics.get_hit_rate():>9.1%}")
+
+
+if __name__ == "__main__":
+    main()
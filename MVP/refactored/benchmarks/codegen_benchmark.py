@@ -0,0 +1,77 @@
+"""
+Benchmark of incremental code generation.
+
+Builds `PIPELINE_COUNT` hypergraphs `input -> box -> wire -> box -> ... -> output` on one canvas, which use
+`FUNCTION_COUNT` different box functions, and measures generation without cached sections, regeneration without
+changes and regeneration after the label of one box was changed.
+
+Run from the repository root:
+    python -m MVP.refactored.benchmarks.codegen_benchmark
+"""
+import time
+from types import SimpleNamespace
+
+from MVP.refactored.backend.box_functions.box_function_registry import BoxFunctionRegistry
+from MVP.refactored.backend.code_generation.code_generation_cache import CodeGenerationCache
+from MVP.refactored.backend.code_generation.code_generator import CodeGenerator
+from MVP.refactored.backend.diagram_callback import Receiver
+from MVP.refactored.backend.hypergraph.hypergraph_manager import HypergraphManager
+from MVP.refactored.backend.hypergraph.hypergraph_registry import HypergraphRegistry
+from MVP.refactored.backend.types.connection_info import ConnectionInfo
+from MVP.refactored.backend.types.connection_side import ConnectionSide
+from MVP.refactored.frontend.windows.main_diagram import MainDiagram
+
+CANVAS_ID = 1
+PIPELINE_COUNT = [10, 50, 200]
+BOXES_PER_PIPELINE = 5
+FUNCTION_COUNT = 20
+
+
+def create_project(pipeline_count: int) -> SimpleNamespace:
+    """Create pipelines in the active registry and return canvas-like object for CodeGenerator."""
+    receiver = Receiver()
+    diagram = receiver.add_new_canvas(CANVAS_ID)
+    next_id = 0
+    for index in range(pipeline_count):
+        diagram.add_input(ConnectionInfo(index, ConnectionSide.LEFT, next_id))
+        node = HypergraphManager.create_new_node(next_id, CANVAS_ID)
+        for position in range(BOXES_PER_PIPELINE):
+            hyper_edge = HypergraphManager.connect_node_with_output_hyper_edge(node, next_id + 1)
+            hyper_edge.set_box_label(f"function_{(index + position) % FUNCTION_COUNT}")
+            node = HypergraphManager.create_new_node(next_id + 2, CANVAS_ID)
+            HypergraphManager.connect_node_with_input_hyper_edge(node, next_id + 1)
+            next_id += 2
+        diagram.add_output(ConnectionInfo(index, ConnectionSide.RIGHT, next_id + 1))
+        output = HypergraphManager.create_new_node(next_id + 1, CANVAS_ID)
+        HypergraphManager.union_nodes(output, node.id)
+        next_id += 2
+    return SimpleNamespace(id=CANVAS_ID, receiver=receiver)
+
+
+def measure(function, *args) -> float:
+    start = time.perf_counter()
+    function(*args)
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    MainDiagram.label_content = {
+        f"function_{i}": f"OFFSET = {i}\n\ndef function_{i}(x):\n    return x + OFFSET\n" for i in range(FUNCTION_COUNT)}
+    print(f"{'pipelines':>9} {'boxes':>6} {'full, ms':>9} {'unchanged, ms':>14} {'one box edited, ms':>19}")
+    for pipeline_count in PIPELINE_COUNT:
+        CodeGenerationCache.clear()
+        BoxFunctionRegistry.invalidate()
+        with HypergraphManager.use(HypergraphRegistry()) as registry:
+            canvas = create_project(pipeline_count)
+            full = measure(CodeGenerator.generate_code, canvas)
+            unchanged = measure(CodeGenerator.generate_code, canvas)
+            hyper_edge = registry.get_hyper_edge_by_id(1)
+            hyper_edge.set_box_label("function_1" if hyper_edge.box_label != "function_1" else "function_2")
+            edited = measure(CodeGenerator.generate_code, canvas)
+        print(f"{pipeline_count:>9} {pipeline_count * BOXES_PER_PIPELINE:>6} {full:>9.1f} {unchanged:>14.1f}"
+              f" {edited:>19.1f}")
+    CodeGenerationCache.clear()
+
+
+if __name__ == "__main__":
+    main()
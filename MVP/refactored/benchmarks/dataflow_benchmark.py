@@ -0,0 +1,63 @@
+"""
+Benchmark of the dataflow executor on a wide fan-out diagram.
+
+Diagram input is passed to `WIDTHS` boxes, which wait `BOX_SECONDS` like boxes doing I/O, and every box result is a
+diagram output. Diagram is run by `DataflowExecutor` in the calling thread and with thread pools of several sizes.
+
+Run from the repository root:
+    python -m MVP.refactored.benchmarks.dataflow_benchmark
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from MVP.refactored.backend.box_functions.box_function_registry import BoxFunctionRegistry
+from MVP.refactored.backend.diagram_callback import Receiver
+from MVP.refactored.backend.execution.dataflow_executor import DataflowExecutor
+from MVP.refactored.backend.hypergraph.hypergraph_manager import HypergraphManager
+from MVP.refactored.backend.hypergraph.hypergraph_registry import HypergraphRegistry
+from MVP.refactored.backend.types.connection_info import ConnectionInfo
+from MVP.refactored.backend.types.connection_side import ConnectionSide
+from MVP.refactored.frontend.windows.main_diagram import MainDiagram
+
+CANVAS_ID = 1
+WIDTHS = [8, 32, 128]
+WORKERS = [4, 16, 64]
+BOX_SECONDS = 0.01
+
+
+def create_fan_out(width: int) -> Receiver:
+    receiver = Receiver()
+    diagram = receiver.add_new_canvas(CANVAS_ID)
+    diagram.add_input(ConnectionInfo(0, ConnectionSide.LEFT, 0))
+    node = HypergraphManager.create_new_node(0, CANVAS_ID)
+    for index in range(width):
+        hyper_edge_id = 2 * index + 1
+        HypergraphManager.connect_node_with_output_hyper_edge(node, hyper_edge_id).set_box_label("wait")
+        HypergraphManager.connect_node_with_input_hyper_edge(
+            HypergraphManager.create_new_node(hyper_edge_id + 1, CANVAS_ID), hyper_edge_id)
+        diagram.add_output(ConnectionInfo(index, ConnectionSide.RIGHT, hyper_edge_id + 1))
+    return receiver
+
+
+def measure(executor: DataflowExecutor) -> float:
+    start = time.perf_counter()
+    executor.run([1])
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    MainDiagram.label_content = {"wait": f"import time\n\ndef wait(x):\n    time.sleep({BOX_SECONDS})\n    return x\n"}
+    BoxFunctionRegistry.invalidate()
+    print(f"{'boxes':>6} {'sequential, ms':>15}" + "".join(f" {f'{workers} threads, ms':>16}" for workers in WORKERS))
+    for width in WIDTHS:
+        with HypergraphManager.use(HypergraphRegistry()):
+            receiver = create_fan_out(width)
+            row = f"{width:>6} {measure(DataflowExecutor(receiver, CANVAS_ID)):>15.1f}"
+            for workers in WORKERS:
+                with ThreadPoolExecutor(max_workers=workers) as pool:
+                    row += f" {measure(DataflowExecutor(receiver, CANVAS_ID, pool)):>16.1f}"
+        print(row)
+
+
+if __name__ == "__main__":
+    main()
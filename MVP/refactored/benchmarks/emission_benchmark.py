@@ -0,0 +1,57 @@
+"""
+Benchmark of code emission backends.
+
+Projects of `codegen_benchmark` are generated by `CodeGenerator.generate_code` without cached sections, which formats
+every section with autopep8, and by `AstCodeGenerator`, which builds the module as a tree and either converts it to
+source with `ast.unparse` or compiles it.
+
+Run from the repository root:
+    python -m MVP.refactored.benchmarks.emission_benchmark
+"""
+import time
+
+from MVP.refactored.backend.box_functions.box_function_registry import BoxFunctionRegistry
+from MVP.refactored.backend.code_generation.ast_code_generator import AstCodeGenerator
+from MVP.refactored.backend.code_generation.code_generation_cache import CodeGenerationCache
+from MVP.refactored.backend.code_generation.code_generator import CodeGenerator
+from MVP.refactored.backend.hypergraph.hypergraph_manager import HypergraphManager
+from MVP.refactored.backend.hypergraph.hypergraph_registry import HypergraphRegistry
+from MVP.refactored.benchmarks.codegen_benchmark import BOXES_PER_PIPELINE, FUNCTION_COUNT, create_project
+from MVP.refactored.frontend.windows.main_diagram import MainDiagram
+
+PIPELINE_COUNT = [10, 50, 200, 1000]
+REPEATS = 3
+
+
+def generate_without_cache(canvas):
+    CodeGenerationCache.clear()
+    CodeGenerator.generate_code(canvas)
+
+
+def measure(function, *args) -> float:
+    best = float("inf")
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        function(*args)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    MainDiagram.label_content = {
+        f"function_{i}": f"OFFSET = {i}\n\ndef function_{i}(x):\n    return x + OFFSET\n" for i in range(FUNCTION_COUNT)}
+    BoxFunctionRegistry.invalidate()
+    print(f"{'pipelines':>9} {'boxes':>6} {'autopep8, ms':>13} {'ast.unparse, ms':>16} {'compile, ms':>12}")
+    for pipeline_count in PIPELINE_COUNT:
+        with HypergraphManager.use(HypergraphRegistry()):
+            canvas = create_project(pipeline_count)
+            formatted = measure(generate_without_cache, canvas)
+            unparsed = measure(AstCodeGenerator.generate_code, canvas)
+            compiled = measure(AstCodeGenerator.compile_code, canvas)
+        print(f"{pipeline_count:>9} {pipeline_count * BOXES_PER_PIPELINE:>6} {formatted:>13.1f} {unparsed:>16.1f}"
+              f" {compiled:>12.1f}")
+    CodeGenerationCache.clear()
+
+
+if __name__ == "__main__":
+    main()
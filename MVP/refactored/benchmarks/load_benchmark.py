@@ -0,0 +1,66 @@
+"""
+Benchmark of replaying project load events with and without HypergraphManager.batch.
+
+Replays the hypergraph calls that `Receiver.receiver_callback` makes when a pipeline `box -> wire -> box -> ...`
+is loaded, with wires created in shuffled order, as importers do not create them in topological order. The second
+scenario also deletes and recreates every tenth wire, as redrawing a connection does, so every delete has to detect
+whether the hypergraph split.
+
+Run from the repository root:
+    python -m MVP.refactored.benchmarks.load_benchmark
+"""
+import logging
+import random
+import time
+from contextlib import nullcontext
+
+from MVP.refactored.backend.hypergraph.hypergraph_manager import HypergraphManager
+
+CANVAS_ID = 0
+SIZES = [500, 1000, 2000, 4000]
+REPEATS = 3
+REDRAWN_WIRE_STEP = 10
+
+
+def create_wire(wire: int):
+    node = HypergraphManager.create_new_node(f"wire_{wire}", CANVAS_ID)
+    HypergraphManager.connect_node_with_input_hyper_edge(node, f"box_{wire}")
+    HypergraphManager.connect_node_with_output_hyper_edge(node, f"box_{wire + 1}")
+
+
+def replay(box_count: int, batch: bool, redraw: bool):
+    """Replay wire events of a pipeline with `box_count` boxes."""
+    wires = list(range(box_count - 1))
+    random.Random(box_count).shuffle(wires)
+    with HypergraphManager.batch() if batch else nullcontext():
+        for wire in wires:
+            create_wire(wire)
+        if redraw:
+            for wire in wires[::REDRAWN_WIRE_STEP]:
+                HypergraphManager.remove_node(f"wire_{wire}")
+                create_wire(wire)
+
+
+def measure(box_count: int, batch: bool, redraw: bool) -> float:
+    """Return the best load time in milliseconds."""
+    best = float("inf")
+    for _ in range(REPEATS):
+        HypergraphManager.clear()
+        start = time.perf_counter()
+        replay(box_count, batch, redraw)
+        best = min(best, time.perf_counter() - start)
+        assert len(HypergraphManager.hypergraphs) == 1
+    HypergraphManager.clear()
+    return best * 1000
+
+
+def main():
+    logging.disable(logging.DEBUG)
+    print(f"{'boxes':>8} {'per event, ms':>14} {'batch, ms':>10} {'redraw per event, ms':>21} {'redraw batch, ms':>17}")
+    for box_count in SIZES:
+        print(f"{box_count:>8} {measure(box_count, False, False):>14.2f} {measure(box_count, True, False):>10.2f} "
+              f"{measure(box_count, False, True):>21.2f} {measure(box_count, True, True):>17.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Benchmark of memory used by Node and HyperEdge objects.
+
+Builds a pipeline `wire -> box -> wire -> ...` with the given number of elements, half of them nodes (wires) and half
+hyper edges (boxes), and measures allocations with tracemalloc. Nodes are not united, so they have no node group
+records, bytes per hyper edge include port maps and growth of input and output lists of connected nodes.
+
+Run from the repository root:
+    python -m MVP.refactored.benchmarks.memory_benchmark
+"""
+import gc
+import tracemalloc
+
+from MVP.refactored.backend.hypergraph.hyper_edge import HyperEdge
+from MVP.refactored.backend.hypergraph.node import Node
+
+SIZES = [10_000, 100_000, 1_000_000]
+
+
+def measure(element_count: int) -> tuple[float, float]:
+    """Return bytes per node and bytes per hyper edge."""
+    count = element_count // 2
+    gc.collect()
+    tracemalloc.start()
+
+    start = tracemalloc.get_traced_memory()[0]
+    nodes = [Node(node_id) for node_id in range(count)]
+    after_nodes = tracemalloc.get_traced_memory()[0]
+
+    hyper_edges = [HyperEdge(count + hyper_edge_id) for hyper_edge_id in range(count)]
+    for index, hyper_edge in enumerate(hyper_edges):
+        source = nodes[index]
+        hyper_edge.append_source_node(source)
+        source.append_output(hyper_edge)
+        if index + 1 < count:
+            target = nodes[index + 1]
+            hyper_edge.append_target_node(target)
+            target.append_input(hyper_edge)
+        hyper_edge.get_source_nodes()
+        hyper_edge.get_target_nodes()
+    after_hyper_edges = tracemalloc.get_traced_memory()[0]
+
+    tracemalloc.stop()
+    del nodes, hyper_edges
+    gc.collect()
+    return (after_nodes - start) / count, (after_hyper_edges - after_nodes) / count
+
+
+def main():
+    print(f"{'elements':>10} {'bytes/node':>11} {'bytes/hyper edge':>17}")
+    for element_count in SIZES:
+        node_bytes, hyper_edge_bytes = measure(element_count)
+        print(f"{element_count:>10} {node_bytes:>11.0f} {hyper_edge_bytes:>17.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Benchmark of the dataflow optimizer.
+
+Diagram takes one input and has `BRANCH_COUNT` branches. Every branch applies the pure `slow` box to the input
+twice, adds both results and feeds the sum to an output and to a chain of `DEAD_CHAIN` boxes whose result is not
+used. All applications of `slow` to the input are equal, so the optimized code calls it once. Code generated without
+and with the optimization report is run `CALL_COUNT` times.
+
+Run from the repository root:
+    python -m MVP.refactored.benchmarks.optimizer_benchmark
+"""
+import time
+from types import SimpleNamespace
+
+from MVP.refactored.backend.box_functions.box_function_registry import BoxFunctionRegistry
+from MVP.refactored.backend.code_generation.code_generation_cache import CodeGenerationCache
+from MVP.refactored.backend.code_generation.code_generator import CodeGenerator
+from MVP.refactored.backend.diagram_callback import Receiver
+from MVP.refactored.backend.hypergraph.hypergraph_manager import HypergraphManager
+from MVP.refactored.backend.hypergraph.hypergraph_registry import HypergraphRegistry
+from MVP.refactored.backend.types.connection_info import ConnectionInfo
+from MVP.refactored.backend.types.connection_side import ConnectionSide
+from MVP.refactored.frontend.windows.main_diagram import MainDiagram
+
+CANVAS_ID = 1
+BRANCH_COUNT = [5, 20, 50]
+DEAD_CHAIN = 3
+CALL_COUNT = 200
+
+
+def create_diagram(branch_count: int) -> SimpleNamespace:
+    receiver = Receiver()
+    diagram = receiver.add_new_canvas(CANVAS_ID)
+    diagram.add_input(ConnectionInfo(0, ConnectionSide.LEFT, 1))
+    source = HypergraphManager.create_new_node(1, CANVAS_ID)
+    ids = iter(range(2, 1_000_000))
+
+    def add_box(label: str, sources: list) -> object:
+        hyper_edge_id = next(ids)
+        for node in sources:
+            HypergraphManager.connect_node_with_output_hyper_edge(node, hyper_edge_id)
+        target = HypergraphManager.create_new_node(next(ids), CANVAS_ID)
+        HypergraphManager.connect_node_with_input_hyper_edge(target, hyper_edge_id).set_box_label(label)
+        return target
+
+    for branch in range(branch_count):
+        total = add_box("add", [add_box("slow", [source]), add_box("slow", [source])])
+        value = add_box("inc", [total])
+        for _ in range(DEAD_CHAIN):
+            value = add_box("slow", [value])
+        diagram.add_output(ConnectionInfo(branch, ConnectionSide.RIGHT, add_box("inc", [total]).id))
+    return SimpleNamespace(id=CANVAS_ID, receiver=receiver)
+
+
+def run_main(code: str) -> float:
+    namespace = {}
+    exec(compile(code, "diagram.py", "exec"), namespace)
+    start = time.perf_counter()
+    for value in range(CALL_COUNT):
+        namespace["main_0"](value)
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    MainDiagram.label_content = {
+        "slow": "def slow(x):\n    return sum(x * i for i in range(200))\n",
+        "add": "def add(a, b):\n    return a + b\n",
+        "inc": "def inc(x):\n    return x + 1\n"}
+    MainDiagram.label_metadata = {"slow": {"pure": True}}
+    BoxFunctionRegistry.invalidate()
+    print(f"{'branches':>8} {'removed':>8} {'optimize, ms':>13} {'plain run, ms':>14} {'optimized run, ms':>18}")
+    for branch_count in BRANCH_COUNT:
+        with HypergraphManager.use(HypergraphRegistry()):
+            CodeGenerationCache.clear()
+            canvas = create_diagram(branch_count)
+            start = time.perf_counter()
+            report = CodeGenerator.optimize(canvas)
+            optimize = (time.perf_counter() - start) * 1000
+            plain = run_main(CodeGenerator.generate_code(canvas))
+            optimized = run_main(CodeGenerator.generate_code(canvas, report=report))
+            print(f"{branch_count:>8} {len(report.get_removed_ids()):>8} {optimize:>13.1f} {plain:>14.1f} "
+                  f"{optimized:>18.1f}")
+
+
+if __name__ == "__main__":
+    main()
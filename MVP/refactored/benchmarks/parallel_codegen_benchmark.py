@@ -0,0 +1,48 @@
+"""
+Benchmark of code generation in a pool of processes.
+
+Projects of `codegen_benchmark` are generated without cached sections by `CodeGenerator.generate_code` and by
+`CodeGenerator.generate_code_in_parallel`, including the start of the pool. Generated code is checked to be the same.
+
+Run from the repository root:
+    python -m MVP.refactored.benchmarks.parallel_codegen_benchmark
+"""
+import os
+import time
+
+from MVP.refactored.backend.box_functions.box_function_registry import BoxFunctionRegistry
+from MVP.refactored.backend.code_generation.code_generation_cache import CodeGenerationCache
+from MVP.refactored.backend.code_generation.code_generator import CodeGenerator
+from MVP.refactored.backend.hypergraph.hypergraph_manager import HypergraphManager
+from MVP.refactored.backend.hypergraph.hypergraph_registry import HypergraphRegistry
+from MVP.refactored.benchmarks.codegen_benchmark import BOXES_PER_PIPELINE, FUNCTION_COUNT, create_project
+from MVP.refactored.frontend.windows.main_diagram import MainDiagram
+
+PIPELINE_COUNT = [50, 200, 1000]
+
+
+def measure(function, *args) -> tuple[float, str]:
+    CodeGenerationCache.clear()
+    start = time.perf_counter()
+    code = function(*args)
+    return (time.perf_counter() - start) * 1000, code
+
+
+def main():
+    MainDiagram.label_content = {
+        f"function_{i}": f"OFFSET = {i}\n\ndef function_{i}(x):\n    return x + OFFSET\n" for i in range(FUNCTION_COUNT)}
+    BoxFunctionRegistry.invalidate()
+    print(f"{os.cpu_count()} CPUs")
+    print(f"{'pipelines':>9} {'boxes':>6} {'serial, ms':>11} {'parallel, ms':>13} {'identical':>10}")
+    for pipeline_count in PIPELINE_COUNT:
+        with HypergraphManager.use(HypergraphRegistry()):
+            canvas = create_project(pipeline_count)
+            serial, serial_code = measure(CodeGenerator.generate_code, canvas)
+            parallel, parallel_code = measure(CodeGenerator.generate_code_in_parallel, canvas)
+        print(f"{pipeline_count:>9} {pipeline_count * BOXES_PER_PIPELINE:>6} {serial:>11.1f} {parallel:>13.1f}"
+              f" {str(serial_code == parallel_code):>10}")
+    CodeGenerationCache.clear()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Benchmark of HypergraphManager.remove_node/remove_hyper_edge latency.
+
+Builds a pipeline `input -> box -> wire -> box -> ... -> output` on one canvas and deletes the wire or the box
+in the middle of it, so the hypergraph splits into two hypergraphs.
+
+Run from the repository root:
+    python -m MVP.refactored.benchmarks.remove_benchmark
+"""
+import logging
+import time
+
+from MVP.refactored.backend.hypergraph.hyper_edge import HyperEdge
+from MVP.refactored.backend.hypergraph.hypergraph import Hypergraph
+from MVP.refactored.backend.hypergraph.hypergraph_manager import HypergraphManager
+from MVP.refactored.backend.hypergraph.node import Node
+
+CANVAS_ID = 0
+SIZES = [250, 500, 1000, 2000, 4000]
+REPEATS = 5
+
+
+def create_pipeline(box_count: int) -> tuple[list[Node], list[HyperEdge]]:
+    """Create and register a pipeline hypergraph with `box_count` boxes."""
+    nodes: list[Node] = [Node()]
+    hyper_edges: list[HyperEdge] = []
+    for _ in range(box_count):
+        hyper_edge = HyperEdge()
+        node = Node()
+        hyper_edge.append_source_node(nodes[-1])
+        nodes[-1].append_output(hyper_edge)
+        hyper_edge.append_target_node(node)
+        node.append_input(hyper_edge)
+        nodes.append(node)
+        hyper_edges.append(hyper_edge)
+
+    hypergraph = Hypergraph(canvas_id=CANVAS_ID)
+    hypergraph.add_hypergraph_source(nodes[0])
+    hypergraph.add_nodes(nodes[1:])
+    hypergraph.add_edges(hyper_edges)
+    HypergraphManager.add_hypergraph(hypergraph)
+    return nodes, hyper_edges
+
+
+def measure(box_count: int, remove_box: bool) -> float:
+    """Return the best latency of one delete in milliseconds."""
+    best = float("inf")
+    for _ in range(REPEATS):
+        HypergraphManager.clear()
+        nodes, hyper_edges = create_pipeline(box_count)
+        start = time.perf_counter()
+        if remove_box:
+            HypergraphManager.remove_hyper_edge(hyper_edges[box_count // 2].id)
+        else:
+            HypergraphManager.remove_node(nodes[box_count // 2].id)
+        best = min(best, time.perf_counter() - start)
+        assert len(HypergraphManager.hypergraphs) == 2
+    HypergraphManager.clear()
+    return best * 1000
+
+
+def main():
+    logging.disable(logging.DEBUG)
+    print(f"{'boxes':>8} {'remove wire, ms':>16} {'remove box, ms':>16}")
+    for box_count in SIZES:
+        print(f"{box_count:>8} {measure(box_count, False):>16.2f} {measure(box_count, True):>16.2f}")
+
+
+if __name__ == "__main__":
+    main()
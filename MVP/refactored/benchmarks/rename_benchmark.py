@@ -0,0 +1,66 @@
+"""
+Benchmark of renaming box functions for code generation.
+
+Box library of `HELPER_COUNT` helper functions and as many global variables is renamed with the index of the box
+function. Renaming every name separately, which parses, transforms and converts every snippet back to source once per
+name, is measured as reference for the single pass rename of `CodeInspector.rename_box_function`.
+
+Run from the repository root:
+    python -m MVP.refactored.benchmarks.rename_benchmark
+"""
+import time
+
+from MVP.refactored.backend.box_functions.box_function import BoxFunction
+from MVP.refactored.backend.code_generation.code_inspector import CodeInspector
+
+SIZES = [10, 50, 100, 200]
+REPEATS = 3
+
+
+def create_box_library(helper_count: int) -> BoxFunction:
+    """Create box function whose main function calls all helpers and every helper uses one global variable."""
+    code = [f"LIMIT_{i} = {i}" for i in range(helper_count)]
+    for i in range(helper_count):
+        code.append(f"def helper_{i}(x):\n    return min(x, LIMIT_{i}) + 1")
+    calls = " + ".join(f"helper_{i}(x)" for i in range(helper_count))
+    code.append(f"def library(x):\n    return {calls}")
+    return BoxFunction(main_function_name="library", file_code="\n\n".join(code) + "\n")
+
+
+def rename_name_by_name(box_function: BoxFunction, names: set[str], index: int):
+    """Rename every name in every snippet separately."""
+    renamer = CodeInspector()
+    global_statements = list(box_function.global_statements)
+    helper_functions = list(box_function.helper_functions)
+    main_function = box_function.main_function
+    for name in names:
+        new_name = f"{name}_{index}"
+        global_statements = [renamer.refactor_code(statement, name, new_name) for statement in global_statements]
+        helper_functions = [renamer.refactor_code(helper, name, new_name) for helper in helper_functions]
+        main_function = renamer.refactor_code(main_function, name, new_name)
+    return global_statements, helper_functions, main_function
+
+
+def measure(function, *args) -> float:
+    best = float("inf")
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        function(*args)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    print(f"{'helpers':>7} {'names':>6} {'name by name, ms':>17} {'single pass, ms':>16} {'speedup':>8}")
+    for size in SIZES:
+        box_function = create_box_library(size)
+        names = set(CodeInspector.get_names(box_function.global_statements)
+                    + CodeInspector.get_names(box_function.helper_functions)) | {box_function.main_function_name}
+        name_by_name = measure(rename_name_by_name, box_function, names, 0)
+        single_pass = measure(CodeInspector.rename_box_function, box_function, names, 0)
+        print(f"{size:>7} {len(names):>6} {name_by_name:>17.1f} {single_pass:>16.1f}"
+              f" {name_by_name / single_pass:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
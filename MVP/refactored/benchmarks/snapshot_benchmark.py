@@ -0,0 +1,80 @@
+"""
+Benchmark of HypergraphSnapshot against JSON export of HypergraphExporter.
+
+Builds `GRAPH_COUNT` independent pipelines `wire -> box -> wire -> ...` and measures writing the JSON export
+(`Hypergraph.to_dict` with indent=4, as `HypergraphExporter.create_file_content` does), writing the binary snapshot,
+reading it from a memory-mapped file, diffing two snapshots and restoring hypergraphs into an empty registry.
+
+Run from the repository root:
+    python -m MVP.refactored.benchmarks.snapshot_benchmark
+"""
+import json
+import os
+import tempfile
+import time
+
+from MVP.refactored.backend.hypergraph.hypergraph_manager import HypergraphManager
+from MVP.refactored.backend.hypergraph.hypergraph_registry import HypergraphRegistry
+from MVP.refactored.backend.hypergraph.hypergraph_snapshot import HypergraphSnapshot
+
+CANVAS_ID = 0
+GRAPH_COUNT = 10
+SIZES = [1000, 10000, 50000]
+REPEATS = 3
+
+
+def create_pipelines(element_count: int) -> HypergraphRegistry:
+    """Create pipelines with `element_count` wires in total in a new registry."""
+    registry = HypergraphRegistry()
+    with HypergraphManager.use(registry):
+        next_id = 0
+        for _ in range(GRAPH_COUNT):
+            node = HypergraphManager.create_new_node(next_id, CANVAS_ID)
+            for _ in range(element_count // GRAPH_COUNT - 1):
+                HypergraphManager.connect_node_with_output_hyper_edge(node, next_id + 1)
+                node = HypergraphManager.create_new_node(next_id + 2, CANVAS_ID)
+                HypergraphManager.connect_node_with_input_hyper_edge(node, next_id + 1)
+                next_id += 2
+            next_id += 1
+    return registry
+
+
+def measure(function, *args) -> float:
+    """Return the best time of the call in milliseconds."""
+    best = float("inf")
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        function(*args)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    print(f"{'wires':>7} {'json, ms':>9} {'json, KB':>9} {'write, ms':>10} {'snapshot, KB':>13} {'read, ms':>9}"
+          f" {'diff, ms':>9} {'restore, ms':>12}")
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "snapshot.hgs")
+        for element_count in SIZES:
+            registry = create_pipelines(element_count)
+            hypergraphs = registry.hypergraphs
+
+            def export_json() -> str:
+                return json.dumps({"hypergraphs": [graph.to_dict() for graph in hypergraphs]}, indent=4)
+
+            def write_snapshot():
+                HypergraphSnapshot.from_hypergraphs(hypergraphs).write(path)
+
+            json_time = measure(export_json)
+            json_size = len(export_json()) / 1024
+            write_time = measure(write_snapshot)
+            snapshot_size = os.path.getsize(path) / 1024
+            read_time = measure(HypergraphSnapshot.read, path)
+            snapshot = HypergraphSnapshot.read(path)
+            diff_time = measure(snapshot.diff, HypergraphSnapshot.read(path))
+            restore_time = measure(lambda: snapshot.restore(HypergraphRegistry()))
+            print(f"{element_count:>7} {json_time:>9.1f} {json_size:>9.0f} {write_time:>10.1f} {snapshot_size:>13.0f}"
+                  f" {read_time:>9.3f} {diff_time:>9.3f} {restore_time:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
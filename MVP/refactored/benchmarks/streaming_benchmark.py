@@ -0,0 +1,68 @@
+"""
+Benchmark of the streaming pipeline runtime.
+
+Chain of `STAGE_COUNT` boxes, which wait `BOX_SECONDS` like boxes doing I/O, processes `ITEM_COUNT` values.
+`DataflowExecutor` runs the chain value by value, `StreamingPipeline` runs every box in its own stage, so stages
+overlap. Throughput counters of the stages are printed for the largest queue size.
+
+Run from the repository root:
+    python -m MVP.refactored.benchmarks.streaming_benchmark
+"""
+import time
+
+from MVP.refactored.backend.box_functions.box_function_registry import BoxFunctionRegistry
+from MVP.refactored.backend.diagram_callback import Receiver
+from MVP.refactored.backend.execution.dataflow_executor import DataflowExecutor
+from MVP.refactored.backend.execution.streaming_pipeline import StreamingPipeline
+from MVP.refactored.backend.hypergraph.hypergraph_manager import HypergraphManager
+from MVP.refactored.backend.hypergraph.hypergraph_registry import HypergraphRegistry
+from MVP.refactored.backend.types.connection_info import ConnectionInfo
+from MVP.refactored.backend.types.connection_side import ConnectionSide
+from MVP.refactored.frontend.windows.main_diagram import MainDiagram
+
+CANVAS_ID = 1
+STAGE_COUNT = 4
+ITEM_COUNT = 500
+QUEUE_SIZES = [1, 8, 64]
+BOX_SECONDS = 0.001
+
+
+def create_chain() -> Receiver:
+    receiver = Receiver()
+    diagram = receiver.add_new_canvas(CANVAS_ID)
+    diagram.add_input(ConnectionInfo(0, ConnectionSide.LEFT, 0))
+    node = HypergraphManager.create_new_node(0, CANVAS_ID)
+    for index in range(STAGE_COUNT):
+        hyper_edge_id = 2 * index + 1
+        HypergraphManager.connect_node_with_output_hyper_edge(node, hyper_edge_id).set_box_label("wait")
+        node = HypergraphManager.create_new_node(hyper_edge_id + 1, CANVAS_ID)
+        HypergraphManager.connect_node_with_input_hyper_edge(node, hyper_edge_id)
+    diagram.add_output(ConnectionInfo(0, ConnectionSide.RIGHT, node.id))
+    return receiver
+
+
+def measure(function, *args) -> float:
+    start = time.perf_counter()
+    function(*args)
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    MainDiagram.label_content = {"wait": f"import time\n\ndef wait(x):\n    time.sleep({BOX_SECONDS})\n    return x\n"}
+    BoxFunctionRegistry.invalidate()
+    with HypergraphManager.use(HypergraphRegistry()):
+        receiver = create_chain()
+        executor = DataflowExecutor(receiver, CANVAS_ID)
+        print(f"{STAGE_COUNT} stages, {ITEM_COUNT} values")
+        print(f"value by value: {measure(lambda: [executor.run([value]) for value in range(ITEM_COUNT)]):.1f} ms")
+        pipeline = None
+        for queue_size in QUEUE_SIZES:
+            pipeline = StreamingPipeline(receiver, CANVAS_ID, queue_size=queue_size)
+            print(f"pipeline, queue size {queue_size}: "
+                  f"{measure(lambda: list(pipeline.run([range(ITEM_COUNT)]))):.1f} ms")
+        for hyper_edge_id, statistics in pipeline.stage_statistics.items():
+            print(f"stage {hyper_edge_id}: {statistics.get_throughput():.0f} values/s busy, {statistics}")
+
+
+if __name__ == "__main__":
+    main()
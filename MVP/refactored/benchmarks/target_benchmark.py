@@ -0,0 +1,94 @@
+"""
+Benchmark of Hypergraph.get_hypergraph_target on stacked diamonds.
+
+Every diamond is `node -> box -> left, node -> box -> right, (left, right) -> box -> next node`, so the last node
+is reachable through 2^k paths. Traversal of all paths from sources, which was used before hypergraph targets were
+maintained incrementally, is measured as reference for small diagrams only.
+
+Run from the repository root:
+    python -m MVP.refactored.benchmarks.target_benchmark
+"""
+import time
+from queue import Queue
+
+from MVP.refactored.backend.hypergraph.hypergraph import Hypergraph
+from MVP.refactored.backend.hypergraph.hypergraph_manager import HypergraphManager
+from MVP.refactored.backend.hypergraph.node import Node
+
+CANVAS_ID = 0
+SIZES = [4, 8, 12, 16, 1000, 10000]
+MAX_TRAVERSAL_SIZE = 16
+REPEATS = 5
+
+
+def create_stacked_diamonds(diamond_count: int) -> Hypergraph:
+    """Create stacked diamonds through HypergraphManager and return the resulting hypergraph."""
+    next_id = 0
+
+    def new_id() -> int:
+        nonlocal next_id
+        next_id += 1
+        return next_id
+
+    node = HypergraphManager.create_new_node(new_id(), CANVAS_ID)
+    first_node_id = node.id
+    for _ in range(diamond_count):
+        join_box = new_id()
+        for _ in range(2):
+            box = new_id()
+            HypergraphManager.connect_node_with_output_hyper_edge(node, box)
+            branch = HypergraphManager.create_new_node(new_id(), CANVAS_ID)
+            HypergraphManager.connect_node_with_input_hyper_edge(branch, box)
+            HypergraphManager.connect_node_with_output_hyper_edge(branch, join_box)
+        node = HypergraphManager.create_new_node(new_id(), CANVAS_ID)
+        HypergraphManager.connect_node_with_input_hyper_edge(node, join_box)
+    return HypergraphManager.get_graph_by_node_id(first_node_id)
+
+
+def traverse_targets(hypergraph: Hypergraph) -> list[Node]:
+    """Targets found by traversing all paths from sources without visited set."""
+    queue = Queue()
+    target_nodes: dict[int, Node] = dict()
+    for node in hypergraph.get_hypergraph_source():
+        queue.put(node)
+    while not queue.empty():
+        node = queue.get()
+        output_hyper_edges = node.get_output_hyper_edges()
+        if len(output_hyper_edges) == 0:
+            target_nodes[node.id] = node
+        for output_hyper_edge in output_hyper_edges:
+            for target_node in output_hyper_edge.get_target_nodes():
+                queue.put(target_node)
+    return list(target_nodes.values())
+
+
+def measure(function, *args) -> float:
+    """Return the best time of the call in milliseconds."""
+    best = float("inf")
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        function(*args)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    print(f"{'diamonds':>9} {'build, ms':>10} {'get_hypergraph_target, ms':>26} {'path traversal, ms':>19}")
+    for diamond_count in SIZES:
+        HypergraphManager.clear()
+        start = time.perf_counter()
+        hypergraph = create_stacked_diamonds(diamond_count)
+        build = (time.perf_counter() - start) * 1000
+        assert len(hypergraph.get_hypergraph_target()) == 1
+
+        targets = measure(hypergraph.get_hypergraph_target)
+        traversal = "-"
+        if diamond_count <= MAX_TRAVERSAL_SIZE:
+            assert traverse_targets(hypergraph) == hypergraph.get_hypergraph_target()
+            traversal = f"{measure(traverse_targets, hypergraph):.3f}"
+        print(f"{diamond_count:>9} {build:>10.1f} {targets:>26.4f} {traversal:>19}")
+    HypergraphManager.clear()
+
+
+if __name__ == "__main__":
+    main()
@@ -846,10 +846,12 @@ class Box:
 
         :return: None
         """
+        from MVP.refactored.frontend.windows.main_diagram import MainDiagram
         with open(const.FUNCTIONS_CONF, "r") as file:
             data = json.load(file)
-            for label, code in data.items():
+            for label, entry in data.items():
                 if label == self.label_text:
+                    code, _ = MainDiagram.read_function_entry(entry)
                     inputs_amount, outputs_amount = self.get_input_output_amount_off_code(code)
                     if inputs_amount > self.left_connections:
                         for i in range(inputs_amount - self.left_connections):
@@ -8,6 +8,7 @@ from ttkbootstrap.constants import *
 
 import constants as const
 from MVP.refactored.backend.box_functions.box_function import BoxFunction
+from MVP.refactored.backend.box_functions.box_function_registry import BoxFunctionRegistry
 from MVP.refactored.backend.id_generator import IdGenerator
 from MVP.refactored.backend.types.ActionType import ActionType
 from MVP.refactored.backend.types.connection_side import ConnectionSide
@@ -865,8 +866,7 @@ class CustomCanvas(tk.Canvas):
         """
         box = self.get_box_by_id(box_id)
         if box:
-            return BoxFunction(main_function_name=box.label_text,
-                               file_code=self.main_diagram.label_content[box.label_text])
+            return BoxFunctionRegistry.get(box.label_text, self.main_diagram.label_content[box.label_text])
         return None
 
     def add_spider(self, loc=(100, 100), id_=None, connection_type=ConnectionType.GENERIC):
@@ -157,7 +157,11 @@ class CodeEditor:
         if os.stat(const.FUNCTIONS_CONF).st_size != 0:
             with open(const.FUNCTIONS_CONF, "r+") as file:
                 existing_json = json.load(file)
-                existing_json[self.label] = self.code_view.get('1.0', tk.END).strip()
+                code = self.code_view.get('1.0', tk.END).strip()
+                if isinstance(existing_json.get(self.label), dict):
+                    existing_json[self.label]["code"] = code  # keep metadata of the function
+                else:
+                    existing_json[self.label] = code
                 json_object = json.dumps(existing_json, indent=4)
                 file.seek(0)
                 file.truncate(0)
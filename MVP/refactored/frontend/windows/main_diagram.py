@@ -16,6 +16,7 @@ from ttkbootstrap.constants import *
 
 import constants as const
 import tikzplotlib
+from MVP.refactored.backend.box_functions.box_function_registry import BoxFunctionRegistry
 from MVP.refactored.backend.code_generation.code_generator import CodeGenerator
 from MVP.refactored.backend.hypergraph.hypergraph import Hypergraph
 from MVP.refactored.backend.hypergraph.hypergraph_manager import HypergraphManager
@@ -43,6 +44,7 @@ class MainDiagram(tk.Tk):
     """
 
     label_content = {}
+    label_metadata = {}  # metadata of functions stored alongside their code, e.g. {"cacheable": True}
 
     def __init__(self, receiver, load=False):
         """
@@ -216,25 +218,65 @@ class MainDiagram(tk.Tk):
         """
         if os.stat(const.FUNCTIONS_CONF).st_size != 0:
             with open(const.FUNCTIONS_CONF, "r") as file:
-                MainDiagram.label_content = json.load(file)
+                entries = json.load(file)
+            MainDiagram.label_content = {}
+            MainDiagram.label_metadata = {}
+            for label, entry in entries.items():
+                code, metadata = MainDiagram.read_function_entry(entry)
+                MainDiagram.label_content[label] = code
+                if metadata:
+                    MainDiagram.label_metadata[label] = metadata
+            BoxFunctionRegistry.invalidate()
+
+    @staticmethod
+    def read_function_entry(entry):
+        """
+        Read an entry of the functions configuration.
+
+        Entry is the code of the function or, for a function with metadata, a dictionary holding the code under
+        "code" and metadata such as "cacheable" next to it.
+
+        :param entry: String or dictionary from the functions configuration.
+        :return: Tuple of the code and the dictionary of metadata.
+        """
+        if isinstance(entry, dict):
+            metadata = dict(entry)
+            return metadata.pop("code", ""), metadata
+        return entry, {}
+
+    @staticmethod
+    def get_functions_conf():
+        """
+        Return functions in the form of the functions configuration.
+
+        :return: Dictionary of labels and entries, see `read_function_entry`.
+        """
+        return {label: {"code": code, **MainDiagram.label_metadata[label]} if MainDiagram.label_metadata.get(label)
+                else code for label, code in MainDiagram.label_content.items()}
 
     @staticmethod
     def add_function(function_label, function_code):
         """
         Add function to the application.
 
-        Adds a function to the `label_content` dictionary.
+        Adds a function to the `label_content` dictionary, shared BoxFunctions of the previous code are dropped.
 
         :param function_label: Name of the function.
         :param function_code: Code of the function.
         :return: None
         """
+        if MainDiagram.label_content.get(function_label) != function_code:
+            BoxFunctionRegistry.invalidate(function_label)
         MainDiagram.label_content[function_label] = function_code
 
     @staticmethod
     def get_function(function_name):
         return MainDiagram.label_content.get(function_name, None)
 
+    @staticmethod
+    def get_function_metadata(function_name):
+        return MainDiagram.label_metadata.get(function_name, {})
+
     def generate_code(self):
         """
         Generate code based on diagram.
@@ -366,6 +408,9 @@ class MainDiagram(tk.Tk):
             code = MainDiagram.get_function(old_label)
             MainDiagram.add_function(new_label, code)
             del MainDiagram.label_content[old_label]
+            if old_label in MainDiagram.label_metadata:
+                MainDiagram.label_metadata[new_label] = MainDiagram.label_metadata.pop(old_label)
+            BoxFunctionRegistry.invalidate(old_label)
             for canvas in self.canvasses.values():
                 for box in canvas.boxes:
                     if box.label_text == old_label:
@@ -5,6 +5,7 @@ from tkinter import simpledialog, messagebox, filedialog
 import ttkbootstrap as ttk
 
 import constants as const
+from MVP.refactored.backend.box_functions.box_function_registry import BoxFunctionRegistry
 from MVP.refactored.frontend.windows.code_editor import CodeEditor
 
 
@@ -151,8 +152,10 @@ class ManageMethods(tk.Toplevel):
         label = self.table.item(self.table.focus())["text"]
         item = self.table.selection()[0]
         del self.main_diagram.label_content[label]
+        self.main_diagram.label_metadata.pop(label, None)
+        BoxFunctionRegistry.invalidate(label)
         self.table.delete(item)
-        self.write_to_json(self.main_diagram.label_content)
+        self.write_to_json(self.main_diagram.get_functions_conf())
         for canvas in self.main_diagram.canvasses.values():
             for box in canvas.boxes:
                 if box.label_text == label:
@@ -182,7 +185,7 @@ class ManageMethods(tk.Toplevel):
             if new_label:
                 self.main_diagram.change_function_label(label, new_label)
                 self.add_methods()
-                self.write_to_json(self.main_diagram.label_content)
+                self.write_to_json(self.main_diagram.get_functions_conf())
 
     @staticmethod
     def write_to_json(content):
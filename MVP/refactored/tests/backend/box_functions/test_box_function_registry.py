@@ -0,0 +1,95 @@
+from unittest import TestCase
+from unittest.mock import patch
+
+from MVP.refactored.backend.box_functions.box_function import BoxFunction
+from MVP.refactored.backend.box_functions.box_function_registry import BoxFunctionRegistry
+
+add = '''
+import math
+
+def add(a, b):
+    return a + b
+'''
+
+add_changed = '''
+def add(a, b):
+    return b + a
+'''
+
+copy = '''
+def copy(x) -> list:
+    return [x, x]
+'''
+
+
+class TestBoxFunctionRegistry(TestCase):
+    def setUp(self):
+        BoxFunctionRegistry.invalidate()
+
+    def tearDown(self):
+        BoxFunctionRegistry.invalidate()
+
+    def test_same_source_is_analyzed_once(self):
+        with patch.object(BoxFunction, "_set_data_from_file_code", autospec=True,
+                          side_effect=BoxFunction._set_data_from_file_code) as analyze:
+            box_functions = [BoxFunctionRegistry.get("add", add) for _ in range(500)]
+
+        self.assertEqual(1, analyze.call_count)
+        self.assertTrue(all(box_function is box_functions[0] for box_function in box_functions))
+
+    def test_shared_function_equals_new_function(self):
+        shared = BoxFunctionRegistry.get("add", add)
+        new = BoxFunction(main_function_name="add", file_code=add)
+
+        self.assertEqual(new, shared)
+        self.assertEqual(hash(new), hash(shared))
+        self.assertEqual(("import math\n",), shared.imports)
+
+    def test_shared_function_is_frozen(self):
+        shared = BoxFunctionRegistry.get("copy", copy)
+
+        with self.assertRaises(AttributeError):
+            shared.main_function = "def copy(x):\n    return x\n"
+
+    def test_shared_function_structure_is_frozen(self):
+        shared = BoxFunctionRegistry.get("add", add)
+        structure = shared.function_structure
+
+        with self.assertRaises(AttributeError):
+            structure.arguments.append("c")
+        with self.assertRaises(TypeError):
+            structure.return_line.assigned_value.elements[0] = None
+
+        self.assertEqual(("a", "b"), structure.arguments)
+        self.assertIs(structure, shared.function_structure)
+        self.assertEqual(BoxFunction(main_function_name="add", file_code=add).function_structure, structure)
+
+    def test_key_contains_source_hash(self):
+        shared = BoxFunctionRegistry.get("add", add)
+        changed = BoxFunctionRegistry.get("add", add_changed)
+
+        self.assertIsNot(shared, changed)
+        self.assertIn("b + a", changed.main_function)
+        self.assertIs(shared, BoxFunctionRegistry.get("add", add))
+
+    def test_invalidate_label(self):
+        shared_add = BoxFunctionRegistry.get("add", add)
+        shared_copy = BoxFunctionRegistry.get("copy", copy)
+
+        BoxFunctionRegistry.invalidate("add")
+
+        self.assertIsNot(shared_add, BoxFunctionRegistry.get("add", add))
+        self.assertIs(shared_copy, BoxFunctionRegistry.get("copy", copy))
+
+    def test_missing_main_function_is_not_cached(self):
+        with self.assertRaises(ValueError):
+            BoxFunctionRegistry.get("subtract", add)
+        self.assertEqual({}, BoxFunctionRegistry.functions)
+
+    def test_callable_is_compiled_once_per_source(self):
+        function = BoxFunctionRegistry.get_callable("add", add)
+
+        self.assertEqual(5, function(2, 3))
+        self.assertIs(function, BoxFunctionRegistry.get_callable("add", add))
+        BoxFunctionRegistry.invalidate("add")
+        self.assertIsNot(function, BoxFunctionRegistry.get_callable("add", add))
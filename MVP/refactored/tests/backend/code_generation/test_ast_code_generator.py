@@ -0,0 +1,71 @@
+import ast
+from types import SimpleNamespace
+from unittest import TestCase
+from unittest.mock import patch
+
+import autopep8
+
+from MVP.refactored.backend.code_generation.ast_code_generator import AstCodeGenerator
+from MVP.refactored.backend.code_generation.code_generator import CodeGenerator
+from MVP.refactored.backend.diagram_callback import Receiver
+from MVP.refactored.backend.hypergraph.hypergraph_manager import HypergraphManager
+from MVP.refactored.backend.hypergraph.hypergraph_registry import HypergraphRegistry
+from MVP.refactored.tests.backend.diagram_builder import build_diagram, use_box_functions
+
+CANVAS_ID = 1
+FUNCTIONS = {
+    "inc": "import math\n\ndef inc(x):\n    return x + 1\n",
+    "double": "FACTOR = 2\n\ndef double(x):\n    return helper(x)\n\ndef helper(x):\n    return x * FACTOR\n",
+    "split": "import math\n\ndef split(x):\n    return x, -x\n",
+    "add": "def add(a, b):\n    return a + b\n",
+}
+
+
+class TestAstCodeGenerator(TestCase):
+    def setUp(self):
+        use_box_functions(self, FUNCTIONS)
+        self.enterContext(HypergraphManager.use(HypergraphRegistry()))
+
+        # input_0 -> inc -> split, split[0] -> output_0, split[1] -> double -> output_1
+        # (input_1, input_2) -> add -> output_2
+        self.receiver = Receiver()
+        self.canvas = SimpleNamespace(id=CANVAS_ID, receiver=self.receiver)
+        build_diagram(self.receiver, ((100, "inc", (1,), (2,)), (101, "split", (2,), (3, 4)),
+                                      (102, "double", (4,), (5,)), (110, "add", (10, 11), (12,))),
+                      inputs=(1, 10, 11), outputs=(3, 5, 12))
+
+    def test_module_runs_like_generated_code(self):
+        code_namespace = {}
+        exec(compile(CodeGenerator.generate_code(self.canvas), "diagram.py", "exec"), code_namespace)
+        module_namespace = {}
+        exec(AstCodeGenerator.compile_code(self.canvas), module_namespace)
+
+        for name, arguments in (("main_0", (3,)), ("main_1", (3, 4))):
+            self.assertEqual(code_namespace[name](*arguments), module_namespace[name](*arguments))
+        self.assertEqual((4, -8), module_namespace["main_0"](3))
+        self.assertEqual(7, module_namespace["main_1"](3, 4))
+
+    def test_main_function_is_built_from_nodes(self):
+        code = AstCodeGenerator.generate_code(self.canvas)
+
+        self.assertIn("def main_0(input_0):\n"
+                      "    res_0 = inc_2(input_0)\n"
+                      "    res_1 = split_3(res_0)\n"
+                      "    res_2 = double_1(res_1[1])\n"
+                      "    return (res_1[0], res_2)\n", code)
+        self.assertIn("def main_1(input_0, input_1):\n    res_0 = add_0(input_0, input_1)\n    return res_0\n", code)
+
+    def test_equal_imports_are_added_once(self):
+        module = AstCodeGenerator.build_module(self.canvas)
+
+        imports = [statement for statement in module.body if isinstance(statement, ast.Import)]
+        self.assertEqual(["import math"], [ast.unparse(statement) for statement in imports])
+
+    def test_no_formatter_runs(self):
+        AstCodeGenerator.build_module(self.canvas)  # box functions are analyzed once, with autopep8
+
+        with patch.object(autopep8, "fix_code") as fix_code:
+            AstCodeGenerator.compile_code(self.canvas)
+            AstCodeGenerator.generate_code(self.canvas)
+
+        fix_code.assert_not_called()
@@ -0,0 +1,126 @@
+from types import SimpleNamespace
+from unittest import TestCase
+from unittest.mock import patch
+
+from MVP.refactored.backend.code_generation.code_generator import CodeGenerator
+from MVP.refactored.backend.code_generation.code_inspector import CodeInspector
+from MVP.refactored.backend.diagram_callback import Receiver
+from MVP.refactored.backend.hypergraph.hypergraph_manager import HypergraphManager
+from MVP.refactored.backend.hypergraph.hypergraph_registry import HypergraphRegistry
+from MVP.refactored.backend.types.connection_info import ConnectionInfo
+from MVP.refactored.backend.types.connection_side import ConnectionSide
+from MVP.refactored.frontend.windows.main_diagram import MainDiagram
+from MVP.refactored.tests.backend.diagram_builder import use_box_functions
+
+CANVAS_ID = 1
+FUNCTIONS = {
+    "inc": "import math\n\ndef inc(x):\n    return x + 1\n",
+    "double": "FACTOR = 2\n\ndef double(x):\n    return helper(x)\n\ndef helper(x):\n    return x * FACTOR\n",
+    "negate": "def negate(x):\n    return -x\n",
+}
+
+
+def _create_pipeline(receiver: Receiver, index: int, labels: list[str]):
+    """Create `input -> box -> wire -> box -> ... -> output` with diagram input and output of the given index."""
+    base = 1000 * (index + 1)
+    diagram = receiver.diagrams[CANVAS_ID]
+    diagram.add_input(ConnectionInfo(index, ConnectionSide.LEFT, base))
+    diagram.add_output(ConnectionInfo(index, ConnectionSide.RIGHT, base + 1))
+    node = HypergraphManager.create_new_node(base, CANVAS_ID)
+    for position, label in enumerate(labels):
+        hyper_edge = HypergraphManager.connect_node_with_output_hyper_edge(node, base + 100 + position)
+        hyper_edge.set_box_label(label)
+        node = HypergraphManager.create_new_node(base + 10 + position, CANVAS_ID)
+        HypergraphManager.connect_node_with_input_hyper_edge(node, base + 100 + position)
+    output = HypergraphManager.create_new_node(base + 1, CANVAS_ID)
+    HypergraphManager.union_nodes(output, node.id)
+
+
+class TestCodeGenerationCache(TestCase):
+    def setUp(self):
+        use_box_functions(self, FUNCTIONS)
+        self.registry = self.enterContext(HypergraphManager.use(HypergraphRegistry()))
+
+        self.receiver = Receiver()
+        self.receiver.add_new_canvas(CANVAS_ID)
+        self.canvas = SimpleNamespace(id=CANVAS_ID, receiver=self.receiver)
+        for index in range(3):
+            _create_pipeline(self.receiver, index, ["inc", "double"])
+
+    def test_generated_code_runs(self):
+        code = CodeGenerator.generate_code(self.canvas)
+
+        namespace = {}
+        exec(compile(code, "diagram.py", "exec"), namespace)
+        for index in range(3):
+            self.assertEqual(8, namespace[f"main_{index}"](3))
+        self.assertEqual(1, code.count("import math"))
+        self.assertEqual(1, code.count("FACTOR_0 = 2"))
+
+    def test_generated_code_layout(self):
+        # sections are formatted separately and joined with two blank lines, the layout differs from formatting
+        # the whole file at once, e.g. imports are not separated by blank lines
+        self.assertEqual("import math\n"
+                         "FACTOR_0 = 2\n"
+                         "\n\n"
+                         "def helper_0(x):\n"
+                         "    return x * FACTOR_0\n"
+                         "\n\n"
+                         "def double_0(x):\n"
+                         "    return helper_0(x)\n"
+                         "\n\n"
+                         "def inc_1(x):\n"
+                         "    return x + 1\n"
+                         + "".join(f"\n\n"
+                                   f"def main_{index}(input_0):\n"
+                                   f"    res_0 = inc_1(input_0)\n"
+                                   f"    res_1 = double_0(res_0)\n"
+                                   f"    return res_1\n" for index in range(3)),
+                         CodeGenerator.generate_code(self.canvas))
+
+    def test_regeneration_without_changes_reuses_all_sections(self):
+        code = CodeGenerator.generate_code(self.canvas)
+
+        with patch.object(CodeInspector, "rename_sources") as rename, \
+                patch.object(CodeGenerator, "construct_main_function") as construct:
+            self.assertEqual(code, CodeGenerator.generate_code(self.canvas))
+
+        rename.assert_not_called()
+        construct.assert_not_called()
+        self.assertEqual(0, self.registry.code_generation_caches[CANVAS_ID].misses)
+
+    def test_one_box_edit_rebuilds_only_its_main_function(self):
+        CodeGenerator.generate_code(self.canvas)
+        self.registry.get_hyper_edge_by_id(2101).set_box_label("negate")
+
+        with patch.object(CodeGenerator, "construct_main_function",
+                          wraps=CodeGenerator.construct_main_function) as construct:
+            code = CodeGenerator.generate_code(self.canvas)
+
+        self.assertEqual(1, construct.call_count)
+        self.assertIs(self.registry.get_graph_by_node_id(2000), construct.call_args.args[0])
+        namespace = {}
+        exec(compile(code, "diagram.py", "exec"), namespace)
+        results = sorted(namespace[f"main_{index}"](3) for index in range(3))
+        self.assertEqual([-4, 8, 8], results)
+
+    def test_changed_function_code_is_renamed_again(self):
+        CodeGenerator.generate_code(self.canvas)
+        MainDiagram.add_function("inc", "def inc(x):\n    return x + 10\n")
+
+        code = CodeGenerator.generate_code(self.canvas)
+
+        namespace = {}
+        exec(compile(code, "diagram.py", "exec"), namespace)
+        self.assertEqual(26, namespace["main_0"](3))
+        self.assertNotIn("import math", code)
+
+    def test_cache_keeps_only_sections_of_last_generation(self):
+        CodeGenerator.generate_code(self.canvas)
+        MainDiagram.add_function("inc", "def inc(x):\n    return x + 10\n")
+        CodeGenerator.generate_code(self.canvas)
+
+        cache = self.registry.code_generation_caches[CANVAS_ID]
+        self.assertEqual(2, len(cache.sections["renamed"]))
+        self.assertEqual(3, len(cache.sections["main"]))
+        self.assertIsNone(cache.previous)
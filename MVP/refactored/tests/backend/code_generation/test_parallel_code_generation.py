@@ -0,0 +1,65 @@
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from unittest import TestCase
+from unittest.mock import MagicMock
+
+from MVP.refactored.backend.code_generation.code_generation_cache import CodeGenerationCache
+from MVP.refactored.backend.code_generation.code_generator import CodeGenerator
+from MVP.refactored.backend.diagram_callback import Receiver
+from MVP.refactored.backend.hypergraph.hypergraph_manager import HypergraphManager
+from MVP.refactored.backend.hypergraph.hypergraph_registry import HypergraphRegistry
+from MVP.refactored.backend.types.connection_info import ConnectionInfo
+from MVP.refactored.backend.types.connection_side import ConnectionSide
+from MVP.refactored.tests.backend.diagram_builder import use_box_functions
+
+CANVAS_ID = 1
+FUNCTION_COUNT = 8
+FUNCTIONS = {f"function_{i}": f"import math\n\nOFFSET = {i}\n\ndef function_{i}(x):\n    return helper(x) + OFFSET\n"
+                              f"\n\ndef helper(x):\n    return x * {i}\n" for i in range(FUNCTION_COUNT)}
+
+
+class TestParallelCodeGeneration(TestCase):
+    def setUp(self):
+        use_box_functions(self, FUNCTIONS)
+        self.enterContext(HypergraphManager.use(HypergraphRegistry()))
+
+        receiver = Receiver()
+        diagram = receiver.add_new_canvas(CANVAS_ID)
+        self.canvas = SimpleNamespace(id=CANVAS_ID, receiver=receiver)
+        for index in range(12):
+            base = 1000 * (index + 1)
+            diagram.add_input(ConnectionInfo(index, ConnectionSide.LEFT, base))
+            diagram.add_output(ConnectionInfo(index, ConnectionSide.RIGHT, base + 1))
+            node = HypergraphManager.create_new_node(base, CANVAS_ID)
+            for position in range(3):
+                hyper_edge = HypergraphManager.connect_node_with_output_hyper_edge(node, base + 100 + position)
+                hyper_edge.set_box_label(f"function_{(index + position) % FUNCTION_COUNT}")
+                node = HypergraphManager.create_new_node(base + 10 + position, CANVAS_ID)
+                HypergraphManager.connect_node_with_input_hyper_edge(node, base + 100 + position)
+            HypergraphManager.union_nodes(HypergraphManager.create_new_node(base + 1, CANVAS_ID), node.id)
+
+    def test_code_generated_in_process_pool_is_identical(self):
+        serial = CodeGenerator.generate_code(self.canvas)
+        CodeGenerationCache.clear()
+
+        parallel = CodeGenerator.generate_code_in_parallel(self.canvas, max_workers=2)
+
+        self.assertEqual(serial, parallel)
+        namespace = {}
+        exec(compile(parallel, "diagram.py", "exec"), namespace)
+        self.assertEqual(4, namespace["main_0"](2))  # function_i(x) = x * i + i for i = 0, 1, 2
+
+    def test_code_generated_in_thread_pool_is_identical(self):
+        serial = CodeGenerator.generate_code(self.canvas)
+        CodeGenerationCache.clear()
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            self.assertEqual(serial, CodeGenerator.generate_code(self.canvas, executor))
+
+    def test_cached_sections_are_not_sent_to_executor(self):
+        CodeGenerator.generate_code(self.canvas)
+        executor = MagicMock()
+
+        CodeGenerator.generate_code(self.canvas, executor)
+
+        executor.map.assert_not_called()
@@ -0,0 +1,50 @@
+from unittest import TestCase
+
+from MVP.refactored.backend.code_generation.scoped_renamer import ScopedRenamer
+
+NEW_NAMES = {"FACTOR": "FACTOR_0", "helper": "helper_0", "count": "count_0", "x": "x_0"}
+
+
+class TestScopedRenamer(TestCase):
+    def setUp(self):
+        self.renamer = ScopedRenamer(NEW_NAMES)
+
+    def test_module_level_names_are_renamed(self):
+        self.assertEqual("FACTOR_0 = 2\n", self.renamer.rename("FACTOR = 2\n"))
+        self.assertEqual("x_0 = FACTOR_0 + count_0\n", self.renamer.rename("x = FACTOR + count\n"))
+
+    def test_function_with_parameters_refers_to_renamed_globals(self):
+        code = self.renamer.rename("def helper(x):\n    return helper(x - 1) * FACTOR\n")
+
+        self.assertEqual("def helper_0(x):\n    return helper_0(x - 1) * FACTOR_0\n", code)
+
+    def test_global_declaration_is_renamed(self):
+        code = self.renamer.rename("def increase(x):\n    global count\n    count += x\n")
+
+        self.assertEqual("def increase(x):\n    global count_0\n    count_0 += x\n", code)
+
+    def test_local_names_shadow_module_level_names(self):
+        code = self.renamer.rename(
+            "def f(a):\n"
+            "    FACTOR = a\n"
+            "    g = lambda x: x + FACTOR\n"
+            "    return [x * FACTOR for x in range(a)], g\n")
+
+        self.assertNotIn("FACTOR_0", code)
+        self.assertNotIn("x_0", code)
+
+    def test_global_in_nested_function_is_renamed(self):
+        code = self.renamer.rename(
+            "def f(x):\n"
+            "    def g():\n"
+            "        global x\n"
+            "        return x\n"
+            "    return g() + x\n")
+
+        self.assertIn("global x_0\n        return x_0\n", code)
+        self.assertIn("return g() + x\n", code)
+
+    def test_names_are_renamed_once(self):
+        renamer = ScopedRenamer({"a": "a_0", "a_0": "a_0_0"})
+
+        self.assertEqual("a_0 = a_0_0\n", renamer.rename("a = a_0\n"))
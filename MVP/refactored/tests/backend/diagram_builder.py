@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+from typing import Iterable
+from unittest import TestCase
+from unittest.mock import patch
+
+from MVP.refactored.backend.box_functions.box_function_registry import BoxFunctionRegistry
+from MVP.refactored.backend.diagram import Diagram
+from MVP.refactored.backend.diagram_callback import Receiver
+from MVP.refactored.backend.hypergraph.hypergraph_manager import HypergraphManager
+from MVP.refactored.backend.types.connection_info import ConnectionInfo
+from MVP.refactored.backend.types.connection_side import ConnectionSide
+from MVP.refactored.frontend.windows.main_diagram import MainDiagram
+
+Box = tuple[int, str | None, Iterable[int], Iterable[int]]  # hyper edge id, label, source and target node ids
+
+
+def use_box_functions(test_case: TestCase, functions: dict[str, str], metadata: dict[str, dict] = None):
+    """Replace the functions configuration of `MainDiagram` for the test and drop analyzed box functions."""
+    BoxFunctionRegistry.invalidate()
+    test_case.enterContext(patch.object(MainDiagram, "label_content", dict(functions)))
+    test_case.enterContext(patch.object(MainDiagram, "label_metadata", dict(metadata or {})))
+
+
+def build_diagram(receiver: Receiver, boxes: Iterable[Box], inputs: Iterable[int], outputs: Iterable[int],
+                  canvas_id: int = 1) -> Diagram:
+    """
+    Add the canvas to the receiver and create its boxes in the active registry.
+
+    :param boxes: Boxes in creation order, nodes are created on their first use. Box with label None is left
+        unlabelled, e.g. a compound box.
+    :param inputs: Node ids of diagram inputs in input index order.
+    :param outputs: Node ids of diagram outputs in output index order.
+    """
+    diagram = receiver.add_new_canvas(canvas_id)
+
+    def get_node(node_id: int):
+        return HypergraphManager.get_node_by_node_id(node_id) or HypergraphManager.create_new_node(node_id, canvas_id)
+
+    for hyper_edge_id, label, sources, targets in boxes:
+        for source in sources:
+            HypergraphManager.connect_node_with_output_hyper_edge(get_node(source), hyper_edge_id)
+        for target in targets:
+            HypergraphManager.connect_node_with_input_hyper_edge(get_node(target), hyper_edge_id)
+        if label is not None:
+            HypergraphManager.get_hyper_edge_by_id(hyper_edge_id).set_box_label(label)
+    for index, node_id in enumerate(inputs):
+        diagram.add_input(ConnectionInfo(index, ConnectionSide.LEFT, node_id))
+    for index, node_id in enumerate(outputs):
+        diagram.add_output(ConnectionInfo(index, ConnectionSide.RIGHT, node_id))
+    return diagram
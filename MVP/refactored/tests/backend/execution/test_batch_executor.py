@@ -0,0 +1,70 @@
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import count, islice
+from unittest import TestCase
+
+import numpy as np
+
+from MVP.refactored.backend.diagram_callback import Receiver
+from MVP.refactored.backend.execution.batch_executor import BatchExecutor
+from MVP.refactored.backend.execution.compiled_diagram import CompiledDiagram
+from MVP.refactored.backend.execution.dataflow_executor import DataflowExecutor
+from MVP.refactored.backend.hypergraph.hypergraph_manager import HypergraphManager
+from MVP.refactored.backend.hypergraph.hypergraph_registry import HypergraphRegistry
+from MVP.refactored.tests.backend.diagram_builder import build_diagram, use_box_functions
+
+CANVAS_ID = 1
+FUNCTIONS = {
+    "consumption": "def consumption(distance, litres):\n    return litres / distance * 100\n",
+    "cost": "def cost(consumption, price):\n    return round(consumption * price, 2)\n",
+    "split": "def split(x):\n    return x, -x\n",
+}
+
+
+class TestBatchExecutor(TestCase):
+    def setUp(self):
+        use_box_functions(self, FUNCTIONS)
+        self.enterContext(HypergraphManager.use(HypergraphRegistry()))
+
+        # (input 0 = 1, input 1 = 2) -> consumption(10) -> 3 -> split(11) -> (4 = output 1, 5)
+        # (5, input 2 = 6) -> cost(12) -> 7 = output 0
+        self.receiver = Receiver()
+        build_diagram(self.receiver, ((10, "consumption", (1, 2), (3,)), (11, "split", (3,), (4, 5)),
+                                      (12, "cost", (5, 6), (7,))), inputs=(1, 2, 6), outputs=(7, 4))
+
+        self.rows = [(100 + i, 5 + i % 7, 1.5 + i % 3) for i in range(1000)]
+        executor = DataflowExecutor(self.receiver, CANVAS_ID)
+        self.expected = [tuple(executor.run(row).values()) for row in self.rows]
+
+    def test_rows_are_evaluated_in_order(self):
+        batch_executor = BatchExecutor(self.receiver, CANVAS_ID, chunk_size=64)
+
+        self.assertEqual(self.expected, list(batch_executor.run(self.rows)))
+        self.assertEqual((-7.5, 5.0), next(batch_executor.run([(100, 5, 1.5)])))
+
+    def test_process_and_thread_pools_stream_results_in_order(self):
+        for executor_type in (ProcessPoolExecutor, ThreadPoolExecutor):
+            with executor_type(max_workers=2) as pool:
+                batch_executor = BatchExecutor(self.receiver, CANVAS_ID, pool, chunk_size=37, max_pending_chunks=3)
+                self.assertEqual(self.expected, list(batch_executor.run(iter(self.rows))))
+
+    def test_structured_array_rows(self):
+        rows = np.array(self.rows, dtype=[("distance", np.int64), ("litres", np.int64), ("price", np.float64)])
+
+        self.assertEqual(self.expected, list(BatchExecutor(self.receiver, CANVAS_ID, chunk_size=100).run(rows)))
+
+    def test_rows_are_read_as_results_are_consumed(self):
+        rows = ((100, litres, 2.0) for litres in count(1))
+
+        results = list(islice(BatchExecutor(self.receiver, CANVAS_ID, chunk_size=10).run(rows), 25))
+
+        self.assertEqual((-2.0, 1.0), results[0])
+        self.assertEqual(25, len(results))
+
+    def test_diagram_is_one_function(self):
+        compiled = BatchExecutor(self.receiver, CANVAS_ID).compile()
+
+        self.assertEqual((0, 1, 2), compiled.input_indexes)
+        self.assertEqual((0, 1), compiled.output_indexes)
+        self.assertEqual(("consumption", "split", "cost"), compiled.labels)
+        self.assertIs(compiled.get_function(), CompiledDiagram.from_plan(
+            DataflowExecutor(self.receiver, CANVAS_ID).get_plan()).get_function())
@@ -0,0 +1,135 @@
+import json
+import os
+import tempfile
+import threading
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from unittest import TestCase
+from unittest.mock import patch
+
+from MVP.refactored.backend.box_functions.box_function_registry import BoxFunctionRegistry
+from MVP.refactored.backend.diagram_callback import Receiver
+from MVP.refactored.backend.execution.batch_executor import BatchExecutor
+from MVP.refactored.backend.execution.box_call_cache import MISSING, BoxCallCache
+from MVP.refactored.backend.execution.dataflow_executor import DataflowExecutor
+from MVP.refactored.backend.execution.streaming_pipeline import StreamingPipeline
+from MVP.refactored.backend.hypergraph.hypergraph_manager import HypergraphManager
+from MVP.refactored.backend.hypergraph.hypergraph_registry import HypergraphRegistry
+from MVP.refactored.tests.backend.diagram_builder import build_diagram, use_box_functions
+from MVP.refactored.frontend.windows.main_diagram import MainDiagram
+
+CANVAS_ID = 1
+CALLS = Counter()  # calls of box functions of this process, keyed by label
+
+FUNCTIONS = {
+    "convert": "def convert(celsius):\n    return celsius * 9 / 5 + 32\n",
+    "offset": "def offset(x, y):\n    return x + y\n",
+}
+METADATA = {"convert": {"cacheable": True}}
+_get_callable = BoxFunctionRegistry.get_callable
+
+
+def _get_counted_callable(label, code):
+    function = _get_callable(label, code)
+
+    def call(*arguments):
+        CALLS[label] += 1
+        return function(*arguments)
+    return call
+
+
+class TestBoxCallCache(TestCase):
+    def setUp(self):
+        use_box_functions(self, FUNCTIONS, METADATA)
+        CALLS.clear()
+        self.enterContext(patch.object(BoxFunctionRegistry, "get_callable", staticmethod(_get_counted_callable)))
+        self.enterContext(HypergraphManager.use(HypergraphRegistry()))
+
+        # input 0 = 1 -> convert(10) -> 2, (2, input 1 = 3) -> offset(11) -> 4 = output 0
+        self.receiver = Receiver()
+        build_diagram(self.receiver, ((10, "convert", (1,), (2,)), (11, "offset", (2, 3), (4,))), inputs=(1, 3),
+                      outputs=(4,))
+
+        self.rows = [(celsius % 5 * 10, row) for row, celsius in enumerate(range(100))]
+        self.expected = [(celsius * 9 / 5 + 32 + row,) for celsius, row in self.rows]
+
+    def test_least_recently_used_entries_are_evicted(self):
+        cache = BoxCallCache(max_entries=2)
+        keys = [cache.get_key("convert", FUNCTIONS["convert"], [value]) for value in range(3)]
+        cache.put(keys[0], 32.0)
+        cache.put(keys[1], 33.8)
+        self.assertEqual(32.0, cache.get(keys[0]))
+
+        cache.put(keys[2], 35.6)
+
+        self.assertIs(MISSING, cache.get(keys[1]))
+        self.assertEqual((32.0, 35.6), (cache.get(keys[0]), cache.get(keys[2])))
+        self.assertEqual((3, 1, 1), (cache.statistics.hits, cache.statistics.misses, cache.statistics.evictions))
+
+    def test_total_size_is_bounded(self):
+        cache = BoxCallCache(max_bytes=2500)
+        for value in range(3):
+            cache.put(cache.get_key("convert", FUNCTIONS["convert"], [value]), "x" * 1000)
+
+        self.assertEqual(2, len(cache))
+        self.assertLessEqual(cache.size, 2500)
+        cache.put(cache.get_key("convert", FUNCTIONS["convert"], [3]), "x" * 3000)
+        self.assertEqual((2, 1), (len(cache), cache.statistics.skipped))
+
+    def test_key_follows_source_and_arguments(self):
+        cache = BoxCallCache()
+        key = cache.get_key("convert", FUNCTIONS["convert"], [1])
+
+        self.assertEqual(key, cache.get_key("convert", FUNCTIONS["convert"], (1,)))
+        self.assertNotEqual(key, cache.get_key("convert", FUNCTIONS["convert"], [1.0]))
+        self.assertNotEqual(key, cache.get_key("convert", FUNCTIONS["convert"] + "\n", [1]))
+        self.assertIsNone(cache.get_key("convert", FUNCTIONS["convert"], [threading.Lock()]))
+
+    def test_repeated_runs_reuse_results_of_cacheable_boxes(self):
+        cache = BoxCallCache()
+        executor = DataflowExecutor(self.receiver, CANVAS_ID, cache=cache)
+        for row in self.rows:
+            self.assertEqual({0: self.expected[row[1]][0]}, executor.run(row))
+
+        self.assertEqual({"convert": 5, "offset": 100}, CALLS)
+        self.assertEqual((95, 5), (cache.statistics.hits, cache.statistics.misses))
+        with ProcessPoolExecutor(max_workers=1) as pool:
+            self.assertEqual({0: 32.0 + 7}, DataflowExecutor(self.receiver, CANVAS_ID, pool, cache).run([0, 7]))
+        self.assertEqual(5, CALLS["convert"])
+
+    def test_batch_rows_share_the_cache(self):
+        cache = BoxCallCache()
+        self.assertEqual(self.expected, list(BatchExecutor(self.receiver, CANVAS_ID, chunk_size=16,
+                                                           cache=cache).run(self.rows)))
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            batch_executor = BatchExecutor(self.receiver, CANVAS_ID, pool, chunk_size=16, cache=cache)
+            self.assertEqual(self.expected, list(batch_executor.run(self.rows)))
+        self.assertEqual(5, CALLS["convert"])
+
+        with ProcessPoolExecutor(max_workers=1) as pool:
+            batch_executor = BatchExecutor(self.receiver, CANVAS_ID, pool, chunk_size=16, cache=cache)
+            self.assertEqual(self.expected, list(batch_executor.run(self.rows)))
+
+    def test_streaming_stages_and_uncached_runs(self):
+        cache = BoxCallCache()
+        celsius, rows = zip(*self.rows)
+        pipeline = StreamingPipeline(self.receiver, CANVAS_ID, cache=cache)
+
+        self.assertEqual(self.expected, list(pipeline.run([celsius, rows])))
+        self.assertEqual(5, CALLS["convert"])
+        self.assertEqual(self.expected, list(BatchExecutor(self.receiver, CANVAS_ID).run(self.rows)))
+        self.assertEqual(105, CALLS["convert"])
+
+    def test_metadata_is_stored_alongside_the_function(self):
+        entries = {"convert": {"code": FUNCTIONS["convert"], "cacheable": True}, "offset": FUNCTIONS["offset"]}
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "functions_conf.json")
+            with open(path, "w") as file:
+                json.dump(entries, file)
+            with patch("constants.FUNCTIONS_CONF", path):
+                MainDiagram.load_functions()
+
+        self.assertEqual(FUNCTIONS, MainDiagram.label_content)
+        self.assertTrue(BoxCallCache.is_cacheable("convert"))
+        self.assertFalse(BoxCallCache.is_cacheable("offset"))
+        self.assertEqual(entries, MainDiagram.get_functions_conf())
@@ -0,0 +1,89 @@
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from unittest import TestCase
+from unittest.mock import patch
+
+from MVP.refactored.backend.diagram_callback import Receiver
+from MVP.refactored.backend.execution.dataflow_executor import DataflowExecutor
+from MVP.refactored.backend.hypergraph.hypergraph_manager import HypergraphManager
+from MVP.refactored.backend.hypergraph.hypergraph_registry import HypergraphRegistry
+from MVP.refactored.tests.backend.diagram_builder import build_diagram, use_box_functions
+
+MAIN_CANVAS = 1
+SUB_CANVAS = 20  # canvas of sub diagram has id of its box
+WIDTH = 4
+BARRIER = threading.Barrier(WIDTH, timeout=10)
+
+FUNCTIONS = {
+    "inc": "def inc(x):\n    return x + 1\n",
+    "double": "FACTOR = 2\n\ndef double(x):\n    return helper(x)\n\ndef helper(x):\n    return x * FACTOR\n",
+    "split": "def split(x):\n    return x, -x\n",
+    "add": "def add(a, b):\n    return a + b\n",
+    "meet": "from MVP.refactored.tests.backend.execution.test_dataflow_executor import BARRIER\n\n"
+            "def meet(x):\n    BARRIER.wait()\n    return x\n",
+    "fail": "def fail(x):\n    raise RuntimeError('box failed')\n",
+}
+
+
+class TestDataflowExecutor(TestCase):
+    def setUp(self):
+        use_box_functions(self, FUNCTIONS)
+        self.registry = self.enterContext(HypergraphManager.use(HypergraphRegistry()))
+
+        # input 0 = 1 -> inc(10) -> 2 -> split(11) -> (3, 4), 3 = output 0
+        # 4 -> compound(20) -> 5 = output 1, sub diagram 20: input 21 -> double(22) -> output 23
+        # (input 1 = 6, 2) -> add(12) -> 7 = output 2
+        self.receiver = Receiver()
+        build_diagram(self.receiver, ((10, "inc", (1,), (2,)), (11, "split", (2,), (3, 4)), (20, None, (4,), (5,)),
+                                      (12, "add", (6, 2), (7,))), inputs=(1, 6), outputs=(3, 5, 7),
+                      canvas_id=MAIN_CANVAS)
+        HypergraphManager.get_hyper_edge_by_id(20).set_sub_diagram_canvas_id(SUB_CANVAS)
+        build_diagram(self.receiver, ((22, "double", (21,), (23,)),), inputs=(21,), outputs=(23,), canvas_id=SUB_CANVAS)
+
+    def test_results_are_keyed_by_output_index(self):
+        executor = DataflowExecutor(self.receiver, MAIN_CANVAS)
+
+        self.assertEqual({0: 4, 1: -8, 2: 14}, executor.run([3, 10]))
+        self.assertEqual({0: 1, 1: -2, 2: 1}, executor.run({0: 0, 1: 0}))
+
+    def test_thread_and_process_pools_give_same_results(self):
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            self.assertEqual({0: 4, 1: -8, 2: 14}, DataflowExecutor(self.receiver, MAIN_CANVAS, pool).run([3, 10]))
+        with ProcessPoolExecutor(max_workers=2) as pool:
+            self.assertEqual({0: 4, 1: -8, 2: 14}, DataflowExecutor(self.receiver, MAIN_CANVAS, pool).run([3, 10]))
+
+    def test_box_functions_are_compiled_once(self):
+        executor = DataflowExecutor(self.receiver, MAIN_CANVAS)
+
+        with patch("builtins.compile", wraps=compile) as compile_source:
+            for value in range(5):
+                executor.run([value, value])
+
+        compiled_boxes = [call.args[1] for call in compile_source.call_args_list if call.args[1].startswith("<box")]
+        self.assertEqual(["<box add>", "<box double>", "<box inc>", "<box split>"], sorted(compiled_boxes))
+
+    def test_plan_follows_label_change(self):
+        executor = DataflowExecutor(self.receiver, MAIN_CANVAS)
+        executor.run([3, 10])
+
+        self.registry.get_hyper_edge_by_id(10).set_box_label("double")
+
+        self.assertEqual({0: 6, 1: -12, 2: 16}, executor.run([3, 10]))
+
+    def test_independent_boxes_run_concurrently(self):
+        receiver = Receiver()
+        build_diagram(receiver, [(200 + index, "meet", (100,), (300 + index,)) for index in range(WIDTH)],
+                      inputs=(100,), outputs=[300 + index for index in range(WIDTH)], canvas_id=2)
+
+        with ThreadPoolExecutor(max_workers=WIDTH) as pool:
+            # every box waits until all boxes are running
+            self.assertEqual({0: 7, 1: 7, 2: 7, 3: 7}, DataflowExecutor(receiver, 2, pool).run([7]))
+
+    def test_missing_input_and_box_failure(self):
+        executor = DataflowExecutor(self.receiver, MAIN_CANVAS)
+        with self.assertRaises(ValueError):
+            executor.run([3])
+
+        self.registry.get_hyper_edge_by_id(11).set_box_label("fail")
+        with ThreadPoolExecutor(max_workers=2) as pool, self.assertRaises(RuntimeError):
+            DataflowExecutor(self.receiver, MAIN_CANVAS, pool).run([3, 10])
@@ -0,0 +1,84 @@
+from types import SimpleNamespace
+from unittest import TestCase
+
+from MVP.refactored.backend.code_generation.code_generator import CodeGenerator
+from MVP.refactored.backend.diagram_callback import Receiver
+from MVP.refactored.backend.execution.dataflow_optimizer import DataflowOptimizer
+from MVP.refactored.backend.execution.dataflow_plan import DataflowPlan
+from MVP.refactored.backend.hypergraph.hypergraph_manager import HypergraphManager
+from MVP.refactored.backend.hypergraph.hypergraph_registry import HypergraphRegistry
+from MVP.refactored.tests.backend.diagram_builder import build_diagram, use_box_functions
+
+CANVAS_ID = 1
+FUNCTIONS = {
+    "scale": "def scale(x, factor):\n    return x * factor\n",
+    "add": "def add(a, b):\n    return a + b\n",
+    "inc": "def inc(x):\n    return x + 1\n",
+    "tick": "import itertools\n\nTICKS = itertools.count()\n\ndef tick(x):\n    return x + next(TICKS)\n",
+}
+METADATA = {"scale": {"pure": True}, "add": {"pure": True}, "inc": {"cacheable": True}}
+
+
+class TestDataflowOptimizer(TestCase):
+    def setUp(self):
+        use_box_functions(self, FUNCTIONS, METADATA)
+        self.enterContext(HypergraphManager.use(HypergraphRegistry()))
+
+        # (input 0 = 1, input 1 = 2) -> scale(10) -> 3, (1, 2) -> scale(11) -> 4, (3, 4) -> add(12) -> 5 = output 0
+        # 5 -> inc(13) -> 6 -> inc(14) -> 7 is not used, 5 -> tick(15) -> 8 = output 1, 5 -> tick(16) -> 9 = output 2
+        self.receiver = Receiver()
+        self.canvas = SimpleNamespace(id=CANVAS_ID, receiver=self.receiver)
+        build_diagram(self.receiver, ((10, "scale", (1, 2), (3,)), (11, "scale", (1, 2), (4,)),
+                                      (12, "add", (3, 4), (5,)), (13, "inc", (5,), (6,)), (14, "inc", (6,), (7,)),
+                                      (15, "tick", (5,), (8,)), (16, "tick", (5,), (9,))),
+                      inputs=(1, 2), outputs=(5, 8, 9))
+
+    def test_dead_boxes_and_repeated_pure_applications_are_removed(self):
+        plan = DataflowPlan.from_canvas(self.receiver, CANVAS_ID)
+
+        optimized, report = DataflowOptimizer.optimize(plan)
+
+        self.assertEqual([13, 14], report.dead)
+        self.assertEqual({11: 10}, report.merged)
+        self.assertEqual([10, 12, 15, 16], sorted(step.hyper_edge_id for step in optimized.steps))
+        add = next(step for step in optimized.steps if step.label == "add")
+        self.assertEqual(add.sources[0], add.sources[1])
+        self.assertEqual(list(range(4)), [step.index for step in optimized.steps])
+        self.assertEqual(7, len(plan.steps))
+
+    def test_only_pure_applications_are_merged(self):
+        _, report = DataflowOptimizer.optimize(DataflowPlan.from_canvas(self.receiver, CANVAS_ID),
+                                               pure_labels={"scale", "add", "inc", "tick"})
+        self.assertEqual({11: 10, 16: 15}, report.merged)
+
+        _, report = DataflowOptimizer.optimize(DataflowPlan.from_canvas(self.receiver, CANVAS_ID), pure_labels=())
+        self.assertEqual({}, report.merged)
+        self.assertEqual(10, report.get_kept_id(10))
+        self.assertIsNone(report.get_kept_id(13))
+
+    def test_optimization_does_not_change_registered_hypergraphs(self):
+        structure_version = HypergraphManager.get_registry().structure_version
+        version = structure_version.version
+
+        plan = DataflowPlan.from_canvas(self.receiver, CANVAS_ID)
+        CodeGenerator.optimize(self.canvas)
+
+        self.assertEqual(version, structure_version.version)
+        self.assertTrue(plan.is_current())
+
+    def test_generated_code_calls_only_needed_boxes(self):
+        report = CodeGenerator.optimize(self.canvas)
+        plain_code = CodeGenerator.generate_code(self.canvas)
+        optimized_code = CodeGenerator.generate_code(self.canvas, report=report)
+
+        self.assertEqual(2, plain_code.count("= scale_"))
+        self.assertEqual(1, optimized_code.count("= scale_"))
+        self.assertIn("def inc_", plain_code)
+        self.assertNotIn("inc_", optimized_code)
+        self.assertEqual(2, optimized_code.count("= tick_"))
+
+        for code in (plain_code, optimized_code):
+            namespace = {}
+            exec(compile(code, "diagram.py", "exec"), namespace)
+            self.assertEqual((12, 13), namespace["main_0"](3, 2))
+        self.assertEqual(plain_code, CodeGenerator.generate_code(self.canvas))
@@ -0,0 +1,81 @@
+import threading
+from itertools import count
+from unittest import TestCase
+
+from MVP.refactored.backend.diagram_callback import Receiver
+from MVP.refactored.backend.execution.streaming_pipeline import StreamingPipeline
+from MVP.refactored.backend.hypergraph.hypergraph_manager import HypergraphManager
+from MVP.refactored.backend.hypergraph.hypergraph_registry import HypergraphRegistry
+from MVP.refactored.tests.backend.diagram_builder import build_diagram, use_box_functions
+
+CANVAS_ID = 1
+FUNCTIONS = {
+    "inc": "def inc(x):\n    return x + 1\n",
+    "split": "def split(x):\n    return x, -x\n",
+    "add": "def add(a, b):\n    return a + b\n",
+    "check": "def check(x):\n    if x > 50:\n        raise RuntimeError('too large')\n    return x\n",
+}
+
+
+class TestStreamingPipeline(TestCase):
+    def setUp(self):
+        use_box_functions(self, FUNCTIONS)
+        self.registry = self.enterContext(HypergraphManager.use(HypergraphRegistry()))
+
+        # input 0 = 1 -> inc(10) -> 2 -> split(11) -> (3 = output 0, 4)
+        # (4, input 1 = 5) -> add(12) -> 6 = output 1, node 2 is also output 2
+        self.receiver = Receiver()
+        build_diagram(self.receiver, ((10, "inc", (1,), (2,)), (11, "split", (2,), (3, 4)), (12, "add", (4, 5), (6,))),
+                      inputs=(1, 5), outputs=(3, 6, 2))
+
+    def assert_workers_stopped(self, pipeline: StreamingPipeline):
+        self.assertFalse(any(thread.is_alive() for thread in pipeline._threads))
+
+    def test_stream_is_processed_in_order(self):
+        pipeline = StreamingPipeline(self.receiver, CANVAS_ID, queue_size=4)
+
+        rows = list(pipeline.run([range(100), [10] * 100]))
+
+        self.assertEqual([(x + 1, 10 - x - 1, x + 1) for x in range(100)], rows)
+        self.assertEqual({10: 100, 11: 100, 12: 100},
+                         {hyper_edge_id: statistics.items for hyper_edge_id, statistics in
+                          pipeline.stage_statistics.items()})
+        self.assertEqual(100, pipeline.input_statistics[1].items)
+        self.assert_workers_stopped(pipeline)
+
+    def test_stream_ends_with_the_shortest_input(self):
+        pipeline = StreamingPipeline(self.receiver, CANVAS_ID)
+
+        self.assertEqual(3, len(list(pipeline.run({0: count(), 1: [1, 2, 3]}))))
+        self.assert_workers_stopped(pipeline)
+
+    def test_slow_consumer_applies_backpressure(self):
+        pulled = []
+
+        def values():
+            for value in count():
+                pulled.append(value)
+                yield value
+
+        pipeline = StreamingPipeline(self.receiver, CANVAS_ID, queue_size=2)
+        rows = pipeline.run([values(), count()])
+        for _ in range(5):
+            next(rows)
+        threading.Event().wait(0.2)
+
+        # every queue between the input and the consumer holds at most 2 values
+        self.assertLess(len(pulled), 20)
+        rows.close()
+        self.assert_workers_stopped(pipeline)
+
+    def test_box_error_stops_pipeline(self):
+        self.registry.get_hyper_edge_by_id(10).set_box_label("check")
+        pipeline = StreamingPipeline(self.receiver, CANVAS_ID)
+
+        with self.assertRaises(RuntimeError):
+            list(pipeline.run([count(), count()]))
+        self.assert_workers_stopped(pipeline)
+
+    def test_missing_input(self):
+        with self.assertRaises(ValueError):
+            StreamingPipeline(self.receiver, CANVAS_ID).run([range(3)])
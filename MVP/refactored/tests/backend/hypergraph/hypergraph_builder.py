@@ -0,0 +1,28 @@
+from MVP.refactored.backend.hypergraph.hyper_edge import HyperEdge
+from MVP.refactored.backend.hypergraph.node import Node
+
+
+class MockableNode(Node):
+    """Node with an instance dictionary, so tests can replace its methods with mocks."""
+
+
+class MockableHyperEdge(HyperEdge):
+    """Hyper edge with an instance dictionary, so tests can replace its methods with mocks."""
+
+
+def create_nodes(count: int) -> list[Node]:
+    return [Node(node_id=i) for i in range(count)]
+
+
+def create_hyper_edges(ids: list[int]) -> list[HyperEdge]:
+    return [HyperEdge(hyper_edge_id) for hyper_edge_id in ids]
+
+
+def connect(sources: list[Node], hyper_edge: HyperEdge, targets: list[Node]):
+    """Connect nodes to the hyper edge directly, without a registry."""
+    for source in sources:
+        hyper_edge.append_source_node(source)
+        source.append_output(hyper_edge)
+    for target in targets:
+        hyper_edge.append_target_node(target)
+        target.append_input(hyper_edge)
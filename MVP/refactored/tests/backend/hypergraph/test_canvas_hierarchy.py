@@ -0,0 +1,132 @@
+from unittest import TestCase
+
+from MVP.refactored.backend.diagram_callback import Receiver
+from MVP.refactored.backend.hypergraph.hypergraph_manager import HypergraphManager
+from MVP.refactored.backend.hypergraph.hypergraph_registry import HypergraphRegistry
+from MVP.refactored.backend.types.connection_info import ConnectionInfo
+from MVP.refactored.backend.types.connection_side import ConnectionSide
+
+MAIN_CANVAS = 1
+SUB_CANVAS = 20  # canvas of sub diagram has id of its box
+INNER_SUB_CANVAS = 30
+
+
+def _add_diagram_ports(receiver: Receiver, canvas_id: int, input_id: int, output_id: int):
+    diagram = receiver.add_new_canvas(canvas_id)
+    diagram.add_input(ConnectionInfo(0, ConnectionSide.LEFT, input_id))
+    diagram.add_output(ConnectionInfo(0, ConnectionSide.RIGHT, output_id))
+    HypergraphManager.create_new_node(input_id, canvas_id)
+    HypergraphManager.create_new_node(output_id, canvas_id)
+
+
+def _create_box(canvas_id: int, input_id: int, hyper_edge_id: int, output_id: int):
+    """Connect existing or new node `input_id` through the hyper edge to the new node `output_id`."""
+    node = HypergraphManager.get_node_by_node_id(input_id) or HypergraphManager.create_new_node(input_id, canvas_id)
+    HypergraphManager.connect_node_with_output_hyper_edge(node, hyper_edge_id)
+    output = HypergraphManager.create_new_node(output_id, canvas_id)
+    HypergraphManager.connect_node_with_input_hyper_edge(output, hyper_edge_id)
+
+
+class TestCanvasHierarchy(TestCase):
+    def setUp(self):
+        # main: 1 -> inc(10) -> 2 -> compound(20) -> 3
+        # sub diagram 20: input 21 = 23 -> double(24) -> 25 -> compound(30) -> 26 = output 22
+        # sub diagram 30: input 31 = 33 -> square(34) -> 35 = output 32
+        self.registry = HypergraphRegistry()
+        self.receiver = Receiver()
+        self.receiver.add_new_canvas(MAIN_CANVAS)
+        with HypergraphManager.use(self.registry):
+            _create_box(MAIN_CANVAS, 1, 10, 2)
+            _create_box(MAIN_CANVAS, 2, 20, 3)
+
+            _add_diagram_ports(self.receiver, SUB_CANVAS, 21, 22)
+            _create_box(SUB_CANVAS, 23, 24, 25)
+            _create_box(SUB_CANVAS, 25, 30, 26)
+            HypergraphManager.union_nodes(HypergraphManager.get_node_by_node_id(23), 21)
+            HypergraphManager.union_nodes(HypergraphManager.get_node_by_node_id(26), 22)
+
+            _add_diagram_ports(self.receiver, INNER_SUB_CANVAS, 31, 32)
+            _create_box(INNER_SUB_CANVAS, 33, 34, 35)
+            HypergraphManager.union_nodes(HypergraphManager.get_node_by_node_id(33), 31)
+            HypergraphManager.union_nodes(HypergraphManager.get_node_by_node_id(35), 32)
+
+            for hyper_edge_id, label in ((10, "inc"), (24, "double"), (34, "square")):
+                HypergraphManager.get_hyper_edge_by_id(hyper_edge_id).set_box_label(label)
+            for hyper_edge_id in (20, 30):
+                HypergraphManager.get_hyper_edge_by_id(hyper_edge_id).set_sub_diagram_canvas_id(hyper_edge_id)
+
+        self.hierarchy = self.registry.get_canvas_hierarchy(self.receiver)
+
+    def test_canvas_tree(self):
+        self.assertEqual({MAIN_CANVAS: [SUB_CANVAS], SUB_CANVAS: [INNER_SUB_CANVAS]}, self.hierarchy.children)
+        self.assertEqual(SUB_CANVAS, self.hierarchy.parent[INNER_SUB_CANVAS])
+        self.assertEqual([MAIN_CANVAS, SUB_CANVAS, INNER_SUB_CANVAS],
+                         self.hierarchy.get_descendant_canvas_ids(MAIN_CANVAS))
+        compound_hyper_edge = self.registry.get_hyper_edge_by_id(20)
+        self.assertEqual(self.registry.get_graphs_by_canvas_id(SUB_CANVAS),
+                         self.hierarchy.get_hypergraphs_inside(compound_hyper_edge))
+
+    def test_atomic_hyper_edges(self):
+        main_hypergraph = self.registry.get_graph_by_node_id(1)
+
+        hyper_edges = self.hierarchy.get_atomic_hyper_edges(main_hypergraph)
+
+        self.assertEqual([10, 24, 34], sorted(hyper_edge.id for hyper_edge in hyper_edges))
+
+    def test_port_mapping(self):
+        pairs = self.hierarchy.get_port_mapping(self.registry.get_hyper_edge_by_id(30))
+
+        self.assertEqual([(25, 31), (26, 32)], [(outer.id, inner.id) for outer, inner in pairs])
+        self.assertEqual([], self.hierarchy.get_port_mapping(self.registry.get_hyper_edge_by_id(10)))
+
+    def test_inline(self):
+        projection = self.hierarchy.inline(MAIN_CANVAS)
+
+        self.assertEqual([10, 24, 34], sorted(projection.edges))
+        self.assertEqual([10, 24, 34], [hyper_edge.id for hyper_edge in projection.get_topological_schedule().order])
+        self.assertEqual([1], projection.get_hypergraph_source_ids())
+        self.assertEqual([3, 22, 26, 32, 35], sorted(projection.get_hypergraph_target_ids()))
+        self.assertEqual([2, 21, 23], sorted(node.id for node in projection.nodes[2].get_group().members.values()))
+        self.assertTrue(projection.get_reachability_index().is_ancestor(1, 3))
+
+    def test_inline_does_not_modify_registered_hypergraphs(self):
+        registered_nodes = {node_id: hypergraph.nodes[node_id]
+                            for hypergraph in self.registry.hypergraphs for node_id in hypergraph.nodes}
+
+        projection = self.hierarchy.inline(MAIN_CANVAS)
+
+        self.assertIsNot(registered_nodes[2], projection.nodes[2])
+        self.assertEqual([2], [node.id for node in registered_nodes[2].get_group().members.values()])
+        self.assertEqual([20], [hyper_edge.id for hyper_edge in registered_nodes[3].get_input_hyper_edges()])
+        self.assertEqual(3, len(self.registry.hypergraphs))
+
+    def test_inline_keeps_caches_of_registered_hypergraphs(self):
+        hypergraph = self.registry.get_graph_by_node_id(1)
+        schedule = hypergraph.get_topological_schedule()
+        version = self.registry.structure_version.version
+
+        self.hierarchy.inline(MAIN_CANVAS)
+
+        self.assertEqual(version, self.registry.structure_version.version)
+        self.assertIs(schedule, hypergraph.get_topological_schedule())
+        self.assertIs(self.hierarchy, self.registry.get_canvas_hierarchy(self.receiver))
+
+    def test_inline_without_receiver_leaves_ports_unconnected(self):
+        projection = self.registry.get_canvas_hierarchy().inline(MAIN_CANVAS)
+
+        self.assertEqual([10, 24, 34], sorted(projection.edges))
+        # compound hyper edges are removed, so their outer targets become sources too
+        self.assertEqual([1, 3, 21, 22, 23, 26, 31, 33], sorted(projection.get_hypergraph_source_ids()))
+
+    def test_hierarchy_is_cached_until_structure_changes(self):
+        projection = self.hierarchy.inline(MAIN_CANVAS)
+        self.assertIs(self.hierarchy, self.registry.get_canvas_hierarchy(self.receiver))
+        self.assertIs(projection, self.hierarchy.inline(MAIN_CANVAS))
+
+        with HypergraphManager.use(self.registry):
+            _create_box(SUB_CANVAS, 22, 27, 28)
+            HypergraphManager.get_hyper_edge_by_id(27).set_box_label("negate")
+        hierarchy = self.registry.get_canvas_hierarchy(self.receiver)
+
+        self.assertIsNot(self.hierarchy, hierarchy)
+        self.assertIn(27, hierarchy.inline(MAIN_CANVAS).edges)
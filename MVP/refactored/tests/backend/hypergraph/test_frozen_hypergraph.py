@@ -0,0 +1,74 @@
+from unittest import TestCase
+
+import numpy as np
+
+from MVP.refactored.backend.hypergraph.hypergraph import Hypergraph
+from MVP.refactored.backend.hypergraph.hyper_edge import HyperEdge
+from MVP.refactored.tests.backend.hypergraph.hypergraph_builder import connect, create_hyper_edges, create_nodes
+
+
+class TestFrozenHypergraph(TestCase):
+    def setUp(self):
+        # diamond: 0 -> edge0 -> 1, 0 -> edge1 -> 2, (1, 2) -> edge2 -> 3 = 4
+        self.nodes = create_nodes(5)
+        self.node0, self.node1, self.node2, self.node3, self.node4 = self.nodes
+
+        self.edges = create_hyper_edges([100, 101, 102])
+        self.edge0, self.edge1, self.edge2 = self.edges
+
+        connect([self.node0], self.edge0, [self.node1])
+        connect([self.node0], self.edge1, [self.node2])
+        connect([self.node1, self.node2], self.edge2, [self.node3])
+        self.node3.union(self.node4)
+
+        self.hypergraph = Hypergraph(hypergraph_id=201)
+        self.hypergraph.add_hypergraph_source(self.node0)
+        self.hypergraph.add_nodes([self.node1, self.node2, self.node3])
+        self.hypergraph.add_edges(self.edges)
+
+        self.frozen = self.hypergraph.freeze()
+
+    def test_to_dict_equals_hypergraph_to_dict(self):
+        self.assertEqual(self.hypergraph.to_dict(), self.frozen.to_dict())
+
+    def test_arrays_are_read_only(self):
+        with self.assertRaises(ValueError):
+            self.frozen.edge_source_nodes[0] = 1
+
+    def test_node_groups(self):
+        self.assertEqual(4, self.frozen.group_count)
+        self.assertEqual(self.frozen.node_group[self.frozen.node_index[3]],
+                         self.frozen.node_group[self.frozen.node_index[4]])
+
+    def test_source_and_target_nodes_keep_port_order(self):
+        edge = self.frozen.hyper_edge_index[102]
+        self.assertEqual([1, 2], [self.frozen.node_ids[node] for node in self.frozen.get_source_nodes(edge)])
+        self.assertEqual([3], [self.frozen.node_ids[node] for node in self.frozen.get_target_nodes(edge)])
+
+    def test_degrees(self):
+        np.testing.assert_array_equal([1, 1, 2], self.frozen.get_edge_source_degrees())
+        np.testing.assert_array_equal([0, 1, 1, 1], self.frozen.get_group_in_degrees())
+        np.testing.assert_array_equal([2, 1, 1, 0], self.frozen.get_group_out_degrees())
+
+    def test_reachable_groups(self):
+        group1 = self.frozen.node_group[self.frozen.node_index[1]]
+        reached = self.frozen.get_reachable_groups(np.array([group1]))
+        self.assertEqual([1, 3, 4], [node_id for node_id, group in zip(self.frozen.node_ids, self.frozen.node_group)
+                                     if reached[group]])
+
+    def test_hypergraph_target_ids(self):
+        self.assertEqual(sorted(node.id for node in self.hypergraph.get_hypergraph_target()),
+                         sorted(self.frozen.get_hypergraph_target_ids()))
+
+    def test_topological_levels(self):
+        levels = [[self.frozen.hyper_edge_ids[edge] for edge in level]
+                  for level in self.frozen.get_topological_levels()]
+        self.assertEqual([[100, 101], [102]], levels)
+
+    def test_topological_levels_raise_on_cycle(self):
+        cycle_edge = HyperEdge(103)
+        connect([self.node3], cycle_edge, [self.node0])
+        self.hypergraph.add_edge(cycle_edge)
+
+        with self.assertRaises(ValueError):
+            self.hypergraph.freeze().get_topological_levels()
@@ -95,3 +95,46 @@ class TestHyperEdge(TestCase):
             1: self.node3
         }
         self.assertEqual(edge.target_nodes, expected)
+
+    def test_get_source_nodes_should_be_cached_until_changed(self):
+        self.edge0.append_source_node(self.node1)
+        self.edge0.set_source_node(0, self.node0)
+        source_nodes = self.edge0.get_source_nodes()
+        self.assertEqual([self.node0, self.node1], source_nodes)
+        self.assertIs(source_nodes, self.edge0.get_source_nodes())
+
+        self.edge0.remove_source_node_by_reference(self.node0)
+        self.assertEqual([self.node1], self.edge0.get_source_nodes())
+
+    def test_get_target_nodes_should_be_rebuilt_when_assigned(self):
+        self.edge0.append_target_node(self.node0)
+        self.assertEqual([self.node0], self.edge0.get_target_nodes())
+
+        self.edge0.target_nodes = {1: self.node2, 0: self.node3}
+        self.assertEqual([self.node3, self.node2], self.edge0.get_target_nodes())
+
+    def test_returned_source_nodes_are_not_changed_by_later_changes(self):
+        self.edge0.append_source_nodes([self.node0, self.node1])
+        source_nodes = self.edge0.get_source_nodes()
+
+        self.edge0.append_source_node(self.node2)
+        self.edge0.remove_all_source_nodes()
+
+        self.assertEqual([self.node0, self.node1], source_nodes)
+        self.assertEqual([], self.edge0.get_source_nodes())
+
+    def test_port_map_with_free_port_behaves_like_dict(self):
+        self.edge0.target_nodes = {0: self.node0, 1: self.node1, 2: self.node2}
+        self.edge0.remove_target_node_by_connection_index(1)
+
+        self.assertEqual({0: self.node0, 2: self.node2}, self.edge0.target_nodes)
+        self.assertEqual(2, len(self.edge0.target_nodes))
+        self.assertNotIn(1, self.edge0.target_nodes)
+        self.assertEqual([(0, self.node0), (2, self.node2)], list(self.edge0.target_nodes.items()))
+        self.assertEqual([self.node0, self.node2], self.edge0.get_target_nodes())
+        with self.assertRaises(KeyError):
+            del self.edge0.target_nodes[1]
+
+    def test_hyper_edge_has_no_instance_dict(self):
+        self.edge0.append_source_node(self.node0)
+        self.assertFalse(hasattr(self.edge0, "__dict__"))
@@ -2,16 +2,19 @@ from unittest import TestCase
 from unittest.mock import MagicMock
 
 from MVP.refactored.backend.hypergraph.hypergraph import Hypergraph
+from MVP.refactored.backend.hypergraph.hypergraph_manager import HypergraphManager
+from MVP.refactored.backend.hypergraph.hypergraph_registry import HypergraphRegistry
 from MVP.refactored.backend.hypergraph.node import Node
 from MVP.refactored.backend.hypergraph.hyper_edge import HyperEdge
+from MVP.refactored.tests.backend.hypergraph.hypergraph_builder import MockableHyperEdge, MockableNode
 
 
 def _create_nodes(count: int) -> list[Node]:
-    return [Node(node_id=i) for i in range(count)]
+    return [MockableNode(node_id=i) for i in range(count)]
 
 
 def _create_edges(ids: list[int]) -> list[HyperEdge]:
-    return [HyperEdge(edge_id) for edge_id in ids]
+    return [MockableHyperEdge(edge_id) for edge_id in ids]
 
 
 def _create_hypergraph(hypergraph_id: int) -> Hypergraph:
@@ -265,7 +268,7 @@ class TestHypergraph(TestCase):
         self.assertEqual(len(self.hypergraph.nodes), 0)
 
     def test_update_source_nodes_descendants_with_complex_graph_one_source(self):
-        nodes = [Node(i) for i in range(12)]
+        nodes = [MockableNode(i) for i in range(12)]
 
         nodes[0].get_children_nodes = MagicMock(return_value=[nodes[6], nodes[5], nodes[11], nodes[8], nodes[10]])
         nodes[1].get_children_nodes = MagicMock(return_value=[nodes[6], nodes[5], nodes[11], nodes[8], nodes[10]])
@@ -324,7 +327,7 @@ class TestHypergraph(TestCase):
         # TODO check structure of hypergraph
 
     def test_update_source_nodes_descendants_with_complex_graph_two_sources(self):
-        nodes = [Node(i) for i in range(0, 17)]
+        nodes = [MockableNode(i) for i in range(0, 17)]
 
         nodes[0].get_children_nodes = MagicMock(return_value=[nodes[3]])
         nodes[1].get_children_nodes = MagicMock(return_value=[nodes[4], nodes[5], nodes[6], nodes[7], nodes[11],
@@ -466,3 +469,202 @@ class TestHypergraph(TestCase):
         self.assertIn(self.edge2.id, self.hypergraph.edges)
         self.assertEqual(self.hypergraph.edges[self.edge1.id], self.edge1)
         self.assertEqual(self.hypergraph.edges[self.edge2.id], self.edge2)
+
+    # Test get_children_nodes/get_parent_nodes
+    # --------------------------------------
+    def test_children_nodes_are_cached_until_structure_changes(self):
+        self._connect(self.node0, self.edge0, self.node1)
+        self.hypergraph.add_nodes([self.node0, self.node1, self.node2])
+        self.hypergraph.add_edge(self.edge0)
+        children = self.hypergraph.get_children_nodes(self.node0)
+        self.assertEqual([self.node1], children)
+        self.assertIs(children, self.hypergraph.get_children_nodes(self.node0))
+
+        self.node1.union(self.node2)
+        self.assertEqual([self.node1, self.node2], self.hypergraph.get_children_nodes(self.node0))
+        self.assertEqual([self.node0], self.hypergraph.get_parent_nodes(self.node2))
+
+        self.hypergraph.remove_hyper_edge(self.edge0.id)
+        self.assertEqual([], self.hypergraph.get_children_nodes(self.node0))
+        self.assertEqual([], self.hypergraph.get_parent_nodes(self.node2))
+
+    # Test split_into_connected_components
+    # --------------------------------------
+    def _connect(self, source: Node, hyper_edge: HyperEdge, target: Node):
+        hyper_edge.append_source_node(source)
+        source.append_output(hyper_edge)
+        hyper_edge.append_target_node(target)
+        target.append_input(hyper_edge)
+
+    def test_label_connected_components_labels_nodes_and_edges(self):
+        self._connect(self.node0, self.edge0, self.node1)
+        self.node1.union(self.node2)
+        self._connect(self.node3, self.edge1, self.node4)
+        self.hypergraph.add_nodes([self.node0, self.node1, self.node2, self.node3, self.node4])
+
+        node_labels, hyper_edge_labels = self.hypergraph.label_connected_components()
+
+        self.assertEqual(node_labels[self.node0], node_labels[self.node2])
+        self.assertEqual(node_labels[self.node0], hyper_edge_labels[self.edge0])
+        self.assertEqual(node_labels[self.node3], hyper_edge_labels[self.edge1])
+        self.assertNotEqual(node_labels[self.node0], node_labels[self.node4])
+
+    def test_split_into_connected_components_keeps_id_if_connected(self):
+        self._connect(self.node0, self.edge0, self.node1)
+        self.hypergraph.add_nodes([self.node0, self.node1])
+
+        components = self.hypergraph.split_into_connected_components()
+
+        self.assertEqual(1, len(components))
+        self.assertEqual(self.hypergraph.id, components[0].id)
+        self.assertEqual([self.node0], components[0].get_hypergraph_source())
+        self.assertEqual([self.edge0], components[0].get_all_hyper_edges())
+
+    def test_split_into_connected_components_after_hyper_edge_removal(self):
+        self._connect(self.node0, self.edge0, self.node1)
+        self._connect(self.node1, self.edge1, self.node2)
+        self.hypergraph.add_nodes([self.node0, self.node1, self.node2])
+        self.hypergraph.add_edges([self.edge0, self.edge1])
+
+        self.hypergraph.remove_hyper_edge(self.edge1.id)
+        components = self.hypergraph.split_into_connected_components()
+
+        self.assertEqual(2, len(components))
+        sources = sorted(node.id for component in components for node in component.get_hypergraph_source())
+        self.assertEqual([self.node0.id, self.node2.id], sources)
+
+    # Test get_hypergraph_target
+    # --------------------------------------
+    def test_hypergraph_target_of_added_nodes(self):
+        self._connect(self.node0, self.edge0, self.node1)
+        self.node1.union(self.node2)
+        self.hypergraph.add_hypergraph_source(self.node0)
+        self.hypergraph.add_nodes([self.node1])
+        self.hypergraph.add_edge(self.edge0)
+
+        self.assertEqual([self.node1.id, self.node2.id], sorted(self.hypergraph.get_hypergraph_target_ids()))
+
+    def test_hypergraph_target_is_updated_when_output_is_added_and_removed(self):
+        self._connect(self.node0, self.edge0, self.node1)
+        self.hypergraph.add_hypergraph_source(self.node0)
+        self.hypergraph.add_nodes([self.node1])
+        self.hypergraph.add_edge(self.edge0)
+
+        self._connect(self.node1, self.edge1, self.node2)
+        self.hypergraph.add_nodes([self.node2])
+        self.hypergraph.add_edge(self.edge1)
+        self.assertEqual([self.node2], self.hypergraph.get_hypergraph_target())
+
+        self.hypergraph.remove_hyper_edge(self.edge1.id)
+        self.assertEqual([self.node1.id, self.node2.id], sorted(self.hypergraph.get_hypergraph_target_ids()))
+
+    def test_hypergraph_target_after_removing_group_member_with_output(self):
+        self._connect(self.node0, self.edge0, self.node1)
+        self.node0.union(self.node2)
+        self.hypergraph.add_hypergraph_source(self.node0)
+        self.hypergraph.add_nodes([self.node1])
+        self.hypergraph.add_edge(self.edge0)
+        self.assertEqual([self.node1], self.hypergraph.get_hypergraph_target())
+
+        self.hypergraph.remove_node(self.node0.id)
+
+        self.assertEqual([self.node1.id, self.node2.id], sorted(self.hypergraph.get_hypergraph_target_ids()))
+
+    def test_hypergraph_target_of_stacked_diamonds_through_manager(self):
+        with HypergraphManager.use(HypergraphRegistry()):
+            node = HypergraphManager.create_new_node(0, 1)
+            next_id = 1
+            for _ in range(30):  # 2^30 paths to the last node
+                join_box, left_box, right_box, left, right, joined = range(next_id, next_id + 6)
+                next_id += 6
+                for box, branch_id in ((left_box, left), (right_box, right)):
+                    HypergraphManager.connect_node_with_output_hyper_edge(node, box)
+                    branch = HypergraphManager.create_new_node(branch_id, 1)
+                    HypergraphManager.connect_node_with_input_hyper_edge(branch, box)
+                    HypergraphManager.connect_node_with_output_hyper_edge(branch, join_box)
+                node = HypergraphManager.create_new_node(joined, 1)
+                HypergraphManager.connect_node_with_input_hyper_edge(node, join_box)
+            hypergraph = HypergraphManager.get_graph_by_node_id(0)
+
+            self.assertEqual([node], hypergraph.get_hypergraph_target())
+
+            HypergraphManager.remove_hyper_edge(join_box)
+            targets = sorted(node.id for hypergraph in HypergraphManager.hypergraphs
+                             for node in hypergraph.get_hypergraph_target())
+            self.assertEqual([left, right, joined], targets)
+
+    # Test get_topological_schedule
+    # --------------------------------------
+    def _create_diamond(self):
+        # node0 -> edge0 -> node1, node0 -> edge1 -> node2, (node1, node2) -> edge2 -> node3
+        self._connect(self.node0, self.edge0, self.node1)
+        self._connect(self.node0, self.edge1, self.node2)
+        self._connect(self.node1, self.edge2, self.node3)
+        self.edge2.append_source_node(self.node2)
+        self.node2.append_output(self.edge2)
+        self.hypergraph.add_hypergraph_source(self.node0)
+        self.hypergraph.add_edges([self.edge2, self.edge1, self.edge0])
+
+    def test_topological_schedule_levels_and_order(self):
+        self._create_diamond()
+
+        schedule = self.hypergraph.get_topological_schedule()
+
+        self.assertEqual([[self.edge1, self.edge0], [self.edge2]], schedule.levels)
+        self.assertEqual([self.edge1, self.edge0, self.edge2], schedule.order)
+
+    def test_topological_schedule_is_cached_until_hypergraph_changes(self):
+        self._create_diamond()
+        schedule = self.hypergraph.get_topological_schedule()
+        self.assertIs(schedule, self.hypergraph.get_topological_schedule())
+
+        self._connect(self.node3, self.edge3, self.node4)
+        self.hypergraph.add_edge(self.edge3)
+
+        self.assertEqual([[self.edge1, self.edge0], [self.edge2], [self.edge3]],
+                         self.hypergraph.get_topological_schedule().levels)
+
+    def test_topological_schedule_raises_on_cycle(self):
+        self._connect(self.node1, self.edge0, self.node2)
+        self._connect(self.node2, self.edge1, self.node1)
+        self.hypergraph.add_nodes([self.node1, self.node2])
+        self.hypergraph.add_edges([self.edge0, self.edge1])
+
+        with self.assertRaises(ValueError):
+            self.hypergraph.get_topological_schedule()
+
+    def test_topological_schedule_and_frozen_levels_agree_on_spider_feedback_loop(self):
+        # node1 -> edge0 -> node2 -> edge1 -> node3 -> edge2 -> node4, node4 is united with node2
+        self._connect(self.node1, self.edge0, self.node2)
+        self._connect(self.node2, self.edge1, self.node3)
+        self._connect(self.node3, self.edge2, self.node4)
+        self.node4.union(self.node2)
+        self.hypergraph.add_hypergraph_source(self.node1)
+        self.hypergraph.add_edges([self.edge0, self.edge1, self.edge2])
+
+        levels = self.hypergraph.get_topological_schedule().levels
+        frozen = self.hypergraph.freeze()
+        frozen_levels = [[frozen.hyper_edge_ids[edge] for edge in level] for level in frozen.get_topological_levels()]
+
+        self.assertEqual([[self.edge0], [self.edge1], [self.edge2]], levels)
+        self.assertEqual([[hyper_edge.id for hyper_edge in level] for level in levels], frozen_levels)
+
+    def test_topological_schedule_descends_into_compound_hyper_edge(self):
+        with HypergraphManager.use(HypergraphRegistry()):
+            self._connect(self.node0, self.edge0, self.node1)
+            self._connect(self.node1, self.edge1, self.node2)
+            self.edge0.set_sub_diagram_canvas_id(301)
+            self.hypergraph.add_hypergraph_source(self.node0)
+            self.hypergraph.add_edges([self.edge0, self.edge1])
+
+            subgraph = Hypergraph(canvas_id=301)
+            self._connect(self.node3, self.edge2, self.node4)
+            self._connect(self.node4, self.edge3, self.node5)
+            subgraph.add_hypergraph_source(self.node3)
+            subgraph.add_edges([self.edge3, self.edge2])
+            HypergraphManager.add_hypergraph(subgraph)
+
+            schedule = self.hypergraph.get_topological_schedule()
+
+        self.assertEqual([[self.edge0], [self.edge1]], schedule.levels)
+        self.assertEqual([self.edge0, self.edge2, self.edge3, self.edge1], schedule.order)
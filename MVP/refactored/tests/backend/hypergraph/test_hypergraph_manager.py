@@ -5,12 +5,16 @@ from MVP.refactored.backend.hypergraph.hypergraph_manager import HypergraphManag
 from MVP.refactored.backend.hypergraph.node import Node
 from MVP.refactored.backend.hypergraph.hyper_edge import HyperEdge
 from MVP.refactored.backend.hypergraph.hypergraph import Hypergraph
+from MVP.refactored.tests.backend.hypergraph.hypergraph_builder import MockableNode
 
 
 class TestHypergraphManager(TestCase):
 
     def setUp(self):
         HypergraphManager.hypergraphs.clear()
+        HypergraphManager.node_id_to_hypergraph.clear()
+        HypergraphManager.hyper_edge_id_to_hypergraph.clear()
+        HypergraphManager.canvas_id_to_hypergraphs.clear()
         self.sample_node = Node(1)
         self.sample_node_ = Node(2)
         self.sample_hypergraph = Hypergraph(canvas_id=123)
@@ -80,8 +84,8 @@ class TestHypergraphManager(TestCase):
     # TEST: Union Nodes
     # ----------------------------------------------------------
     def test_union_nodes_combines_hypergraphs(self):
-        node_a = Node(1)
-        node_b = Node(2)
+        node_a = MockableNode(1)
+        node_b = MockableNode(2)
 
         graph_a = Hypergraph(canvas_id=1)
         graph_b = Hypergraph(canvas_id=1)
@@ -176,3 +180,144 @@ class TestHypergraphManager(TestCase):
             HypergraphManager.swap_hyper_edge_id(prev_id=10, new_id=20)
 
         graph.swap_hyper_edge_id.assert_called_once_with(10, 20)
+
+    # TEST: Lookup tables
+    # ----------------------------------------------------------
+    def test_lookup_tables_follow_combined_hypergraph(self):
+        node_a = HypergraphManager.create_new_node(1, 123)
+        HypergraphManager.create_new_node(2, 123)
+        HypergraphManager.connect_node_with_output_hyper_edge(node_a, 12)
+        HypergraphManager.union_nodes(node_a, 2)
+
+        combined = list(HypergraphManager.hypergraphs)[0]
+        self.assertIs(combined, HypergraphManager.get_graph_by_node_id(1))
+        self.assertIs(combined, HypergraphManager.get_graph_by_node_id(2))
+        self.assertIs(combined, HypergraphManager.get_graph_by_hyper_edge_id(12))
+        self.assertEqual([combined], HypergraphManager.get_graphs_by_canvas_id(123))
+
+    def test_lookup_tables_follow_split_hypergraphs(self):
+        node_a = HypergraphManager.create_new_node(1, 123)
+        node_b = HypergraphManager.create_new_node(2, 123)
+        HypergraphManager.connect_node_with_output_hyper_edge(node_a, 12)
+        HypergraphManager.connect_node_with_input_hyper_edge(node_b, 12)
+
+        HypergraphManager.remove_hyper_edge(12)
+
+        self.assertIsNone(HypergraphManager.get_graph_by_hyper_edge_id(12))
+        self.assertIsNot(HypergraphManager.get_graph_by_node_id(1), HypergraphManager.get_graph_by_node_id(2))
+        self.assertEqual(2, len(HypergraphManager.get_graphs_by_canvas_id(123)))
+
+        HypergraphManager.remove_node(2)
+        self.assertIsNone(HypergraphManager.get_graph_by_node_id(2))
+        self.assertIsNone(HypergraphManager.get_node_by_node_id(2))
+        self.assertEqual(1, len(HypergraphManager.get_graphs_by_canvas_id(123)))
+
+    def test_lookup_tables_follow_swapped_hyper_edge_id(self):
+        node = HypergraphManager.create_new_node(1, 123)
+        HypergraphManager.connect_node_with_output_hyper_edge(node, 10)
+
+        HypergraphManager.swap_hyper_edge_id(prev_id=10, new_id=20)
+
+        self.assertIsNone(HypergraphManager.get_hyper_edge_by_id(10))
+        self.assertEqual(20, HypergraphManager.get_hyper_edge_by_id(20).id)
+
+    # TEST: Combine hypergraphs
+    # ----------------------------------------------------------
+    def test_combine_hypergraphs_merges_smaller_into_larger(self):
+        node_a = HypergraphManager.create_new_node(1, 123)
+        node_b = HypergraphManager.create_new_node(2, 123)
+        HypergraphManager.connect_node_with_output_hyper_edge(node_a, 12)
+        HypergraphManager.connect_node_with_input_hyper_edge(node_b, 12)
+        larger = HypergraphManager.get_graph_by_node_id(1)
+        node_c = HypergraphManager.create_new_node(3, 123)
+
+        HypergraphManager.union_nodes(node_c, 2)
+
+        self.assertEqual(1, len(HypergraphManager.hypergraphs))
+        self.assertIs(larger, HypergraphManager.get_graph_by_node_id(3))
+        self.assertEqual([1, 2, 3], sorted(larger.get_all_nodes_ids()))
+        self.assertEqual([1], larger.get_hypergraph_source_ids())
+
+    def test_connect_node_with_input_hyper_edge_updates_sources(self):
+        node_a = HypergraphManager.create_new_node(1, 123)
+        node_b = HypergraphManager.create_new_node(2, 123)
+        HypergraphManager.connect_node_with_output_hyper_edge(node_a, 12)
+
+        HypergraphManager.connect_node_with_input_hyper_edge(node_b, 12)
+
+        graph = HypergraphManager.get_graph_by_node_id(2)
+        self.assertEqual([1], graph.get_hypergraph_source_ids())
+
+    def test_connect_node_with_output_hyper_edge_updates_sources_of_targets(self):
+        node_a = HypergraphManager.create_new_node(1, 123)
+        HypergraphManager.connect_node_with_input_hyper_edge(node_a, 10)
+        node_b = HypergraphManager.create_new_node(2, 123)
+
+        HypergraphManager.connect_node_with_output_hyper_edge(node_b, 10)
+
+        graph = HypergraphManager.get_graph_by_node_id(2)
+        self.assertEqual([2], graph.get_hypergraph_source_ids())
+
+    def test_connect_node_with_output_hyper_edge_of_same_hypergraph_updates_sources_of_targets(self):
+        # 1 -> 10 -> 2, 11 -> 3 -> 10
+        node_a = HypergraphManager.create_new_node(1, 123)
+        HypergraphManager.connect_node_with_output_hyper_edge(node_a, 10)
+        HypergraphManager.connect_node_with_input_hyper_edge(HypergraphManager.create_new_node(2, 123), 10)
+        node_c = HypergraphManager.create_new_node(3, 123)
+        HypergraphManager.connect_node_with_input_hyper_edge(node_c, 11)
+        HypergraphManager.connect_node_with_output_hyper_edge(node_c, 10)
+        graph = HypergraphManager.get_graph_by_node_id(1)
+        self.assertEqual([1, 3], sorted(graph.get_hypergraph_source_ids()))
+
+        HypergraphManager.connect_node_with_output_hyper_edge(node_a, 11)
+
+        self.assertIs(graph, HypergraphManager.get_graph_by_node_id(3))
+        self.assertEqual([1], graph.get_hypergraph_source_ids())
+
+    # TEST: Batch
+    # ----------------------------------------------------------
+    def test_batch_defers_combining_until_exit(self):
+        with HypergraphManager.batch():
+            node_a = HypergraphManager.create_new_node(1, 123)
+            node_b = HypergraphManager.create_new_node(2, 123)
+            HypergraphManager.connect_node_with_output_hyper_edge(node_a, 12)
+            HypergraphManager.connect_node_with_input_hyper_edge(node_b, 12)
+
+            self.assertEqual(2, len(HypergraphManager.hypergraphs))
+            self.assertIs(HypergraphManager.get_hyper_edge_by_id(12), node_b.inputs[0])
+
+        self.assertEqual(1, len(HypergraphManager.hypergraphs))
+        graph = HypergraphManager.get_graph_by_node_id(2)
+        self.assertIs(graph, HypergraphManager.get_graph_by_node_id(1))
+        self.assertIs(graph, HypergraphManager.get_graph_by_hyper_edge_id(12))
+        self.assertEqual([1], graph.get_hypergraph_source_ids())
+        self.assertEqual(123, graph.get_canvas_id())
+
+    def test_batch_detects_split_after_exit(self):
+        with HypergraphManager.batch():
+            node_a = HypergraphManager.create_new_node(1, 123)
+            node_b = HypergraphManager.create_new_node(2, 123)
+            node_c = HypergraphManager.create_new_node(3, 123)
+            HypergraphManager.connect_node_with_output_hyper_edge(node_a, 12)
+            HypergraphManager.connect_node_with_input_hyper_edge(node_b, 12)
+            HypergraphManager.connect_node_with_output_hyper_edge(node_b, 13)
+            HypergraphManager.connect_node_with_input_hyper_edge(node_c, 13)
+            HypergraphManager.remove_hyper_edge(12)
+
+        self.assertEqual(2, len(HypergraphManager.get_graphs_by_canvas_id(123)))
+        self.assertIsNone(HypergraphManager.get_graph_by_hyper_edge_id(12))
+        self.assertEqual([1], HypergraphManager.get_graph_by_node_id(1).get_all_nodes_ids())
+        graph = HypergraphManager.get_graph_by_node_id(3)
+        self.assertEqual([2, 3], sorted(graph.get_all_nodes_ids()))
+        self.assertEqual([2], graph.get_hypergraph_source_ids())
+
+    def test_nested_batch_commits_on_outermost_exit(self):
+        with HypergraphManager.batch():
+            with HypergraphManager.batch():
+                HypergraphManager.create_new_node(1, 123)
+                node_b = HypergraphManager.create_new_node(2, 123)
+                HypergraphManager.union_nodes(node_b, 1)
+            self.assertEqual(2, len(HypergraphManager.hypergraphs))
+
+        self.assertEqual(1, len(HypergraphManager.hypergraphs))
+        self.assertEqual([1, 2], sorted(HypergraphManager.get_graph_by_node_id(1).get_hypergraph_source_ids()))
@@ -0,0 +1,101 @@
+from concurrent.futures import ThreadPoolExecutor
+from unittest import TestCase
+
+from MVP.refactored.backend.code_generation.code_generation_cache import CodeGenerationCache
+from MVP.refactored.backend.hypergraph.hypergraph import Hypergraph
+from MVP.refactored.backend.hypergraph.hypergraph_manager import HypergraphManager
+from MVP.refactored.backend.hypergraph.hypergraph_registry import HypergraphRegistry
+from MVP.refactored.backend.hypergraph.structure_version import StructureVersion
+from MVP.refactored.backend.id_generator import IdGenerator
+
+
+def _create_pipeline(box_count: int) -> dict:
+    """Create a pipeline through the facade and return the dictionary of the resulting hypergraph."""
+    with HypergraphManager.batch():
+        for box in range(box_count):
+            node = HypergraphManager.create_new_node(box, 1)
+            HypergraphManager.connect_node_with_input_hyper_edge(node, 100 + box)
+            HypergraphManager.connect_node_with_output_hyper_edge(node, 100 + box + 1)
+    hypergraph = HypergraphManager.get_graph_by_node_id(0)
+    return {"nodes": sorted(hypergraph.get_all_nodes_ids()),
+            "hyperEdges": sorted(hypergraph.edges.keys()),
+            "sourceNodes": hypergraph.get_hypergraph_source_ids(),
+            "hypergraphs": len(HypergraphManager.hypergraphs)}
+
+
+def _create_pipeline_in_registry(box_count: int) -> dict:
+    with HypergraphManager.use(HypergraphRegistry()):
+        return _create_pipeline(box_count)
+
+
+class TestHypergraphRegistry(TestCase):
+
+    def setUp(self):
+        HypergraphManager.clear()
+
+    def tearDown(self):
+        HypergraphManager.clear()
+
+    # TEST: Isolation
+    # ----------------------------------------------------------
+    def test_registries_do_not_share_hypergraphs(self):
+        registry = HypergraphRegistry()
+        registry.create_new_node(1, 123)
+
+        self.assertIsNotNone(registry.get_graph_by_node_id(1))
+        self.assertIsNone(HypergraphManager.get_graph_by_node_id(1))
+        self.assertEqual(0, len(HypergraphManager.hypergraphs))
+
+    def test_use_switches_facade_and_id_generator(self):
+        registry = HypergraphRegistry()
+        with HypergraphManager.use(registry):
+            HypergraphManager.create_new_node(1, 123)
+            self.assertIs(registry.hypergraphs, HypergraphManager.hypergraphs)
+            self.assertIs(registry.id_generator, IdGenerator.get_active())
+            self.assertIs(registry.structure_version, StructureVersion.get_active())
+            self.assertEqual(1, Hypergraph().id)  # id 0 was allocated to the hypergraph of created node
+
+        self.assertIs(HypergraphManager.default_registry, HypergraphManager.get_registry())
+        self.assertIs(IdGenerator.default, IdGenerator.get_active())
+        self.assertIs(StructureVersion.default, StructureVersion.get_active())
+        self.assertIsNone(HypergraphManager.get_graph_by_node_id(1))
+        self.assertEqual(1, len(registry.hypergraphs))
+
+    def test_registries_keep_own_code_generation_caches(self):
+        registry = HypergraphRegistry()
+        with HypergraphManager.use(registry):
+            CodeGenerationCache.start(123).finish(123)
+            self.assertIs(registry.code_generation_caches, CodeGenerationCache.get_caches())
+
+        self.assertIn(123, registry.code_generation_caches)
+        self.assertNotIn(123, HypergraphManager.default_registry.code_generation_caches)
+
+    def test_changes_in_other_registry_keep_cached_schedule(self):
+        registry = HypergraphRegistry()
+        node = registry.create_new_node(1, 123)
+        registry.connect_node_with_output_hyper_edge(node, 10)
+        hypergraph = registry.get_graph_by_node_id(1)
+        schedule = hypergraph.get_topological_schedule()
+
+        other_registry = HypergraphRegistry()
+        other_node = other_registry.create_new_node(1, 123)
+        other_registry.connect_node_with_output_hyper_edge(other_node, 10)
+        HypergraphManager.create_new_node(2, 123)
+
+        self.assertIs(schedule, hypergraph.get_topological_schedule())
+        registry.create_new_node(2, 123)
+        self.assertIsNot(schedule, hypergraph.get_topological_schedule())
+
+    # TEST: Concurrency
+    # ----------------------------------------------------------
+    def test_projects_are_processed_concurrently_in_thread_pool(self):
+        box_counts = [50, 80, 50, 120, 80, 50, 120, 80]
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            results = list(executor.map(_create_pipeline_in_registry, box_counts))
+
+        for box_count, result in zip(box_counts, results):
+            self.assertEqual(list(range(box_count)), result["nodes"])
+            self.assertEqual(list(range(100, 100 + box_count + 1)), result["hyperEdges"])
+            self.assertEqual([0], result["sourceNodes"])
+            self.assertEqual(1, result["hypergraphs"])
+        self.assertEqual(0, len(HypergraphManager.hypergraphs))
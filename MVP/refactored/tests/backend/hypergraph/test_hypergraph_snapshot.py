@@ -0,0 +1,119 @@
+import os
+import tempfile
+from unittest import TestCase
+
+import numpy as np
+
+from MVP.refactored.backend.hypergraph.hypergraph_manager import HypergraphManager
+from MVP.refactored.backend.hypergraph.hypergraph_registry import HypergraphRegistry
+from MVP.refactored.backend.hypergraph.hypergraph_snapshot import HypergraphSnapshot
+from MVP.refactored.backend.id_generator import IdGenerator
+
+
+def _create_project(registry: HypergraphRegistry):
+    """Pipeline with a spider on canvas 1, a box with string ids on canvas 2 and an unconnected wire."""
+    with HypergraphManager.use(registry):
+        wire0 = HypergraphManager.create_new_node(1, 1)
+        HypergraphManager.connect_node_with_output_hyper_edge(wire0, 10)
+        wire1 = HypergraphManager.create_new_node(2, 1)
+        HypergraphManager.connect_node_with_input_hyper_edge(wire1, 10)
+        spider = HypergraphManager.create_new_node(3, 1)
+        HypergraphManager.union_nodes(spider, 2)
+        HypergraphManager.connect_node_with_output_hyper_edge(spider, 11)
+        wire2 = HypergraphManager.create_new_node(4, 1)
+        HypergraphManager.connect_node_with_input_hyper_edge(wire2, 11)
+        HypergraphManager.get_hyper_edge_by_id(10).set_box_label("add")
+        HypergraphManager.get_hyper_edge_by_id(11).set_sub_diagram_canvas_id(2)
+
+        wire3 = HypergraphManager.create_new_node("wire_a", 2)
+        wire3.is_special = True
+        HypergraphManager.connect_node_with_output_hyper_edge(wire3, "box_a")
+
+        HypergraphManager.create_new_node(5, 1)
+
+
+def _describe(registry: HypergraphRegistry) -> list[dict]:
+    result = []
+    for hypergraph in sorted(registry.hypergraphs, key=lambda graph: str(graph.id)):
+        description = hypergraph.to_dict()
+        description["canvasId"] = hypergraph.canvas_id
+        description["targetNodes"] = sorted(map(str, hypergraph.get_hypergraph_target_ids()))
+        description["labels"] = {str(edge.id): edge.box_label for edge in hypergraph.edges.values()}
+        description["subDiagrams"] = {str(edge.id): edge.sub_diagram_canvas_id for edge in hypergraph.edges.values()}
+        description["special"] = sorted(str(node.id) for node in hypergraph.nodes.values() if node.is_special)
+        result.append(description)
+    return result
+
+
+class TestHypergraphSnapshot(TestCase):
+    def setUp(self):
+        self.registry = HypergraphRegistry()
+        _create_project(self.registry)
+        self.snapshot = HypergraphSnapshot.from_hypergraphs(self.registry.hypergraphs)
+
+    def test_restore_recreates_hypergraphs(self):
+        registry = HypergraphRegistry()
+        hypergraphs = HypergraphSnapshot.from_buffer(self.snapshot.to_bytes()).restore(registry)
+
+        self.assertEqual(3, len(hypergraphs))
+        self.assertEqual(_describe(self.registry), _describe(registry))
+        self.assertEqual([2, 3], sorted(node.id for node in registry.get_node_by_node_id(3).get_group().members.values()))
+        self.assertIs(registry.get_graph_by_node_id(4), registry.get_graph_by_hyper_edge_id(10))
+        self.assertEqual([10, 11], registry.get_feeding_hyper_edge_ids(4))
+
+    def test_restored_hypergraphs_can_be_modified(self):
+        registry = HypergraphRegistry()
+        self.snapshot.restore(registry)
+
+        registry.remove_node(2)
+
+        self.assertEqual(4, len(registry.hypergraphs))
+        self.assertGreater(registry.id_generator.next_id(), 11)
+
+    def test_restore_uses_active_registry(self):
+        registry = HypergraphRegistry()
+        with HypergraphManager.use(registry):
+            self.snapshot.restore()
+            self.assertIsNotNone(HypergraphManager.get_graph_by_node_id("wire_a"))
+            self.assertIs(registry.id_generator, IdGenerator.get_active())
+        self.assertIsNone(HypergraphManager.get_graph_by_node_id("wire_a"))
+
+    def test_arrays_are_read_from_memory_mapped_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "project.hgs")
+            self.snapshot.write(path)
+            snapshot = HypergraphSnapshot.read(path)
+
+            np.testing.assert_array_equal(self.snapshot["edge_sources"], snapshot["edge_sources"])
+            self.assertFalse(snapshot["edge_sources"].flags.writeable)
+            self.assertEqual(self.snapshot["node_ids"], snapshot["node_ids"])  # string ids are in JSON section
+            self.assertEqual(self.snapshot.get_digests(), snapshot.get_digests())
+            registry = HypergraphRegistry()
+            snapshot.restore(registry)
+            self.assertEqual(_describe(self.registry), _describe(registry))
+
+    def test_sections_are_aligned(self):
+        content = self.snapshot.to_bytes()
+        snapshot = HypergraphSnapshot.from_buffer(content)
+        for value in snapshot.sections.values():
+            if isinstance(value, np.ndarray) and value.size:
+                self.assertEqual(0, value.__array_interface__["data"][0] % value.dtype.alignment)
+
+    def test_diff(self):
+        with HypergraphManager.use(self.registry):
+            node = HypergraphManager.get_node_by_node_id(4)
+            HypergraphManager.connect_node_with_output_hyper_edge(node, 12)
+            HypergraphManager.create_new_node(6, 3)
+            HypergraphManager.remove_node(5)
+        changed = HypergraphSnapshot.from_hypergraphs(self.registry.hypergraphs)
+
+        diff = self.snapshot.diff(changed)
+
+        self.assertEqual([self.registry.get_graph_by_node_id(1).id], diff["changed"])
+        self.assertEqual([self.registry.get_graph_by_node_id(6).id], diff["added"])
+        self.assertEqual(1, len(diff["removed"]))
+        self.assertEqual({"added": [], "removed": [], "changed": []}, changed.diff(changed))
+
+    def test_invalid_buffer(self):
+        with self.assertRaises(ValueError):
+            HypergraphSnapshot.from_buffer(b"NOTASNAPSHOT" + bytes(32))
@@ -3,6 +3,7 @@ from unittest.mock import MagicMock
 
 from MVP.refactored.backend.hypergraph.node import Node
 from MVP.refactored.backend.hypergraph.hyper_edge import HyperEdge
+from MVP.refactored.tests.backend.hypergraph.hypergraph_builder import connect, create_hyper_edges
 
 
 def _create_nodes(count: int) -> list[Node]:
@@ -21,11 +22,20 @@ class TestNode(unittest.TestCase):
         self.edges = _create_mock_edges(3)
         self.edge0, self.edge1, self.edge2 = self.edges
 
+    def _create_chain(self):
+        # node0 -> hyper edge 100 -> node1 -> hyper edge 101 -> node2 -> hyper edge 102 -> node3
+        for index, hyper_edge in enumerate(create_hyper_edges([100, 101, 102])):
+            connect([self.nodes[index]], hyper_edge, [self.nodes[index + 1]])
+
     def test_get_hypergraph_source_nodes(self):
-        pass
+        self._create_chain()
+        self.assertEqual([self.node0], self.node2.get_hypergraph_source_nodes())
+        self.assertEqual([self.node0], self.node0.get_hypergraph_source_nodes())
 
     def test_get_hypergraph_target_nodes(self):
-        pass
+        self._create_chain()
+        self.assertEqual([self.node3], self.node1.get_hypergraph_target_nodes())
+        self.assertEqual([self.node3], self.node3.get_hypergraph_target_nodes())
 
     def test_get_children_nodes_should_include_targets_and_united(self):
         self.edge0.get_target_nodes.return_value = [self.node1]
@@ -142,3 +152,91 @@ class TestNode(unittest.TestCase):
 
     def test_hash_should_be_based_on_node_id(self):
         self.assertEqual(hash(self.node0), hash(self.node0.id))
+
+    def test_node_group_hash_should_be_equal_for_all_group_members(self):
+        self.node0.union(self.node1)
+        self.node2.union(self.node3)
+        self.node1.union(self.node2)
+        group_hash = self.node0.node_group_hash()
+        for node in self.nodes:
+            self.assertEqual(group_hash, node.node_group_hash())
+
+    def test_remove_self_should_split_group_if_node_was_bridge(self):
+        self.node0.union(self.node1)
+        self.node1.union(self.node2)
+        self.node1.remove_self()
+        self.assertFalse(self.node0.equals_to_node_group(self.node2))
+        self.assertEqual([], self.node0.get_united_with_nodes())
+        self.assertEqual([], self.node1.get_united_with_nodes())
+        self.assertNotEqual(self.node0.node_group_hash(), self.node2.node_group_hash())
+
+    def test_remove_self_should_keep_group_if_other_path_exists(self):
+        self.node0.union(self.node1)
+        self.node1.union(self.node2)
+        self.node0.union(self.node2)
+        self.node1.remove_self()
+        self.assertTrue(self.node0.equals_to_node_group(self.node2))
+
+    def test_group_hyper_edges_should_be_updated_when_member_is_removed(self):
+        self.node0.append_output(self.edge0)
+        self.node1.append_output(self.edge1)
+        self.node0.union(self.node1)
+        self.node1.remove_self()
+        self.assertEqual([self.edge0], self.node0.get_output_hyper_edges())
+
+    def test_group_hyper_edges_should_be_updated_when_edge_is_removed(self):
+        self.node0.append_input(self.edge0)
+        self.node1.append_input(self.edge0)
+        self.node1.append_input(self.edge1)
+        self.node0.union(self.node1)
+        self.node1.remove_input(self.edge0)
+        self.node1.remove_input(self.edge1)
+        self.assertEqual([self.edge0], self.node1.get_input_hyper_edges())
+
+    def test_get_children_nodes_should_follow_target_group_changes(self):
+        hyper_edge = HyperEdge(100)
+        hyper_edge.append_source_node(self.node0)
+        hyper_edge.append_target_node(self.node1)
+        self.node0.append_output(hyper_edge)
+        self.node1.append_input(hyper_edge)
+        self.assertEqual([self.node1], self.node0.get_children_nodes())
+
+        self.node1.union(self.node2)
+        self.assertEqual([self.node1, self.node2], self.node0.get_children_nodes())
+        self.assertEqual([self.node0], self.node2.get_parent_nodes())
+
+        hyper_edge.remove_target_node_by_reference(self.node1)
+        self.node1.remove_input(hyper_edge)
+        self.assertEqual([], self.node0.get_children_nodes())
+        self.assertEqual([], self.node2.get_parent_nodes())
+
+    def test_group_counts_hyper_edges_shared_by_members(self):
+        hyper_edge = HyperEdge(100)
+        self.node0.append_output(hyper_edge)
+        self.node1.append_output(hyper_edge)
+        self.node0.union(self.node1)
+        self.assertEqual(2, self.node0.get_group().outputs.get_count(hyper_edge))
+
+        self.node1.remove_output(hyper_edge)
+        self.assertEqual([hyper_edge], self.node0.get_output_hyper_edges())
+
+        self.node0.remove_output(hyper_edge)
+        self.assertEqual([], self.node0.get_output_hyper_edges())
+        self.assertEqual(0, self.node0.get_group().outputs.get_count(hyper_edge))
+
+    def test_node_has_no_instance_dict(self):
+        self.node0.union(self.node1)
+        self.assertFalse(hasattr(self.node0, "__dict__"))
+
+    def test_node_group_record_is_created_on_first_union(self):
+        self.node0.append_output(self.edge0)
+        self.node1.append_input(self.edge1)
+        self.assertIsNone(self.node0._group)
+        self.assertEqual([self.node0], list(self.node0.get_group_members()))
+        self.assertEqual([self.edge0], self.node0.get_output_hyper_edges())
+        self.assertEqual(hash((self.node0.id,)), self.node0.node_group_hash())
+
+        self.node0.union(self.node1)
+        self.assertEqual([self.edge0], self.node1.get_output_hyper_edges())
+        self.assertEqual([self.edge1], self.node0.get_input_hyper_edges())
+        self.assertEqual([self.node0, self.node1], sorted(self.node0.get_group_members(), key=lambda node: node.id))
@@ -0,0 +1,146 @@
+import random
+from unittest import TestCase
+from unittest.mock import patch
+
+from MVP.refactored.backend.hypergraph.hypergraph import Hypergraph
+from MVP.refactored.backend.hypergraph.hypergraph_manager import HypergraphManager
+from MVP.refactored.backend.hypergraph.hypergraph_registry import HypergraphRegistry
+from MVP.refactored.backend.hypergraph.node import Node
+from MVP.refactored.backend.hypergraph.hyper_edge import HyperEdge
+from MVP.refactored.tests.backend.hypergraph.hypergraph_builder import connect, create_nodes
+
+
+def _descendant_ids(node: Node) -> set[int]:
+    """Node ids reachable from the node found with BFS over node groups."""
+    reached: set[int] = set()
+    queue = [node]
+    while queue:
+        current = queue.pop()
+        for hyper_edge in current.get_output_hyper_edges():
+            for target in hyper_edge.get_target_nodes():
+                for node_from_group in target.get_group().members.values():
+                    if node_from_group.id not in reached:
+                        reached.add(node_from_group.id)
+                        queue.append(node_from_group)
+    return reached
+
+
+class TestReachabilityIndex(TestCase):
+    def setUp(self):
+        # diamond: 0 -> edge0 -> 1, 0 -> edge1 -> 2, (1, 2) -> edge2 -> 3 = 4, 5 -> edge3 -> 6
+        self.nodes = create_nodes(7)
+        self.node0, self.node1, self.node2, self.node3, self.node4, self.node5, self.node6 = self.nodes
+        self.edge0, self.edge1, self.edge2, self.edge3 = [HyperEdge(edge_id) for edge_id in (100, 101, 102, 103)]
+
+        connect([self.node0], self.edge0, [self.node1])
+        connect([self.node0], self.edge1, [self.node2])
+        connect([self.node1, self.node2], self.edge2, [self.node3])
+        self.node3.union(self.node4)
+        connect([self.node5], self.edge3, [self.node6])
+
+        self.hypergraph = Hypergraph(hypergraph_id=201)
+        self.hypergraph.add_nodes(self.nodes)
+        self.hypergraph.add_edges([self.edge0, self.edge1, self.edge2, self.edge3])
+        self.index = self.hypergraph.get_reachability_index()
+
+    def test_descendants_and_ancestors(self):
+        self.assertEqual([1, 2, 3, 4], self.index.get_descendant_node_ids(0))
+        self.assertEqual([3, 4], self.index.get_descendant_node_ids(1))
+        self.assertEqual([], self.index.get_descendant_node_ids(4))
+        self.assertEqual([0, 1, 2], self.index.get_ancestor_node_ids(4))
+
+    def test_is_ancestor(self):
+        self.assertTrue(self.index.is_ancestor(0, 4))
+        self.assertTrue(self.index.is_ancestor(2, 3))
+        self.assertFalse(self.index.is_ancestor(3, 0))
+        self.assertFalse(self.index.is_ancestor(1, 2))
+        self.assertFalse(self.index.is_ancestor(0, 0))
+
+    def test_is_connected(self):
+        self.assertTrue(self.index.is_connected(1, 2))
+        self.assertTrue(self.index.is_connected(4, 0))
+        self.assertTrue(self.index.is_connected(5, 6))
+        self.assertFalse(self.index.is_connected(0, 6))
+
+    def test_connected_source_and_target_nodes(self):
+        self.assertEqual([0], self.index.get_connected_source_node_ids(4))
+        self.assertEqual([3, 4], self.index.get_connected_target_node_ids(0))
+        self.assertEqual([5], self.index.get_connected_source_node_ids(6))
+        self.assertEqual([6], self.index.get_connected_target_node_ids(5))
+
+    def test_feeding_hyper_edges(self):
+        self.assertEqual([100, 101, 102], self.index.get_feeding_hyper_edge_ids(4))
+        self.assertEqual([101], self.index.get_feeding_hyper_edge_ids(2))
+        self.assertEqual([], self.index.get_feeding_hyper_edge_ids(0))
+
+    def test_index_is_cached_until_hypergraph_changes(self):
+        self.assertIs(self.index, self.hypergraph.get_reachability_index())
+
+        connect([self.node4], self.edge3, [])
+        self.hypergraph.add_edge(self.edge3)
+        index = self.hypergraph.get_reachability_index()
+
+        self.assertIsNot(self.index, index)
+        self.assertTrue(index.is_ancestor(0, 6))
+        self.assertTrue(index.is_connected(0, 5))
+
+    def test_cycle(self):
+        cycle_edge = HyperEdge(104)
+        connect([self.node3], cycle_edge, [self.node0])
+        self.hypergraph.add_edge(cycle_edge)
+        index = self.hypergraph.get_reachability_index()
+
+        self.assertEqual([0, 1, 2, 3, 4], index.get_descendant_node_ids(1))
+        self.assertTrue(index.is_ancestor(0, 0))
+        self.assertEqual([0, 1, 2, 3, 4], index.get_ancestor_node_ids(2))
+
+    def test_random_hypergraph_matches_traversal(self):
+        generator = random.Random(7)
+        nodes = [Node(node_id=1000 + i) for i in range(150)]
+        hypergraph = Hypergraph(hypergraph_id=202)
+        for edge_id in range(300):
+            first = generator.randrange(len(nodes) - 1)
+            targets = generator.sample(nodes[first + 1:], min(2, len(nodes) - first - 1))
+            hyper_edge = HyperEdge(2000 + edge_id)
+            connect([nodes[first]], hyper_edge, targets)
+            hypergraph.add_edge(hyper_edge)
+        for _ in range(20):  # node groups can create cycles
+            generator.choice(nodes).union(generator.choice(nodes))
+        hypergraph.add_nodes(nodes)
+        index = hypergraph.get_reachability_index()
+
+        for node in nodes:
+            self.assertEqual(_descendant_ids(node), set(index.get_descendant_node_ids(node.id)))
+
+    def test_manager_queries(self):
+        with HypergraphManager.use(HypergraphRegistry()):
+            node = HypergraphManager.create_new_node(1, 1)
+            HypergraphManager.connect_node_with_output_hyper_edge(node, 10)
+            middle = HypergraphManager.create_new_node(2, 1)
+            HypergraphManager.connect_node_with_input_hyper_edge(middle, 10)
+            HypergraphManager.connect_node_with_output_hyper_edge(middle, 11)
+            output = HypergraphManager.create_new_node(3, 1)
+            HypergraphManager.connect_node_with_input_hyper_edge(output, 11)
+            HypergraphManager.create_new_node(4, 1)
+
+            self.assertEqual([10, 11], HypergraphManager.get_feeding_hyper_edge_ids(3))
+            self.assertTrue(HypergraphManager.is_connected(1, 3))
+            self.assertFalse(HypergraphManager.is_connected(1, 4))
+            self.assertEqual([], HypergraphManager.get_feeding_hyper_edge_ids(5))
+
+    def test_node_queries_use_index_of_registered_hypergraph(self):
+        with HypergraphManager.use(HypergraphRegistry()):
+            node = HypergraphManager.create_new_node(1, 1)
+            HypergraphManager.connect_node_with_output_hyper_edge(node, 10)
+            middle = HypergraphManager.create_new_node(2, 1)
+            HypergraphManager.connect_node_with_input_hyper_edge(middle, 10)
+            HypergraphManager.connect_node_with_output_hyper_edge(middle, 11)
+            output = HypergraphManager.create_new_node(3, 1)
+            HypergraphManager.connect_node_with_input_hyper_edge(output, 11)
+            lonely = HypergraphManager.create_new_node(4, 1)
+
+            with patch.object(Node, "_get_connected_nodes", side_effect=AssertionError("traversal is not expected")):
+                self.assertEqual([node], middle.get_hypergraph_source_nodes())
+                self.assertEqual([output], middle.get_hypergraph_target_nodes())
+                self.assertTrue(node.is_connected_to(output))
+                self.assertFalse(node.is_connected_to(lonely))
@@ -0,0 +1,96 @@
+import json
+from unittest import TestCase
+
+from MVP.refactored.backend.hypergraph.hypergraph_manager import HypergraphManager
+from MVP.refactored.backend.hypergraph.hypergraph_registry import HypergraphRegistry
+from MVP.refactored.backend.tracing import Tracing, traced
+
+
+@Tracing.instrumented
+class TracedExample:
+
+    @traced("example.add")
+    def add(self, first: int, second: int) -> int:
+        return first + second
+
+    @staticmethod
+    @traced("example.label", detail=lambda label: label)
+    def label(label: str) -> str:
+        return label.upper()
+
+
+class TestTracing(TestCase):
+
+    def setUp(self):
+        HypergraphManager.clear()
+
+    def tearDown(self):
+        Tracing.disable()
+        HypergraphManager.clear()
+
+    # TEST: Disabled tracing
+    # ----------------------------------------------------------
+    def test_methods_are_unchanged_when_tracing_is_disabled(self):
+        original_add = TracedExample.__dict__["add"]
+        original_create = HypergraphRegistry.__dict__["create_new_node"]
+
+        with Tracing.trace():
+            self.assertIsNot(original_add, TracedExample.__dict__["add"])
+            self.assertIsNot(original_create, HypergraphRegistry.__dict__["create_new_node"])
+
+        self.assertIs(original_add, TracedExample.__dict__["add"])
+        self.assertIs(original_create, HypergraphRegistry.__dict__["create_new_node"])
+        self.assertIsNone(Tracing.tracer)
+
+    # TEST: Counters and timers
+    # ----------------------------------------------------------
+    def test_hypergraph_operations_are_counted_and_timed(self):
+        with Tracing.trace() as tracer:
+            node = HypergraphManager.create_new_node(1, 123)
+            HypergraphManager.connect_node_with_input_hyper_edge(node, 10)
+            HypergraphManager.connect_node_with_output_hyper_edge(node, 11)
+            Tracing.count("custom")
+
+        self.assertEqual(1, tracer.counters["create_new_node"])
+        self.assertEqual(1, tracer.counters["connect_node_with_input_hyper_edge"])
+        self.assertEqual(1, tracer.counters["connect_node_with_output_hyper_edge"])
+        self.assertEqual(1, tracer.counters["custom"])
+        self.assertEqual([], tracer.events)
+
+        timer = tracer.to_dict()["timers"]["create_new_node"]
+        self.assertEqual(1, timer["count"])
+        self.assertGreaterEqual(timer["max"], timer["mean"])
+
+    def test_detail_is_appended_to_operation_name(self):
+        with Tracing.trace() as tracer:
+            self.assertEqual("A", TracedExample.label("a"))
+            TracedExample.label("b")
+            TracedExample.label("a")
+
+        self.assertEqual({"example.label.a": 2, "example.label.b": 1}, tracer.counters)
+
+    # TEST: Events
+    # ----------------------------------------------------------
+    def test_captured_events_summarize_arguments(self):
+        with Tracing.trace(capture_events=True) as tracer:
+            node = HypergraphManager.create_new_node(1, 123)
+            HypergraphManager.connect_node_with_input_hyper_edge(node, 10)
+            self.assertEqual(5, TracedExample().add(2, 3))
+
+        fields = {event["operation"]: event["fields"] for event in tracer.events}
+        self.assertEqual({"node_id": 1, "canvas_id": 123}, fields["create_new_node"])
+        self.assertEqual({"node": 1, "hyper_edge_id": 10}, fields["connect_node_with_input_hyper_edge"])
+        self.assertEqual({"first": 2, "second": 3}, fields["example.add"])
+
+        exported = json.loads(tracer.to_json())
+        self.assertEqual(tracer.counters, exported["counters"])
+        self.assertEqual(len(tracer.events), len(exported["events"]))
+
+    def test_events_over_limit_are_dropped(self):
+        with Tracing.trace(capture_events=True, max_events=2) as tracer:
+            for _ in range(5):
+                TracedExample().add(1, 1)
+
+        self.assertEqual(2, len(tracer.events))
+        self.assertEqual(3, tracer.dropped_events)
+        self.assertEqual(5, tracer.counters["example.add"])
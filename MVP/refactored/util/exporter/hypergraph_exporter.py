@@ -1,4 +1,5 @@
 from MVP.refactored.backend.hypergraph.hypergraph_manager import HypergraphManager
+from MVP.refactored.backend.hypergraph.hypergraph_snapshot import HypergraphSnapshot
 from MVP.refactored.util.exporter.exporter import Exporter
 
 
@@ -9,3 +10,10 @@ class HypergraphExporter(Exporter):
         canvas_id = self.canvas.id
         graphs = HypergraphManager.get_graphs_by_canvas_id(canvas_id)
         return {"hypergraphs": [graph.to_dict() for graph in graphs]}
+
+    def create_snapshot(self) -> HypergraphSnapshot:
+        """Create the binary snapshot of hypergraphs of the canvas, see `HypergraphSnapshot`."""
+        return HypergraphSnapshot.from_hypergraphs(HypergraphManager.get_graphs_by_canvas_id(self.canvas.id))
+
+    def export_snapshot(self, path: str):
+        self.create_snapshot().write(path)
@@ -12,6 +12,7 @@ from typing import List
 from typing import TextIO
 
 import constants as const
+from MVP.refactored.backend.hypergraph.hypergraph_manager import HypergraphManager
 from MVP.refactored.frontend.canvas_objects.connection import Connection
 from MVP.refactored.frontend.canvas_objects.types.connection_type import ConnectionType
 from MVP.refactored.frontend.canvas_objects.wire import Wire
@@ -47,7 +48,8 @@ class JsonImporter(Importer):
         self.load_static_variables(data)
         data = data["main_canvas"]
 
-        self.load_everything_to_canvas(data, self.canvas)
+        with HypergraphManager.batch():
+            self.load_everything_to_canvas(data, self.canvas)
         return os.path.basename(json_file.name)
 
     def load_everything_to_canvas(self, data, canvas):
@@ -176,7 +178,8 @@ class JsonImporter(Importer):
             if box["sub_diagram"]:
                 sub_diagram: CustomCanvas = new_box.edit_sub_diagram(save_to_canvasses=False)
 
-                self.load_everything_to_canvas(box["sub_diagram"], sub_diagram)
+                with HypergraphManager.batch():
+                    self.load_everything_to_canvas(box["sub_diagram"], sub_diagram)
                 if box["label"]:
                     name = box["label"]
                 else:
@@ -5,12 +5,14 @@ from typing import List
 from typing import TextIO
 
 from MVP.refactored.backend.box_functions.box_function import BoxFunction
+from MVP.refactored.backend.box_functions.box_function_registry import BoxFunctionRegistry
 from MVP.refactored.backend.box_functions.function_structure.assigned_value.assigned_value import AssignedValue
 from MVP.refactored.backend.box_functions.function_structure.assigned_value.function_call import FunctionCall
 from MVP.refactored.backend.box_functions.function_structure.code_element import CodeElementType
 from MVP.refactored.backend.box_functions.function_structure.code_line import CodeLine
 from MVP.refactored.backend.box_functions.function_structure.function_parser import FunctionParser
 from MVP.refactored.backend.box_functions.function_structure.function_structure import FunctionStructure
+from MVP.refactored.backend.hypergraph.hypergraph_manager import HypergraphManager
 from MVP.refactored.frontend.canvas_objects.box import Box
 from MVP.refactored.frontend.canvas_objects.spider import Spider
 from MVP.refactored.frontend.components.custom_canvas import CustomCanvas
@@ -53,7 +55,8 @@ class PythonImporter(Importer):
         first_function.imports = all_imports
 
         data = {"functions": all_functions, "main_logic": main_logic, "deep_generation": activate_indepth}
-        self.load_everything_to_canvas(data, self.canvas)
+        with HypergraphManager.batch():
+            self.load_everything_to_canvas(data, self.canvas)
 
         return main_diagram_name
 
@@ -152,8 +155,8 @@ class PythonImporter(Importer):
     @staticmethod
     def _create_box_sub_diagram(box: Box, assigned_variables_amount: int, functions: dict[str, BoxFunction]) -> None:
         from MVP.refactored.frontend.windows.main_diagram import MainDiagram
-        function_structure: FunctionStructure = BoxFunction(file_code=MainDiagram.get_function(box.label_text),
-                                                            main_function_name=box.label_text).function_structure
+        function_structure: FunctionStructure = BoxFunctionRegistry.get(
+            box.label_text, MainDiagram.get_function(box.label_text)).function_structure
         arguments = function_structure.arguments
 
         sub_diagram_canvas: CustomCanvas = box.edit_sub_diagram(save_to_canvasses=True, switch=False)